@@ -0,0 +1,244 @@
+import hashlib
+import os
+import tempfile
+import threading
+import zipfile
+import numpy as np
+from audio_source import AudioSource
+from fft_backend import FFTBackend, fft_backend
+from peak_pyramid import PeakPyramid
+from recordings_catalog import RecordingsCatalog, catalog
+from streaming_filter import StreamingFilter
+
+
+class AudioAnalysis:
+    """Análise de um arquivo feita numa única passagem e gravada ao lado dele (gravacao.analysis.npz).
+
+    Guarda o pico global e por canal, o envelope RMS, a pirâmide de picos min/max de cada canal e a
+    densidade espectral média (Welch). Visualizações e normalizações leem o arquivo de análise em vez
+    de percorrer as amostras; ele vale enquanto o hash do conteúdo for o mesmo gravado nele.
+    """
+    VERSION = 2  # 2: Welch com a média de cada segmento removida
+    ENVELOPE_SIZE = 2048  # Quadros por ponto do envelope RMS
+    SEGMENT_SIZE = 4096  # Quadros por segmento do Welch (passo de metade, janela de Hann, sem a média)
+    BLOCK_SIZE = 1 << 20  # Múltiplo da base da pirâmide, do envelope e do passo do Welch
+    READ_ERRORS = (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile)  # Arquivo de análise ilegível
+
+    def __init__(self, content_hash, rate, num_frames, sample_width, channel_peaks, envelope, spectrum, pyramids):
+        self.content_hash = content_hash
+        self.rate = rate
+        self.num_frames = num_frames
+        self.sample_width = sample_width
+        self.channel_peaks = channel_peaks  # Pico de cada canal, em [0, 1]
+        self.envelope = envelope  # RMS a cada ENVELOPE_SIZE quadros: (pontos, canais)
+        self.spectrum = spectrum  # Densidade espectral média (Welch): (SEGMENT_SIZE / 2 + 1, canais)
+        self.pyramids = pyramids  # PeakPyramid por canal, nos valores das amostras do arquivo
+
+    @property
+    def channels(self):
+        return len(self.channel_peaks)
+
+    @property
+    def peak(self):
+        """Pico global (todos os canais), em [0, 1]"""
+        return float(np.max(self.channel_peaks, initial=0.0))
+
+    @property
+    def duration(self):
+        return self.num_frames / self.rate if self.rate else 0.0
+
+    @property
+    def freqs(self):
+        return np.fft.rfftfreq(self.SEGMENT_SIZE, d=1 / self.rate)
+
+    def rms(self):
+        """RMS do arquivo inteiro (todos os canais), a partir do envelope"""
+        if not self.num_frames:
+            return 0.0
+        energy = np.square(self.envelope, dtype=np.float64).sum(axis=1) * self.ENVELOPE_SIZE
+        energy[-1] *= (self.num_frames - (len(self.envelope) - 1) * self.ENVELOPE_SIZE) / self.ENVELOPE_SIZE
+        return float(np.sqrt(energy.sum() / (self.num_frames * self.channels)))
+
+    def stats(self):
+        """Estatísticas no formato do catálogo de gravações"""
+        return {"duration": self.duration, "rate": self.rate, "channels": self.channels,
+                "sample_width": self.sample_width, "peak": self.peak, "rms": self.rms()}
+
+    @classmethod
+    def analyze(cls, source, content_hash=None, progress_callback=None):
+        """Percorre o sinal uma única vez, em blocos, e calcula todos os resumos.
+
+        Sem content_hash, o hash SHA-1 de um WAV é calculado no mesmo laço: cada bloco analisado é
+        somado ao hash logo depois, com os bytes do arquivo ainda no cache de páginas (nos formatos
+        decodificados, que não são lidos do arquivo em blocos, fica None).
+        progress_callback(fração) é chamado a cada bloco; uma exceção levantada por ele interrompe a análise.
+        """
+        base_size = 256
+        window = FFTBackend.window("hann", cls.SEGMENT_SIZE + 1)[:-1]  # Hann periódica, como no scipy.signal.welch
+        hop = cls.SEGMENT_SIZE // 2
+        channels = source.channels
+
+        digest = None
+        if content_hash is None and source.file_path is not None:
+            raw = np.memmap(source.file_path, dtype=np.uint8, mode='r')  # O arquivo inteiro, com os cabeçalhos
+            data_offset = AudioSource.parse_header(source.file_path)[4]
+            frame_bytes = source.sample_width * channels
+            digest, hashed = hashlib.sha1(), 0
+
+        mins, maxs, envelope = [], [], []
+        channel_peaks = np.zeros(channels)
+        power = np.zeros((cls.SEGMENT_SIZE // 2 + 1, channels))
+        num_segments = 0
+        done = 0
+        leftover = np.zeros((0, channels))  # Início do próximo segmento do Welch, vindo do bloco anterior
+
+        for block in source.blocks(cls.BLOCK_SIZE, channel=None):
+            # Pirâmide: nível 0 nos valores brutos das amostras, como a PeakPyramid
+            block_mins, block_maxs = zip(*(PeakPyramid.minmax(block[:, index], base_size) for index in range(channels)))
+            mins.append(np.stack(block_mins, axis=1))
+            maxs.append(np.stack(block_maxs, axis=1))
+
+            samples = source.to_float(block)
+            channel_peaks = np.maximum(channel_peaks, np.abs(samples).max(axis=0))
+
+            # Envelope RMS (só o último bloco pode terminar num trecho incompleto)
+            starts = np.arange(0, len(samples), cls.ENVELOPE_SIZE)
+            sums = np.add.reduceat(np.square(samples), starts, axis=0)
+            counts = np.diff(np.append(starts, len(samples)))[:, None]
+            envelope.append(np.sqrt(sums / counts).astype(np.float32))
+
+            # Welch: segmentos com sobreposição de 50%, inclusive entre blocos
+            samples = np.concatenate([leftover, samples])
+            count = (len(samples) - cls.SEGMENT_SIZE) // hop + 1 if len(samples) >= cls.SEGMENT_SIZE else 0
+            if count:
+                segments = np.lib.stride_tricks.sliding_window_view(samples, cls.SEGMENT_SIZE, axis=0)[::hop][:count]
+                segments = segments - segments.mean(axis=2, keepdims=True)  # detrend="constant", como no welch
+                segments *= window
+                spectra = fft_backend.rfft(segments, axis=2, overwrite_x=True)  # (segmentos, canais, bins)
+                power += np.square(np.abs(spectra)).sum(axis=0).T
+                num_segments += count
+            leftover = samples[count * hop:]
+
+            done += len(block)
+            if digest is not None:
+                stop = data_offset + done * frame_bytes  # O primeiro bloco leva também o cabeçalho
+                digest.update(raw[hashed:stop])
+                hashed = stop
+            if progress_callback:
+                progress_callback(done / max(len(source), 1))
+
+        if digest is not None:
+            digest.update(raw[hashed:])  # Chunks depois dos dados (ex.: LIST), se houver
+            content_hash = digest.hexdigest()
+
+        # Densidade espectral de potência unilateral, como scipy.signal.welch(scaling="density")
+        if num_segments:
+            power /= num_segments * source.rate * np.square(window).sum()
+            power[1:-1] *= 2
+
+        mins = np.concatenate(mins) if mins else np.zeros((0, channels), dtype=source.dtype)
+        maxs = np.concatenate(maxs) if maxs else np.zeros((0, channels), dtype=source.dtype)
+        pyramids = [PeakPyramid.from_base(np.ascontiguousarray(mins[:, index]), np.ascontiguousarray(maxs[:, index]),
+                                          len(source), base_size) for index in range(channels)]
+        envelope = np.concatenate(envelope) if envelope else np.zeros((0, channels), dtype=np.float32)
+        return cls(content_hash, source.rate, len(source), source.sample_width, channel_peaks, envelope,
+                   power.astype(np.float32), pyramids)
+
+    @staticmethod
+    def sidecar_path(file_path):
+        """Arquivo de análise gravado ao lado do áudio, ex.: gravacao.analysis.npz"""
+        return os.path.splitext(file_path)[0] + ".analysis.npz"
+
+    def save(self, path):
+        """Grava num temporário do mesmo diretório e o troca pelo definitivo: uma falha no meio (ex.:
+        disco cheio) não deixa um arquivo de análise truncado"""
+        arrays = {}
+        for channel, pyramid in enumerate(self.pyramids):
+            for level, (mins, maxs) in enumerate(pyramid.levels):
+                arrays[f"min_{channel}_{level}"] = mins
+                arrays[f"max_{channel}_{level}"] = maxs
+        base_size, factor = (self.pyramids[0].base_size, self.pyramids[0].factor) if self.pyramids else (256, 4)
+        descriptor, temporary = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                np.savez(f, version=self.VERSION, content_hash=self.content_hash or "", rate=self.rate,
+                         num_frames=self.num_frames, sample_width=self.sample_width, channel_peaks=self.channel_peaks,
+                         envelope=self.envelope, spectrum=self.spectrum, base_size=base_size, factor=factor, **arrays)
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data["version"]) != cls.VERSION:
+                raise ValueError("Versão do arquivo de análise desatualizada")
+            channel_peaks = data["channel_peaks"]
+            num_frames, base_size, factor = int(data["num_frames"]), int(data["base_size"]), int(data["factor"])
+            pyramids = []
+            for channel in range(len(channel_peaks)):
+                num_levels = sum(1 for name in data.files if name.startswith(f"min_{channel}_"))
+                levels = [(data[f"min_{channel}_{level}"], data[f"max_{channel}_{level}"]) for level in range(num_levels)]
+                pyramids.append(PeakPyramid(levels, num_frames, base_size, factor))
+            return cls(str(data["content_hash"]) or None, int(data["rate"]), num_frames, int(data["sample_width"]),
+                       channel_peaks, data["envelope"], data["spectrum"], pyramids)
+
+    @classmethod
+    def cached(cls, file_path):
+        """Análise do arquivo se houver uma válida e o hash atual já for conhecido pelo catálogo;
+        None caso contrário (não lê as amostras nem o conteúdo do arquivo)"""
+        content_hash = catalog.known_hash(file_path)
+        path = cls.sidecar_path(file_path)
+        if content_hash is None or not os.path.exists(path):
+            return None
+        try:
+            analysis = cls.load(path)
+        except cls.READ_ERRORS:
+            return None
+        return analysis if analysis.content_hash == content_hash else None
+
+    @classmethod
+    def load_or_build(cls, file_path, save_sidecar=True, progress_callback=None):
+        """Lê a análise do arquivo lateral, se o hash do conteúdo bater, ou a calcula (e grava e cadastra).
+
+        Pode levar segundos em arquivos longos (hash e análise): na interface, rode num FilterWorker.
+        O hash só é calculado à parte para validar um arquivo de análise existente; sem ele, sai da
+        mesma passagem da análise.
+        """
+        content_hash = catalog.known_hash(file_path)
+        path = cls.sidecar_path(file_path)
+        if os.path.exists(path):
+            content_hash = content_hash or RecordingsCatalog.file_hash(file_path)
+            try:
+                analysis = cls.load(path)
+                if analysis.content_hash == content_hash:
+                    return analysis
+            except cls.READ_ERRORS:
+                pass  # Arquivo de análise corrompido ou de outra versão: refaz
+
+        analysis = cls.analyze(StreamingFilter.open_source(file_path), content_hash, progress_callback)
+        if analysis.content_hash is None:
+            analysis.content_hash = RecordingsCatalog.file_hash(file_path)  # Formato decodificado
+        if save_sidecar:
+            try:
+                analysis.save(path)
+            except OSError:
+                pass  # Diretório somente leitura: segue sem o arquivo de análise
+        catalog.safe_register(file_path, stats=analysis.stats(), content_hash=analysis.content_hash)
+        return analysis
+
+    @classmethod
+    def build_in_background(cls, file_paths):
+        """Analisa arquivos recém-gravados num thread, sem atrasar quem parou a gravação"""
+        def run():
+            for file_path in file_paths:
+                try:
+                    cls.load_or_build(file_path)
+                except (OSError, ValueError) as error:
+                    print(f"Erro ao analisar {file_path}: {error}")
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,122 @@
+import importlib
+import importlib.util
+import os
+import threading
+import numpy as np
+
+
+def decode_wav(module, file_path, dtype):
+    """WAV pelo AudioSource (leitura do cabeçalho com struct + np.memmap, sem bibliotecas externas)"""
+    source = module.AudioSource.open(file_path)
+    return source.rate, source.to_float(source.samples, dtype), source.sample_width
+
+
+def decode_soundfile(module, file_path, dtype):
+    """FLAC, OGG e (com libsndfile >= 1.1) MP3 pelo soundfile"""
+    audio_data, sample_rate = module.read(file_path, dtype=np.dtype(dtype).name, always_2d=True)
+    subtype = module.info(file_path).subtype
+    sample_width = {"PCM_24": 3, "PCM_32": 4, "FLOAT": 4, "DOUBLE": 8}.get(subtype, 2)
+    return sample_rate, audio_data, sample_width
+
+
+def decode_torchaudio(module, file_path, dtype):
+    """Qualquer formato suportado pelo torchaudio (importar o torch custa segundos: só no primeiro uso)"""
+    waveform, sample_rate = module.load(file_path)
+    audio_data = waveform.numpy().T.astype(dtype, copy=False)  # (canais, quadros) -> (quadros, canais)
+    return sample_rate, audio_data, 2
+
+
+def info_wav(module, file_path):
+    source = module.AudioSource.open(file_path)  # Só o cabeçalho é lido; as amostras ficam mapeadas
+    return source.rate, source.channels
+
+
+def info_soundfile(module, file_path):
+    info = module.info(file_path)
+    return info.samplerate, info.channels
+
+
+def info_torchaudio(module, file_path):
+    info = module.info(file_path)
+    return info.sample_rate, info.num_channels
+
+
+class AudioDecoder:
+    """Registro de decodificadores por extensão de arquivo.
+
+    Cada extensão tem uma lista de backends em ordem de preferência; o módulo de um backend só é
+    importado na primeira vez em que um arquivo daquela extensão é aberto. Backends não instalados
+    são pulados.
+    """
+    backends = {}  # Extensão -> lista de (módulo, função de decodificação, função de metadados)
+    _resolved = {}  # Extensão -> (módulo importado, decodificação, metadados), após o primeiro uso
+    _lock = threading.Lock()
+
+    @classmethod
+    def register(cls, extensions, module_name, decode, info=None):
+        """Adiciona um backend ao fim da lista das extensões dadas.
+
+        decode(módulo, file_path, dtype) deve retornar (sample_rate, audio_data, sample_width), com
+        audio_data no tipo de ponto flutuante dado, no formato (quadros, canais) e no intervalo [-1, 1].
+        info(módulo, file_path), opcional, retorna (sample_rate, channels) sem decodificar o arquivo.
+        """
+        with cls._lock:
+            for extension in extensions:
+                cls.backends.setdefault(extension.lower(), []).append((module_name, decode, info))
+                cls._resolved.pop(extension.lower(), None)
+
+    @classmethod
+    def extensions(cls):
+        """Extensões registradas, ex.: ('.wav', '.mp3', ...)"""
+        return tuple(cls.backends)
+
+    @classmethod
+    def supports(cls, file_path):
+        return os.path.splitext(file_path)[1].lower() in cls.backends
+
+    @classmethod
+    def available(cls, extension):
+        """Nomes dos backends instalados para a extensão (verifica sem importar)"""
+        return [module_name for module_name, _, _ in cls.backends.get(extension.lower(), [])
+                if importlib.util.find_spec(module_name) is not None]
+
+    @classmethod
+    def decode(cls, file_path, dtype=np.float64):
+        """Decodifica um arquivo e retorna (sample_rate, audio_data, sample_width)"""
+        module, decode, _ = cls._backend(os.path.splitext(file_path)[1].lower())
+        return decode(module, file_path, dtype)
+
+    @classmethod
+    def info(cls, file_path):
+        """(sample_rate, channels) lidos dos metadados do arquivo (decodifica só se o backend não souber)"""
+        module, decode, info = cls._backend(os.path.splitext(file_path)[1].lower())
+        if info is not None:
+            return info(module, file_path)
+        sample_rate, audio_data, _ = decode(module, file_path, np.float32)
+        return sample_rate, audio_data.shape[1]
+
+    @classmethod
+    def _backend(cls, extension):
+        with cls._lock:
+            if extension in cls._resolved:
+                return cls._resolved[extension]
+            if extension not in cls.backends:
+                raise ValueError(f"Formato de arquivo não suportado ({extension or 'sem extensão'}). "
+                                 f"Use {', '.join(ext.lstrip('.').upper() for ext in cls.backends)}.")
+
+            for module_name, decode, info in cls.backends[extension]:
+                try:
+                    module = importlib.import_module(module_name)
+                except ImportError:
+                    continue  # Backend não instalado: tenta o próximo
+                cls._resolved[extension] = (module, decode, info)
+                return module, decode, info
+
+        names = ", ".join(module_name for module_name, _, _ in cls.backends[extension])
+        raise ValueError(f"Nenhum decodificador instalado para {extension} (instale um destes: {names}).")
+
+
+AudioDecoder.register((".wav",), "audio_source", decode_wav, info_wav)
+AudioDecoder.register((".mp3",), "torchaudio", decode_torchaudio, info_torchaudio)
+AudioDecoder.register((".flac", ".ogg", ".mp3"), "soundfile", decode_soundfile, info_soundfile)
+AudioDecoder.register((".flac", ".ogg"), "torchaudio", decode_torchaudio, info_torchaudio)
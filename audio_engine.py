@@ -0,0 +1,182 @@
+import time
+import numpy as np
+import pyaudio
+
+# Tipo NumPy de cada formato de amostra do PyAudio
+SAMPLE_DTYPES = {
+    pyaudio.paInt8: np.int8,
+    pyaudio.paUInt8: np.uint8,
+    pyaudio.paInt16: np.int16,
+    pyaudio.paInt32: np.int32,
+    pyaudio.paFloat32: np.float32,
+}
+
+
+def output_format(dtype):
+    """Formato do PyAudio capaz de tocar amostras do tipo dado sem perder resolução"""
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'f':
+        return pyaudio.paFloat32
+    for sample_format, sample_dtype in SAMPLE_DTYPES.items():
+        if np.dtype(sample_dtype) == dtype:
+            return sample_format
+    raise ValueError(f"Tipo de amostra não suportado pelo PyAudio: {dtype}")
+
+
+def to_int16(frames):
+    """Converte amostras de qualquer formato suportado para a escala de int16 (usado pelas visualizações)"""
+    if frames.dtype == np.int16:
+        return frames
+    if frames.dtype == np.uint8:
+        return ((frames.astype(np.int16) - 128) << 8).astype(np.int16)
+    if frames.dtype == np.int8:
+        return frames.astype(np.int16) << 8
+    if frames.dtype == np.int32:
+        return (frames >> 16).astype(np.int16)
+    return (np.clip(frames, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+class RingBuffer:
+    """Buffer circular de quadros para um produtor e um consumidor, sem locks.
+
+    O produtor só avança write_index e o consumidor só avança read_index (inteiros que só crescem),
+    então o callback de áudio e o thread da aplicação nunca disputam o mesmo campo.
+    """
+
+    def __init__(self, capacity, channels=1, dtype=np.int16):
+        self.capacity = 1 << int(np.ceil(np.log2(max(capacity, 2))))  # Potência de 2: índice via máscara
+        self.mask = self.capacity - 1
+        self.data = np.zeros((self.capacity, channels), dtype=dtype)
+        self.write_index = 0
+        self.read_index = 0
+
+    def available(self):
+        """Quadros prontos para leitura"""
+        return self.write_index - self.read_index
+
+    def space(self):
+        """Quadros livres para escrita"""
+        return self.capacity - self.available()
+
+    def write(self, frames):
+        """Copia o máximo de quadros que couber e retorna quantos foram escritos (apenas o produtor chama)"""
+        count = min(len(frames), self.space())
+        start = self.write_index & self.mask
+        first = min(count, self.capacity - start)
+        self.data[start:start + first] = frames[:first]
+        self.data[:count - first] = frames[first:count]
+        self.write_index += count  # Publica os quadros só depois de copiados
+        return count
+
+    def read(self, out):
+        """Preenche out com até len(out) quadros e retorna quantos foram lidos (apenas o consumidor chama)"""
+        count = min(len(out), self.available())
+        start = self.read_index & self.mask
+        first = min(count, self.capacity - start)
+        out[:first] = self.data[start:start + first]
+        out[first:count] = self.data[:count - first]
+        self.read_index += count
+        return count
+
+    def discard(self):
+        """Descarta tudo o que está pendente (apenas o consumidor chama)"""
+        self.read_index = self.write_index
+
+
+class AudioEngine:
+    """Stream PyAudio em modo callback, ligado à aplicação por um RingBuffer.
+
+    Na captura, o callback escreve no buffer e a aplicação lê; na reprodução, a aplicação escreve e o
+    callback lê. frames_per_buffer define a latência do callback e buffer_frames a folga do buffer.
+    Overruns (buffer cheio ou overflow da entrada) e underruns (buffer vazio ou underflow da saída)
+    são contados.
+    """
+
+    def __init__(self, audio, rate, channels=1, sample_format=pyaudio.paInt16, input=False, output=False,
+                 device_index=None, frames_per_buffer=512, buffer_frames=16384):
+        if input == output:
+            raise ValueError("O AudioEngine deve ser apenas de entrada ou apenas de saída.")
+
+        self.rate = rate
+        self.channels = channels
+        self.is_input = input
+        self.dtype = SAMPLE_DTYPES[sample_format]
+        self.ring = RingBuffer(buffer_frames, channels, self.dtype)
+        self.out_buffer = np.zeros((frames_per_buffer, channels), dtype=self.dtype)  # Reutilizado pelo callback
+
+        self.paused = False  # Na reprodução, pausado gera silêncio imediatamente
+        self.end_of_stream = False  # Na reprodução, buffer vazio após o fim não conta como underrun
+        self.flush_requested = False  # Pedido do produtor para o callback descartar o que está no buffer
+        self.overruns = 0
+        self.underruns = 0
+
+        # Último callback de saída: (índice do primeiro quadro, quadros lidos, instante em que chega ao DAC)
+        self.last_callback = (0, 0, time.monotonic())
+
+        self.stream = audio.open(format=sample_format,
+                                 channels=channels,
+                                 rate=rate,
+                                 input=input,
+                                 output=output,
+                                 input_device_index=device_index if input else None,
+                                 output_device_index=device_index if output else None,
+                                 frames_per_buffer=frames_per_buffer,
+                                 stream_callback=self._callback,
+                                 start=False)
+
+    def start(self):
+        self.stream.start_stream()
+
+    def stop(self):
+        """Para o stream (aguarda o último callback)"""
+        if self.stream.is_active():
+            self.stream.stop_stream()
+
+    def close(self):
+        self.stop()
+        self.stream.close()
+
+    def latency(self):
+        """Latência informada pelo PortAudio, em segundos"""
+        return self.stream.get_input_latency() if self.is_input else self.stream.get_output_latency()
+
+    def played_frames(self):
+        """Índice (no buffer circular) do quadro de saída que está sendo ouvido agora"""
+        start, count, dac_time = self.last_callback
+        elapsed = int((time.monotonic() - dac_time) * self.rate)
+        return start + min(max(elapsed, 0), count)
+
+    def stats(self):
+        return {"overruns": self.overruns, "underruns": self.underruns, "latency": self.latency()}
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        if self.is_input:
+            frames = np.frombuffer(in_data, dtype=self.dtype).reshape(-1, self.channels)
+            if self.ring.write(frames) < len(frames) or status & pyaudio.paInputOverflow:
+                self.overruns += 1
+            return None, pyaudio.paContinue
+
+        if self.flush_requested:
+            self.flush_requested = False
+            self.ring.discard()
+
+        if len(self.out_buffer) < frame_count:
+            self.out_buffer = np.zeros((frame_count, self.channels), dtype=self.dtype)
+        out = self.out_buffer[:frame_count]
+
+        start = self.ring.read_index
+        count = 0 if self.paused else self.ring.read(out)
+
+        # Momento em que este bloco chega ao DAC, segundo o PortAudio (ou estimado pela latência)
+        dac_delay = time_info.get('output_buffer_dac_time', 0) - time_info.get('current_time', 0)
+        if dac_delay <= 0:
+            dac_delay = self.stream.get_output_latency()
+        self.last_callback = (start, count, time.monotonic() + dac_delay)
+
+        if count < frame_count:
+            out[count:] = 0  # Completa com silêncio
+            if not self.paused and not self.end_of_stream:
+                self.underruns += 1
+        if status & pyaudio.paOutputUnderflow:
+            self.underruns += 1
+        return out.tobytes(), pyaudio.paContinue
@@ -1,7 +1,12 @@
-import wave
-import numpy as np
+import threading
+import time
 import pyaudio
 from PyQt5.QtCore import pyqtSignal, QThread
+import numpy as np
+from audio_engine import AudioEngine, output_format, to_int16
+from audio_source import AudioSource
+from perf_monitor import monitor
+from playback_transport import PlaybackTransport
 
 
 class AudioPlayer(QThread):
@@ -9,69 +14,146 @@ class AudioPlayer(QThread):
     finished = pyqtSignal()
     paused = pyqtSignal()
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, effects=None, speed=1.0):
         super().__init__()
         self.file_path = file_path
+        self.effects = effects  # EffectsChain opcional, aplicada bloco a bloco
         self.is_paused = False
-        self.current_position = 0  # Posição atual de leitura do arquivo
         self.chunk_size = 1024  # Tamanho do bloco de áudio a ser reproduzido
-        self.rate = 44100  # Taxa de amostragem
-        self.audio_data = None  # Atributo para armazenar os dados de áudio
+
+        # Reprodução em modo callback: o thread enche um buffer circular que o PyAudio consome
+        self.engine = None
+        self.frames_per_buffer = 512  # Quadros por callback (latência)
+        self.buffer_frames = 8192  # Folga do buffer circular (também é a latência de um seek)
+        self.resume_event = threading.Event()  # Acorda o thread ao retomar, sem espera ativa
+        self.resume_event.set()
+
+        # Posição e velocidade (seek e velocidade podem ser pedidos de qualquer thread)
+        self.source = AudioSource.open(file_path)
+        self.rate = self.source.rate  # Taxa de amostragem
+        self.audio_data = self.source.samples  # Todos os canais, view sem cópia do arquivo mapeado em memória
+        self.channels = self.source.channels
+        # Toca no formato real do arquivo (24 bits vai em int32; float64 é reduzido a float32)
+        self.dtype = np.float32 if self.source.dtype.kind == 'f' else self.source.dtype
+        self.transport = PlaybackTransport(self.audio_data, self.rate)
+        self.transport.set_speed(speed)
+        self.position_rate = 20  # Atualizações de posição por segundo enviadas ao GUI
+        self.last_position_update = 0.0
 
     update_time_signal = pyqtSignal(float)  # Sinal que enviará o tempo atual da reprodução
+    chunk_signal = pyqtSignal(bytes)  # Primeiro canal de cada bloco reproduzido, em int16 (espectro e espectrograma)
 
     def run(self):
         """Reproduz o áudio e atualiza o tempo de reprodução"""
-        with wave.open(self.file_path, 'rb') as wf:
-            self.rate = wf.getframerate()
-            self.audio_data = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
-
         p = pyaudio.PyAudio()
-        stream = p.open(format=pyaudio.paInt16,
-                        channels=1,
-                        rate=self.rate,
-                        output=True)
-
-        self.current_position = 0
-        while self.current_position < len(self.audio_data):
+        self.engine = AudioEngine(p, self.rate,
+                                  channels=self.channels,
+                                  sample_format=output_format(self.dtype),
+                                  output=True,
+                                  frames_per_buffer=self.frames_per_buffer,
+                                  buffer_frames=self.buffer_frames)
+        if self.effects:
+            self.effects.set_sample_rate(self.rate)
+        self.engine.start()
+        poll_ms = max(1, int(self.frames_per_buffer / self.rate * 1000 / 2))
+
+        while True:
             if self.is_paused:
-                while self.is_paused:
-                    QThread.msleep(100)
-            chunk = self.audio_data[self.current_position:self.current_position + self.chunk_size]
-            stream.write(chunk.tobytes())
+                self.resume_event.wait()  # O callback já emite silêncio enquanto pausado
+                continue
+            if self.engine.ring.space() < self.chunk_size:
+                QThread.msleep(poll_ms)  # Buffer cheio: aguarda o callback consumir
+                self.emit_position()
+                continue
+
+            start, speed, chunk, seeked = self.transport.read_block(self.chunk_size)
+            if seeked:
+                self.flush()
+            if chunk is None:
+                break  # Fim do arquivo
+
+            # Buffer quase vazio: este bloco chega em cima da hora (o próximo callback pode faltar)
+            if self.engine.ring.available() < self.frames_per_buffer and not seeked:
+                monitor.count("player.late_chunks")
+
+            with monitor.timer("player.block"):
+                chunk = chunk.astype(self.dtype, copy=False)
+                if self.source.sample_width == 3:
+                    chunk = chunk << 8  # 24 bits ocupa os bits mais altos do int32
+                if self.effects:
+                    chunk = self.effects.process(chunk)  # Filtros em tempo real, sem arquivo intermediário
+
+                self.transport.mark(self.engine.ring.write_index, start, speed)
+                self.engine.ring.write(chunk)
+                self.chunk_signal.emit(to_int16(chunk[:, 0]).tobytes())  # Visualizações usam o primeiro canal
+            monitor.gauge("player.buffer_frames", self.engine.ring.available())
+            monitor.gauge("player.underruns", self.engine.underruns)  # Silêncio inserido por falta de dados
+            self.emit_position()
+
+        # Aguarda o callback tocar o que restou no buffer
+        self.engine.end_of_stream = True
+        while self.engine.ring.available():
+            QThread.msleep(poll_ms)
+            self.emit_position()
+
+        stats = self.engine.stats()
+        if stats["underruns"]:
+            print(f"Atenção: {stats['underruns']} underrun(s) durante a reprodução")
+
+        self.engine.close()
+        p.terminate()
+        self.finished.emit()
 
-            # Envia o tempo atual da reprodução
-            current_time = self.current_position / self.rate
-            self.update_time_signal.emit(current_time)
+    def flush(self):
+        """Descarta o áudio já enviado ao buffer e aguarda o callback confirmar, para o seek ser exato"""
+        self.engine.flush_requested = True
+        while self.engine.flush_requested and self.engine.stream.is_active():
+            QThread.msleep(1)
 
-            self.current_position += self.chunk_size
+    def emit_position(self):
+        """Envia a posição ouvida (segundo o relógio do stream), no máximo position_rate vezes por segundo"""
+        now = time.monotonic()
+        if now - self.last_position_update < 1 / self.position_rate:
+            return
+        self.last_position_update = now
+        self.update_time_signal.emit(self.position() / self.rate)
 
-        stream.stop_stream()
-        stream.close()
-        p.terminate()
-        self.finished.emit()
+    def position(self):
+        """Quadro do arquivo que está sendo ouvido agora"""
+        if self.engine is None:
+            return self.transport.position
+        return self.transport.source_position(self.engine.played_frames())
 
     def pause(self):
         """Pausa a reprodução"""
         self.is_paused = True
+        self.resume_event.clear()
+        if self.engine:
+            self.engine.paused = True
 
     def resume(self):
         """Retoma a reprodução"""
         self.is_paused = False
+        if self.engine:
+            self.engine.paused = False
+        self.resume_event.set()
+
+    def seek(self, seconds):
+        """Salta para o instante dado, com precisão de amostra"""
+        self.transport.seek(round(seconds * self.rate))
+
+    def set_speed(self, speed):
+        """Altera a velocidade de reprodução (0.5x a 2x) sem reiniciar"""
+        self.transport.set_speed(speed)
 
     def rewind(self, seconds=2):
         """Retrocede a reprodução em segundos sem reiniciar"""
-        rewind_samples = int(seconds * self.rate)
-        self.current_position = max(self.current_position - rewind_samples, 0)  # Retrocede 2 segundos
+        self.transport.seek(self.position() - round(seconds * self.rate))  # Conta a partir do que está sendo ouvido
 
     def advance(self, seconds=2):
         """Avança a reprodução em segundos sem reiniciar"""
-        if self.audio_data is None:  # Verifica se os dados de áudio estão carregados
-            return
-
-        advance_samples = int(seconds * self.rate)
-        self.current_position = min(self.current_position + advance_samples, len(self.audio_data))  # Avança 2 segundos
+        self.transport.seek(self.position() + round(seconds * self.rate))  # Conta a partir do que está sendo ouvido
 
     def reset(self):
         """Reseta a posição de leitura para o começo"""
-        self.current_position = 0
\ No newline at end of file
+        self.transport.seek(0)
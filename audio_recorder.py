@@ -1,7 +1,12 @@
-import wave
+import numpy as np
 import pyaudio
-import os
 from PyQt5.QtCore import QThread, pyqtSignal
+from audio_engine import AudioEngine, to_int16
+from audio_analysis import AudioAnalysis
+from perf_monitor import monitor
+from recordings_catalog import catalog
+from sample_converter import SampleConverter
+from wav_stream_writer import WavStreamWriter
 
 
 class AudioRecorder(QThread):
@@ -12,16 +17,28 @@ class AudioRecorder(QThread):
     def __init__(self, filename="output.wav"):
         super().__init__()
         self.audio = pyaudio.PyAudio()
-        self.stream = None
+        self.engine = None  # Stream em modo callback (o PyAudio entrega os blocos num buffer circular)
         self.recording = False
         self.filename = filename
-        self.frames = []  # Lista para armazenar os frames de áudio
+        self.writer = None  # Grava os blocos em disco à medida que chegam
+        self.converter = None  # Converte taxa e resolução durante a captura (None = grava como capturado)
 
         # Parâmetros de gravação
         self.chunk = 1024  # Tamanho do bloco de áudio (1024 amostras por vez)
-        self.sample_format = pyaudio.paInt16  # Formato de amostra (16 bits por amostra)
+        self.sample_format = pyaudio.paInt16  # Formato de captura (paInt32 para gravar em 24 bits)
         self.channels = 1  # Número de canais (mono)
-        self.fs = 44100  # Taxa de amostragem (44100 Hz)
+        self.fs = 44100  # Taxa de captura; ao iniciar, passa a ser a taxa nativa do dispositivo
+
+        # Formato do arquivo gravado: a conversão acontece bloco a bloco, durante a captura
+        self.output_rate = None  # Taxa do arquivo (None = a mesma da captura)
+        self.sample_width = 2  # Bytes por amostra no arquivo (1, 2 ou 3)
+        self.dither = True  # Dither TPDF ao reduzir a resolução
+        self.max_segment_seconds = None  # Divide gravações longas em segmentos (None = arquivo único)
+        self.max_segment_bytes = None
+
+        # Parâmetros do callback de captura
+        self.frames_per_buffer = 512  # Quadros por callback (latência)
+        self.buffer_frames = 1 << 16  # Folga do buffer circular (~1,5 s a 44100 Hz)
 
     def start_recording(self, device_index=None):
         """Inicia a gravação em um thread separado"""
@@ -31,58 +48,103 @@ class AudioRecorder(QThread):
         # **Reinicializa o PyAudio para evitar erros em novas gravações**
         self.audio = pyaudio.PyAudio()
 
-        # Inicia o stream de áudio
-        self.stream = self.audio.open(format=self.sample_format,
-                                      channels=self.channels,
-                                      rate=self.fs,
-                                      frames_per_buffer=self.chunk,
-                                      input=True,
-                                      input_device_index=device_index)
+        # Captura na taxa nativa do dispositivo (sem reamostragem pelo driver) e com resolução suficiente
+        if device_index is not None:
+            device_info = self.audio.get_device_info_by_index(device_index)
+        else:
+            device_info = self.audio.get_default_input_device_info()
+        self.fs = int(device_info.get('defaultSampleRate') or self.fs)
+        self.sample_format = pyaudio.paInt32 if self.sample_width > 2 else pyaudio.paInt16
+        capture_width = self.audio.get_sample_size(self.sample_format)
+        output_rate = int(self.output_rate or self.fs)
+
+        # Inicia o stream de áudio em modo callback
+        self.engine = AudioEngine(self.audio, self.fs,
+                                  channels=self.channels,
+                                  sample_format=self.sample_format,
+                                  input=True,
+                                  device_index=device_index,
+                                  frames_per_buffer=self.frames_per_buffer,
+                                  buffer_frames=self.buffer_frames)
+
+        # Abre o arquivo de saída já no início: os blocos vão para o disco durante a gravação.
+        # O nome vem do id no catálogo (sem listar o diretório nem repetir nomes após exclusões)
+        self.filename = catalog.reserve("records")
+        self.converter = None
+        if output_rate != self.fs or self.sample_width != capture_width:
+            self.converter = SampleConverter(self.fs, output_rate, self.channels, self.sample_width, self.dither)
+        self.writer = WavStreamWriter(self.filename, self.channels, self.sample_width if self.converter else capture_width,
+                                      output_rate, max_segment_bytes=self.max_segment_bytes,
+                                      max_segment_seconds=self.max_segment_seconds)
 
         self.recording = True
-        self.frames = []  # Limpa os frames anteriores
+        self.engine.start()
 
         print("Recording started...")
         self.start()  # Inicia o thread de gravação
 
     def run(self):
-        """Método do thread que realiza a gravação"""
-        while self.recording:
-            data = self.stream.read(self.chunk, exception_on_overflow=False)
-            self.frames.append(data)
-            self.update_signal.emit(data)  # Envia os dados para o GUI, se necessário
-
-        self.stop_recording()  # Para a gravação ao terminar
+        """Método do thread que consome os blocos capturados pelo callback"""
+        block = np.empty((self.chunk, self.channels), dtype=self.engine.dtype)
+        poll_ms = max(1, int(self.frames_per_buffer / self.fs * 1000 / 2))
+
+        # Continua até esvaziar o buffer, mesmo depois de o stream parar
+        while self.recording or self.engine.ring.available():
+            if self.recording and self.engine.ring.available() < self.chunk:
+                QThread.msleep(poll_ms)  # Aguarda o callback acumular um bloco completo
+                continue
+
+            with monitor.timer("recorder.chunk"):
+                count = self.engine.ring.read(block)
+                data = self.converter.process(block[:count]) if self.converter else block[:count].tobytes()
+                try:
+                    self.writer.write(data)
+                except OSError as error:
+                    print(f"Erro ao gravar em disco: {error}")
+                    break
+                # O GUI recebe o primeiro canal em int16, qualquer que seja o formato gravado
+                self.update_signal.emit(to_int16(block[:count, 0]).tobytes())
+
+            # Fila acumulada no buffer: o thread está atrasado em relação ao callback
+            backlog = self.engine.ring.available()
+            monitor.gauge("recorder.backlog_frames", backlog)
+            if backlog > self.engine.ring.capacity // 2:
+                monitor.count("recorder.late_chunks")
+            monitor.gauge("recorder.overruns", self.engine.overruns)  # Blocos perdidos pela captura
 
     def stop_recording(self):
         """Para a gravação e salva os dados"""
         if not self.recording:
             return  # Não está gravando
 
+        # Para o stream antes: nenhum callback novo, e o thread esvazia o que restou no buffer
+        self.engine.stop()
         self.recording = False
+        self.wait()
+        self.engine.close()
+
+        stats = self.engine.stats()
+        if stats["overruns"]:
+            print(f"Atenção: {stats['overruns']} overrun(s) durante a gravação")
+
+        # Grava a cauda do reamostrador e os blocos que ainda estão na fila e finaliza o cabeçalho do WAV
+        try:
+            if self.converter:
+                self.writer.write(self.converter.flush())
+            files = self.writer.close()
+            if files:
+                print(f"Gravação salva em {', '.join(files)}")
+                # Análise (picos, envelope, espectro) e cadastro no catálogo, sem atrasar o GUI
+                AudioAnalysis.build_in_background(files)
+            else:
+                print("Gravação vazia: nenhum arquivo foi salvo")
+                catalog.release(self.filename)  # O nome reservado não foi usado
+        except OSError as error:
+            print(f"Erro ao salvar a gravação: {error}")
 
-        # Para o stream de áudio
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-
-        # Salva os dados gravados em um arquivo WAV
-        if not os.path.exists("records"):
-            os.makedirs("records")
-
-        filename = f"records/recorded_{len(os.listdir('records')) + 1}.wav"
-        with wave.open(filename, 'wb') as wf:
-            wf.setnchannels(self.channels)
-            wf.setsampwidth(self.audio.get_sample_size(self.sample_format))
-            wf.setframerate(self.fs)
-            wf.writeframes(b''.join(self.frames))
-
-        print(f"Gravação salva em {filename}")
         self.finished_signal.emit()  # Emite o sinal indicando que a gravação terminou
 
     def close(self):
         """Fecha o stream e termina a instância"""
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
+        self.stop_recording()  # Finaliza o arquivo da gravação em andamento, se houver
         self.audio.terminate()
@@ -0,0 +1,174 @@
+import os
+import struct
+import threading
+import weakref
+import numpy as np
+
+# Códigos de formato do chunk 'fmt ' de um WAV
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class Int24Samples:
+    """Amostras PCM de 24 bits mapeadas em memória: cada trecho acessado é convertido para int32 na hora"""
+    dtype = np.dtype(np.int32)
+
+    def __init__(self, raw):
+        self.raw = raw  # uint8 com os 3 bytes de cada amostra na última dimensão
+        self.shape = raw.shape[:-1]
+        self.ndim = len(self.shape)
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        raw = self.raw[key]
+        if isinstance(raw, np.ndarray) and raw.ndim == self.raw.ndim and raw.shape[-1] != 3:
+            raise IndexError("Índice inválido para amostras de 24 bits.")
+        raw = np.asarray(raw, dtype=np.int32)
+        value = raw[..., 0] | (raw[..., 1] << 8) | (raw[..., 2] << 16)
+        return (value << 8) >> 8  # Estende o sinal do bit 23
+
+    def __array__(self, dtype=None, copy=None):
+        return self[:] if dtype is None else self[:].astype(dtype)
+
+
+class AudioSource:
+    """Arquivo WAV mapeado em memória (np.memmap): abrir custa quase nada e as amostras são views sem cópia"""
+    _open_sources = weakref.WeakValueDictionary()  # Fontes já abertas, compartilhadas entre player, waveform e processador
+    _lock = threading.Lock()
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.format_tag, self.channels, self.rate, self.sample_width, data_offset, data_size = self.parse_header(file_path)
+        self.dtype = self.sample_dtype(self.format_tag, self.sample_width)
+
+        self.num_frames = data_size // (self.sample_width * self.channels)
+        if not self.num_frames:
+            self.samples = np.zeros((0, self.channels), dtype=self.dtype)
+        elif self.sample_width == 3:
+            # 24 bits não tem tipo NumPy: mapeia os bytes e converte apenas os trechos acessados
+            self.samples = Int24Samples(np.memmap(file_path, dtype=np.uint8, mode='r', offset=data_offset,
+                                                  shape=(self.num_frames, self.channels, 3)))
+        else:
+            # Matriz (quadros, canais) apontando diretamente para os bytes do arquivo
+            self.samples = np.memmap(file_path, dtype=self.dtype, mode='r', offset=data_offset,
+                                     shape=(self.num_frames, self.channels))
+
+    @classmethod
+    def open(cls, file_path):
+        """Retorna a fonte já aberta para o arquivo, se houver, ou abre uma nova"""
+        stat = os.stat(file_path)
+        key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+        with cls._lock:
+            source = cls._open_sources.get(key)
+            if source is None:
+                source = cls(file_path)
+                cls._open_sources[key] = source
+        return source
+
+    @classmethod
+    def from_array(cls, samples, rate, sample_width=2):
+        """Fonte em memória para áudio já decodificado (float em [-1, 1], formato (quadros, canais))"""
+        source = cls.__new__(cls)
+        source.file_path = None
+        source.format_tag = WAVE_FORMAT_IEEE_FLOAT
+        source.channels = samples.shape[1]
+        source.rate = rate
+        source.sample_width = sample_width  # Resolução original, usada para escolher o formato de saída
+        source.dtype = samples.dtype
+        source.num_frames = len(samples)
+        source.samples = samples
+        return source
+
+    @staticmethod
+    def parse_header(file_path):
+        """Lê os chunks RIFF e retorna (formato, canais, taxa, bytes por amostra, offset dos dados, tamanho dos dados)"""
+        file_size = os.path.getsize(file_path)
+        with open(file_path, 'rb') as f:
+            riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+            if riff != b'RIFF' or wave_id != b'WAVE':
+                raise ValueError(f"{file_path} não é um arquivo WAV.")
+
+            fmt = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise ValueError(f"{file_path} não possui chunk de dados.")
+                chunk_id, chunk_size = struct.unpack('<4sI', header)
+
+                if chunk_id == b'fmt ':
+                    body = f.read(chunk_size)
+                    format_tag, channels, rate, _, _, bits = struct.unpack('<HHIIHH', body[:16])
+                    if format_tag == WAVE_FORMAT_EXTENSIBLE:
+                        format_tag = struct.unpack('<H', body[24:26])[0]  # Início do GUID do subformato
+                    fmt = (format_tag, channels, rate, bits // 8)
+                elif chunk_id == b'data':
+                    if fmt is None:
+                        raise ValueError(f"{file_path}: chunk de dados antes do chunk de formato.")
+                    data_offset = f.tell()
+                    # Gravações interrompidas podem ter o tamanho desatualizado no cabeçalho
+                    data_size = min(chunk_size, file_size - data_offset)
+                    return fmt + (data_offset, data_size)
+                else:
+                    f.seek(chunk_size, 1)
+
+                if chunk_size % 2:
+                    f.seek(1, 1)  # Chunks são alinhados em 2 bytes
+
+    @staticmethod
+    def sample_dtype(format_tag, sample_width):
+        """Tipo NumPy correspondente ao formato das amostras"""
+        if format_tag == WAVE_FORMAT_IEEE_FLOAT and sample_width in (4, 8):
+            return np.dtype(f'<f{sample_width}')
+        if format_tag == WAVE_FORMAT_PCM and sample_width == 1:
+            return np.dtype(np.uint8)  # WAV de 8 bits é sem sinal
+        if format_tag == WAVE_FORMAT_PCM and sample_width in (2, 4):
+            return np.dtype(f'<i{sample_width}')
+        if format_tag == WAVE_FORMAT_PCM and sample_width == 3:
+            return np.dtype(np.int32)  # 24 bits, convertido para int32 (mesma escala, sinal estendido)
+        raise ValueError(f"Formato de WAV não suportado ({format_tag}, {8 * sample_width} bits).")
+
+    @staticmethod
+    def output_dtype(sample_width):
+        """Tipo PCM usado ao gravar resultados derivados: int16 até 16 bits, int32 acima (preserva a resolução)"""
+        return np.dtype(np.int16) if sample_width <= 2 else np.dtype(np.int32)
+
+    def __len__(self):
+        return self.num_frames
+
+    @property
+    def duration(self):
+        """Duração em segundos"""
+        return self.num_frames / self.rate
+
+    @property
+    def full_scale(self):
+        """Amplitude que corresponde a 1.0 (fundo de escala) no formato do arquivo"""
+        if self.dtype.kind == 'f':
+            return 1.0
+        if self.dtype == np.uint8:
+            return 128.0
+        return float(2 ** (8 * self.sample_width - 1))
+
+    def to_float(self, samples, dtype=np.float64):
+        """Converte amostras deste arquivo para ponto flutuante no intervalo [-1, 1] (uma única cópia)"""
+        result = np.array(samples, dtype=dtype)  # Sempre uma cópia: as operações abaixo são no lugar
+        if self.dtype == np.uint8:
+            result -= 128  # WAV de 8 bits é sem sinal
+        if self.full_scale != 1.0:
+            result /= self.full_scale
+        return result
+
+    def channel(self, index=0):
+        """View (sem cópia) das amostras de um canal"""
+        if isinstance(self.samples, Int24Samples):
+            return Int24Samples(self.samples.raw[:, index])  # Continua convertendo apenas o trecho acessado
+        return self.samples[:, index]
+
+    def blocks(self, block_size, channel=0):
+        """Percorre um canal (ou todos, com channel=None) em trechos consecutivos de até block_size quadros"""
+        samples = self.samples if channel is None else self.channel(channel)
+        for start in range(0, self.num_frames, block_size):
+            yield samples[start:start + block_size]
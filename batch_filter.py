@@ -0,0 +1,158 @@
+"""Filtragem em lote, sem interface gráfica (não importa PyQt5).
+
+Exemplo:
+    python batch_filter.py records/ --low-pass 500 --band-pass 300 3000 --workers 8
+    python batch_filter.py arquivo_longo.wav --low-pass 500 --streaming --workers 1 --block-workers 8
+"""
+import argparse
+import glob
+import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from audio_decoder import AudioDecoder
+from fft_backend import fft_backend
+from filter_design import FilterDesign
+from filter_pipeline import FilterPipeline, LowPass, HighPass, BandPass
+from recordings_catalog import catalog
+
+# Arquivos gerados por filtragens e conversões anteriores (ex.: gravacao_500_LP.wav) não são reprocessados
+DERIVED_PATTERN = re.compile(r"_(LP|HP|BP|BS|NOTCH|-?[\d.]+dB|\d+Hz_\d+bit)\.wav$")
+
+
+def find_inputs(patterns):
+    """Expande diretórios e padrões glob em uma lista ordenada de arquivos de áudio suportados"""
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*")
+        for path in glob.glob(pattern):
+            if AudioDecoder.supports(path) and not DERIVED_PATTERN.search(path):
+                files.add(path)
+    return sorted(files)
+
+
+def is_up_to_date(file_path, pipeline, streaming=False):
+    """A saída está atualizada se o catálogo tem o mesmo filtro aplicado ao conteúdo atual do arquivo
+    (uma saída igual com outro nome, ex.: de uma cópia do arquivo, é copiada em vez de recalculada).
+
+    Sem resposta do catálogo (desativado ou saída gravada antes dele), vale a comparação de datas:
+    a saída existe e é mais nova que o arquivo de entrada.
+    """
+    output_file = pipeline.output_path(file_path)
+    params = pipeline.derivation() if isinstance(pipeline, FilterDesign) else pipeline.derivation(streaming)
+    if catalog.reuse(file_path, "filter", params, output_file) is not None:
+        return True
+    try:
+        if catalog.path is not None and catalog.get(output_file) is not None:
+            return False  # O catálogo conhece a saída, mas de outro conteúdo ou com outros parâmetros
+    except (sqlite3.Error, OSError) as error:
+        print(f"Erro ao consultar o catálogo: {error}")
+    return os.path.exists(output_file) and os.path.getmtime(output_file) >= os.path.getmtime(file_path)
+
+
+def init_worker():
+    """Cada processo filtra arquivos distintos, então o cache de espectros só ocuparia memória; e os
+    processos já ocupam os núcleos, então cada FFT roda num thread só"""
+    FilterPipeline.cache = None
+    fft_backend.workers = 1
+
+
+def process_file(file_path, pipelines, streaming=False, force=False, block_workers=1):
+    """Aplica as cadeias pendentes a um arquivo e retorna [(output_file, status, segundos)].
+
+    block_workers > 1 divide os blocos de cada arquivo entre processos (modo streaming e FIR projetados).
+    """
+    pending = [pipeline for pipeline in pipelines
+               if force or not is_up_to_date(file_path, pipeline, streaming)]
+    results = [(pipeline.output_path(file_path), "atualizado", 0.0)
+               for pipeline in pipelines if pipeline not in pending]
+    if not pending:
+        return results
+
+    # Filtros projetados (FIR/IIR) sempre rodam em blocos, um por vez
+    for design in [item for item in pending if isinstance(item, FilterDesign)]:
+        design_start = time.perf_counter()
+        output_file = design.filter_file(file_path, workers=block_workers)[0]
+        results.append((output_file, "ok", time.perf_counter() - design_start))
+    pending = [item for item in pending if not isinstance(item, FilterDesign)]
+    if not pending:
+        return results
+
+    start = time.perf_counter()
+    if streaming:
+        for pipeline in pending:
+            pipeline_start = time.perf_counter()
+            output_file = pipeline.run(file_path, streaming=True, workers=block_workers)[0]
+            results.append((output_file, "ok", time.perf_counter() - pipeline_start))
+    else:
+        # Uma única decodificação e FFT para todas as saídas do arquivo
+        outputs = FilterPipeline.run_many(file_path, pending, spectra=False)  # Sem gráficos: pula as magnitudes
+        elapsed = time.perf_counter() - start
+        results.extend((output[0], "ok", elapsed / len(outputs)) for output in outputs)
+    return results
+
+
+def build_pipelines(args):
+    if args.design != "fft":
+        # Filtros projetados no lugar das máscaras na FFT
+        designs = [FilterDesign("lowpass", cutoff, args.design, args.order) for cutoff in args.low_pass]
+        designs += [FilterDesign("highpass", cutoff, args.design, args.order) for cutoff in args.high_pass]
+        designs += [FilterDesign("bandpass", (low, high), args.design, args.order) for low, high in args.band_pass]
+        return designs
+
+    pipelines = [FilterPipeline([LowPass(cutoff)]) for cutoff in args.low_pass]
+    pipelines += [FilterPipeline([HighPass(cutoff)]) for cutoff in args.high_pass]
+    pipelines += [FilterPipeline([BandPass(low, high)]) for low, high in args.band_pass]
+    return pipelines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aplica os filtros do AudioProcessor a vários arquivos em paralelo.")
+    parser.add_argument("inputs", nargs="+", help="diretórios ou padrões glob (ex.: 'records/*.wav')")
+    parser.add_argument("--low-pass", type=int, action="append", default=[], metavar="HZ",
+                        help="filtro passa-baixa (pode repetir)")
+    parser.add_argument("--high-pass", type=int, action="append", default=[], metavar="HZ",
+                        help="filtro passa-alta (pode repetir)")
+    parser.add_argument("--band-pass", type=int, nargs=2, action="append", default=[], metavar=("LOW", "HIGH"),
+                        help="filtro passa-faixa (pode repetir)")
+    parser.add_argument("--design", choices=("fft",) + FilterDesign.METHODS, default="fft",
+                        help="fft (máscara ideal, padrão), fir (janela) ou IIR butter/cheby1/cheby2, aplicados em blocos")
+    parser.add_argument("--order", type=int, default=4, help="ordem do filtro projetado (FIR: coeficientes - 1)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="número de processos (padrão: núcleos)")
+    parser.add_argument("--streaming", action="store_true", help="filtra em blocos, com memória constante (só WAV)")
+    parser.add_argument("--block-workers", type=int, default=1, metavar="N",
+                        help="processos por arquivo no modo --streaming (para poucos arquivos muito longos)")
+    parser.add_argument("--force", action="store_true", help="reprocessa mesmo saídas já atualizadas")
+    args = parser.parse_args(argv)
+
+    pipelines = build_pipelines(args)
+    if not pipelines:
+        parser.error("informe ao menos um filtro (--low-pass, --high-pass ou --band-pass)")
+
+    files = find_inputs(args.inputs)
+    print(f"{len(files)} arquivo(s), {len(pipelines)} filtro(s), {args.workers} processo(s)")
+
+    start = time.perf_counter()
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker) as executor:
+        futures = {executor.submit(process_file, file_path, pipelines, args.streaming, args.force,
+                                   args.block_workers): file_path
+                   for file_path in files}
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                for output_file, status, elapsed in future.result():
+                    print(f"{elapsed:8.2f}s  {status:10s}  {output_file}")
+            except Exception as error:
+                failures += 1
+                print(f"{'':8s}   {'erro':10s}  {file_path}: {error}", file=sys.stderr)
+
+    print(f"Concluído em {time.perf_counter() - start:.2f}s ({failures} falha(s))")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""Benchmarks dos caminhos críticos de processamento e E/S, sem interface gráfica.
+
+Gera WAVs sintéticos (de segundos a horas) e mede, para cada caminho, a vazão (amostras/s),
+o pico de memória (RSS) e a latência. Cada caso roda num processo novo, para que o pico de
+memória de um não contamine o do outro. Os resultados são gravados em JSON e podem ser
+comparados com os de outro commit.
+
+Casos:
+    filter            AudioProcessor.low_pass_filter (arquivo inteiro em memória)
+    filter_streaming  AudioProcessor.low_pass_filter(streaming=True) (blocos, memória constante)
+    filter_parallel   o mesmo, com os blocos divididos entre processos (um por núcleo)
+    waveform_load     AudioAnalysis.load_or_build na primeira abertura (sem arquivo de análise) e a primeira vista
+    waveform_cached   o mesmo com o arquivo de análise válido e o hash no catálogo (aberturas seguintes)
+    update_plot       o que MediaPlayerUI.refresh_plot faz a cada quadro: juntar os blocos e analisar o espectro
+    recorder_save     o caminho de gravação do AudioRecorder: blocos de 1024 quadros para o WavStreamWriter
+
+Exemplo:
+    python benchmark.py --durations 10 600 3600 --json resultados.json --compare anterior.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows: sem pico de RSS
+    resource = None
+
+CASES = ["filter", "filter_streaming", "filter_parallel", "waveform_load", "waveform_cached", "update_plot",
+         "recorder_save"]
+RATE = 44100
+CHUNK = 1024  # Tamanho dos blocos da gravação e da reprodução
+PLOT_FPS = 30  # Mesma taxa de redesenho do MediaPlayerUI
+
+
+def synthetic_wav(data_dir, seconds, rate=RATE, block_seconds=10):
+    """Cria (ou reaproveita) um WAV mono de 16 bits com uma varredura de frequência mais ruído"""
+    path = os.path.join(data_dir, f"synthetic_{seconds:g}s.wav")
+    num_frames = int(seconds * rate)
+    if os.path.exists(path) and os.path.getsize(path) == 44 + 2 * num_frames:
+        return path
+
+    os.makedirs(data_dir, exist_ok=True)
+    generator = np.random.default_rng(0)
+    block = int(block_seconds * rate)
+    with wave.open(path, 'wb') as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        # Gerado em blocos: arquivos de horas não precisam caber na memória
+        for start in range(0, num_frames, block):
+            t = np.arange(start, min(start + block, num_frames)) / rate
+            sweep = np.sin(2 * np.pi * (100 + 40 * (t % 100)) * t)  # Varredura de 100 Hz a 4 kHz a cada 100 s
+            signal = 0.6 * sweep + 0.1 * generator.standard_normal(len(t))
+            out.writeframes(np.int16(np.clip(signal, -1, 1) * 32767).tobytes())
+    return path
+
+
+def latency_stats(latencies):
+    """Percentis da latência por chamada, em milissegundos"""
+    if not latencies:
+        return None
+    values = np.array(latencies) * 1000
+    return {"p50": float(np.percentile(values, 50)), "p99": float(np.percentile(values, 99)),
+            "max": float(values.max()), "calls": len(values)}
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo atual, em MB (None se não houver como medir)"""
+    try:
+        # No Linux, VmHWM é do próprio processo; ru_maxrss herdaria o pico do processo pai (fork + exec)
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # macOS em bytes, Linux em KiB
+
+
+def bench_filter(path, streaming=False, workers=1):
+    from audio_processor import AudioProcessor
+    from filter_pipeline import FilterPipeline
+    from recordings_catalog import catalog
+    FilterPipeline.cache = None  # Mede a decodificação e a FFT, não o cache
+    catalog.path = None  # Nem o cadastro das saídas no catálogo de gravações
+    start = time.perf_counter()
+    output_file = AudioProcessor.low_pass_filter(path, 1000, streaming=streaming, workers=workers)[0]
+    elapsed = time.perf_counter() - start
+    os.remove(output_file)
+    return elapsed, []
+
+
+def bench_waveform_load(path, cached=False, width=1600):
+    import tempfile
+    from audio_analysis import AudioAnalysis
+    from audio_source import AudioSource
+    from recordings_catalog import catalog
+    sidecar = AudioAnalysis.sidecar_path(path)
+    with tempfile.TemporaryDirectory() as directory:
+        catalog.path = os.path.join(directory, "catalog.sqlite3")  # Catálogo descartável, só deste caso
+        if os.path.exists(sidecar):
+            os.remove(sidecar)
+        if cached:
+            AudioAnalysis.load_or_build(path)  # Fora da medição: grava o arquivo de análise e cadastra o hash
+        start = time.perf_counter()
+        source = AudioSource.open(path)
+        analysis = AudioAnalysis.load_or_build(path)
+        analysis.pyramids[0].segment(source.channel(0), 0, len(source), 2 * width)
+        elapsed = time.perf_counter() - start
+    os.remove(sidecar)
+    return elapsed, []
+
+
+def bench_update_plot(path):
+    from audio_source import AudioSource
+    from spectrum_analyzer import SpectrumAnalyzer
+    source = AudioSource.open(path)
+    analyzer = SpectrumAnalyzer(sample_rate=source.rate)
+    chunks_per_frame = max(source.rate // (PLOT_FPS * CHUNK), 1)
+
+    # Blocos como chegam pelo sinal do Qt (bytes), agrupados como entre dois disparos do timer
+    latencies = []
+    pending = []
+    start = time.perf_counter()
+    for block in source.blocks(CHUNK):
+        pending.append(block.tobytes())
+        if len(pending) < chunks_per_frame:
+            continue
+        call = time.perf_counter()
+        audio_data = np.frombuffer(b''.join(pending), dtype=np.int16)
+        pending = []
+        analyzer.push(audio_data)
+        latencies.append(time.perf_counter() - call)
+    return time.perf_counter() - start, latencies
+
+
+def bench_recorder_save(path):
+    from audio_source import AudioSource
+    from wav_stream_writer import WavStreamWriter
+    source = AudioSource.open(path)
+    output_file = os.path.splitext(path)[0] + "_recorded.wav"
+    writer = WavStreamWriter(output_file, 1, 2, source.rate)
+
+    latencies = []
+    start = time.perf_counter()
+    for block in source.blocks(CHUNK):
+        call = time.perf_counter()
+        writer.write(block.tobytes())  # Latência vista pelo thread de gravação
+        latencies.append(time.perf_counter() - call)
+    files = writer.close()  # Inclui esvaziar a fila e finalizar o cabeçalho
+    elapsed = time.perf_counter() - start
+    for file in files:
+        os.remove(file)
+    return elapsed, latencies
+
+
+def run_case(case, path, num_samples):
+    """Executado num processo novo: roda um caso e retorna as métricas"""
+    if case == "filter":
+        elapsed, latencies = bench_filter(path)
+    elif case == "filter_streaming":
+        elapsed, latencies = bench_filter(path, streaming=True)
+    elif case == "filter_parallel":
+        elapsed, latencies = bench_filter(path, streaming=True, workers=None)
+    elif case == "waveform_load":
+        elapsed, latencies = bench_waveform_load(path)
+    elif case == "waveform_cached":
+        elapsed, latencies = bench_waveform_load(path, cached=True)
+    elif case == "update_plot":
+        elapsed, latencies = bench_update_plot(path)
+    else:
+        elapsed, latencies = bench_recorder_save(path)
+
+    return {"seconds": elapsed,
+            "throughput": num_samples / elapsed if elapsed > 0 else None,  # Amostras por segundo
+            "latency_ms": latency_stats(latencies) or {"p50": elapsed * 1000, "p99": elapsed * 1000,
+                                                       "max": elapsed * 1000, "calls": 1},
+            "peak_rss_mb": peak_rss_mb()}
+
+
+def git_commit():
+    try:
+        root = os.path.dirname(os.path.abspath(__file__))
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_file):
+    """Imprime a variação de vazão em relação a um JSON de uma execução anterior"""
+    with open(baseline_file) as f:
+        baseline = {(r["case"], r["duration"]): r for r in json.load(f)["results"] if "throughput" in r}
+
+    print(f"\nComparação com {baseline_file}:")
+    for result in results:
+        previous = baseline.get((result["case"], result["duration"]))
+        if not previous or not result.get("throughput") or not previous.get("throughput"):
+            continue
+        ratio = result["throughput"] / previous["throughput"]
+        print(f"{result['case']:<18} {result['duration']:>8g} s   {ratio:6.2f}x "
+              f"({'mais rápido' if ratio >= 1 else 'mais lento'})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos críticos (sem interface gráfica).")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--durations", nargs="+", type=float, default=[1, 10, 60],
+                        help="durações dos WAVs sintéticos, em segundos (ex.: 1 60 3600)")
+    parser.add_argument("--data-dir", default="benchmark_data", help="onde guardar os WAVs sintéticos")
+    parser.add_argument("--max-in-memory", type=float, default=600,
+                        help="não roda o filtro em memória para arquivos mais longos que isso (segundos)")
+    parser.add_argument("--json", metavar="ARQUIVO", default="benchmark_results.json")
+    parser.add_argument("--compare", metavar="ARQUIVO", help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args(argv)
+
+    results = []
+    context = get_context("spawn")  # Processo limpo por caso: o pico de RSS é só dele
+    for duration in args.durations:
+        path = synthetic_wav(args.data_dir, duration)
+        num_samples = int(duration * RATE)
+        for case in args.cases:
+            result = {"case": case, "duration": duration, "samples": num_samples}
+            if case == "filter" and duration > args.max_in_memory:
+                result["skipped"] = f"mais longo que --max-in-memory ({args.max_in_memory:g} s)"
+                print(f"{case:<18} {duration:>8g} s   pulado")
+                results.append(result)
+                continue
+
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result.update(executor.submit(run_case, case, path, num_samples).result())
+            results.append(result)
+
+            rss = f"{result['peak_rss_mb']:8.1f} MB" if result["peak_rss_mb"] is not None else "       -"
+            print(f"{case:<18} {duration:>8g} s   {result['throughput'] / 1e6:8.2f} M amostras/s   "
+                  f"pico {rss}   p99 {result['latency_ms']['p99']:9.3f} ms")
+
+    with open(args.json, 'w') as f:
+        json.dump({"commit": git_commit(), "python": platform.python_version(), "numpy": np.__version__,
+                   "platform": platform.platform(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "results": results}, f, indent=2)
+    print(f"\nResultados salvos em {args.json}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
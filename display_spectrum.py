@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class DisplaySpectrum:
+    """Espectro de magnitude em resolução de exibição, para os gráficos de frequência.
+
+    Guarda o máximo e a potência média de grupos de bins consecutivos da rfft (no máximo
+    max_groups grupos, qualquer que seja a duração do arquivo). view() agrega esses grupos em
+    faixas de frequência espaçadas logaritmicamente, em dB. Quando o zoom pede mais resolução que
+    a dos grupos, detail(primeiro_bin, último_bin), se informado, devolve as magnitudes originais
+    dos bins (ou None, se não estiverem mais disponíveis).
+    """
+    MODES = ("max", "rms")
+
+    def __init__(self, maxs, powers, bin_width, group, num_bins, scale=1.0, detail=None, sample_rate=None):
+        self.maxs = maxs  # Maior magnitude de cada grupo
+        self.powers = powers  # Média dos quadrados das magnitudes de cada grupo
+        self.bin_width = bin_width  # Espaçamento entre os bins da rfft, em Hz
+        self.group = group  # Bins por grupo
+        self.num_bins = num_bins
+        self.scale = scale  # Converte magnitudes em amplitudes (0 dB = senoide de fundo de escala)
+        self.detail = detail
+        self.sample_rate = sample_rate  # Taxa do sinal analisado (max_freq só é a de Nyquist em FFTs de tamanho par)
+
+    @classmethod
+    def build(cls, spectrum, bin_width, scale=1.0, detail=None, max_groups=1 << 18, block_bins=1 << 18,
+              sample_rate=None):
+        """Resume uma rfft (bins, canais) complexa ou um vetor de magnitudes, em blocos de bins"""
+        num_bins = len(spectrum)
+        group = max(1, -(-num_bins // max_groups))
+        maxs = np.zeros(-(-num_bins // group), dtype=np.float32)
+        powers = np.zeros(len(maxs), dtype=np.float32)
+        step = group * max(1, block_bins // group)  # Blocos alinhados aos grupos
+        for start in range(0, num_bins, step):
+            chunk_maxs, chunk_powers = cls.reduce(cls.magnitudes(spectrum[start:start + step]), group)
+            first = start // group
+            maxs[first:first + len(chunk_maxs)] = chunk_maxs
+            powers[first:first + len(chunk_powers)] = chunk_powers
+        return cls(maxs, powers, bin_width, group, num_bins, scale, detail, sample_rate)
+
+    @staticmethod
+    def magnitudes(spectrum):
+        """Magnitudes de um trecho do espectro, com a média entre os canais"""
+        magnitudes = np.abs(spectrum)
+        return magnitudes.mean(axis=1) if magnitudes.ndim == 2 else magnitudes
+
+    @staticmethod
+    def reduce(magnitudes, group):
+        """Máximo e média dos quadrados de cada grupo de group bins (o último pode ser incompleto)"""
+        starts = np.arange(0, len(magnitudes), group)
+        counts = np.diff(np.append(starts, len(magnitudes)))
+        squares = np.square(magnitudes, dtype=np.float64)
+        return np.maximum.reduceat(magnitudes, starts), np.add.reduceat(squares, starts) / counts
+
+    @property
+    def max_freq(self):
+        """Frequência do último bin (a de Nyquist, se a FFT tem tamanho par)"""
+        return (self.num_bins - 1) * self.bin_width
+
+    def view(self, f_min=None, f_max=None, points=1024, mode="max"):
+        """(freqs, dB) do trecho [f_min, f_max] em até points faixas logarítmicas.
+
+        mode="max" mostra o pico de cada faixa (tons isolados não somem); mode="rms", o nível médio.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Agregação desconhecida: {mode}")
+        f_min = max(f_min or self.bin_width, self.bin_width)  # 0 Hz não cabe na escala logarítmica
+        f_max = min(f_max or self.max_freq, self.max_freq)
+        if f_max <= f_min or not self.num_bins:
+            return np.zeros(0), np.zeros(0)
+
+        # Poucos grupos no trecho: busca os bins originais, se houver de onde
+        step = self.bin_width * self.group  # Largura de um grupo, em Hz
+        first, last = int(f_min // step), min(int(f_max // step) + 1, len(self.maxs))
+        magnitudes = None
+        if self.group > 1 and last - first < points and self.detail is not None:
+            first_bin, last_bin = int(f_min // self.bin_width), min(int(f_max // self.bin_width) + 1, self.num_bins)
+            magnitudes = self.detail(first_bin, last_bin)
+        if magnitudes is not None:
+            maxs, powers = magnitudes, np.square(magnitudes, dtype=np.float64)
+            first_freq, step = first_bin * self.bin_width, self.bin_width
+        else:
+            maxs, powers = self.maxs[first:last], self.powers[first:last]
+            first_freq = first * step
+
+        # Faixas logarítmicas; onde ficam mais estreitas que um grupo (graves), cada grupo vira um ponto
+        edges = np.geomspace(f_min, f_max, points + 1)[:-1]
+        starts = np.unique(np.clip(((edges - first_freq) // step).astype(np.int64), 0, len(maxs) - 1))
+        stops = np.append(starts[1:], len(maxs))
+        low = np.maximum(first_freq + starts * step, f_min)
+        freqs = np.sqrt(low * (first_freq + stops * step))  # Centro geométrico de cada faixa
+
+        if mode == "max":
+            levels = 20 * np.log10(np.maximum(np.maximum.reduceat(maxs, starts) * self.scale, 1e-6))
+        else:
+            power = np.add.reduceat(powers, starts) / (stops - starts)
+            levels = 10 * np.log10(np.maximum(power * self.scale ** 2, 1e-12))
+        return freqs, levels
@@ -0,0 +1,158 @@
+"""FFTs reais com a melhor biblioteca disponível: pyFFTW, scipy.fft ou np.fft.
+
+Exemplo (compara as bibliotecas nos tamanhos usados pela aplicação):
+    python fft_backend.py --repeat 20
+"""
+import argparse
+import os
+import threading
+import time
+from functools import lru_cache
+import numpy as np
+
+
+class FFTBackend:
+    """rfft/irfft com a interface do scipy.fft, sobre pyFFTW, scipy.fft ou np.fft (nessa ordem de preferência).
+
+    A biblioteca só é importada no primeiro uso. Tamanhos primos ou com fatores grandes caem em
+    algoritmos várias vezes mais lentos: next_fast_len dá o menor tamanho rápido para a biblioteca em
+    uso que comporta o sinal, para completar com zeros. Os planos ficam em cache (o do pocketfft no
+    scipy/NumPy, o do pyfftw.interfaces no pyFFTW) e as janelas, por nome e tamanho.
+    """
+    NAMES = ("pyfftw", "scipy", "numpy")
+    WINDOWS = {"hann": np.hanning, "blackman": np.blackman, "hamming": np.hamming}
+    THREADS_MIN_SIZE = 1 << 18  # Abaixo disso, distribuir entre threads custa mais do que economiza
+    PLAN_KEEPALIVE = 1.0  # Segundos que um plano do pyFFTW sem uso continua em cache
+
+    def __init__(self, name=None, workers=None):
+        self.requested = name  # None: a melhor disponível
+        self.workers = workers or os.cpu_count() or 1  # Threads por transformada grande (1 desliga)
+        self.module = None
+        self.name = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Importa a biblioteca escolhida (ou a melhor instalada) na primeira transformada"""
+        with self.lock:
+            if self.module is not None:
+                return self.module
+            if self.requested is not None and self.requested not in self.NAMES:
+                raise ValueError(f"Biblioteca de FFT desconhecida: {self.requested} (use {', '.join(self.NAMES)}).")
+            for name in self.NAMES if self.requested is None else (self.requested,):
+                try:
+                    if name == "pyfftw":
+                        import pyfftw.interfaces.cache
+                        import pyfftw.interfaces.scipy_fft as module
+                        pyfftw.interfaces.cache.enable()
+                        pyfftw.interfaces.cache.set_keepalive_time(self.PLAN_KEEPALIVE)
+                    elif name == "scipy":
+                        from scipy import fft as module
+                    else:
+                        module = np.fft
+                except ImportError:
+                    if self.requested is not None:
+                        raise
+                    continue
+                self.module, self.name = module, name
+                return module
+
+    def threads(self, x):
+        return self.workers if np.size(x) >= self.THREADS_MIN_SIZE else 1
+
+    def rfft(self, x, n=None, axis=-1, overwrite_x=False):
+        """FFT real ao longo de axis (float32 -> complex64, exceto no np.fft anterior ao NumPy 2)"""
+        module = self.load()
+        if module is np.fft:
+            return np.fft.rfft(x, n, axis=axis)
+        return module.rfft(x, n, axis=axis, overwrite_x=overwrite_x, workers=self.threads(x))
+
+    def irfft(self, x, n=None, axis=-1, overwrite_x=False):
+        """Inversa da rfft; n (tamanho do sinal) é necessário para tamanhos ímpares"""
+        module = self.load()
+        if module is np.fft:
+            return np.fft.irfft(x, n, axis=axis)
+        return module.irfft(x, n, axis=axis, overwrite_x=overwrite_x, workers=self.threads(x))
+
+    def next_fast_len(self, size):
+        """Menor tamanho rápido >= size para FFTs reais: com o scipy.fft, o next_fast_len dele (que conhece
+        os tamanhos rápidos do pocketfft); nas demais bibliotecas, o de next_smooth_len"""
+        module = self.load()
+        if self.name == "scipy":
+            return module.next_fast_len(size, real=True)
+        return self.next_smooth_len(size)
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def next_smooth_len(size):
+        """Menor tamanho >= size sem fatores primos maiores que 5 (rápido em todas as bibliotecas)"""
+        if size <= 6:
+            return max(size, 1)
+        best = 1 << (size - 1).bit_length()  # Potência de 2 logo acima: sempre serve
+        power5 = 1
+        while power5 < best:
+            power35 = power5
+            while power35 < best:
+                # Menor potência de 2 que, multiplicada por 3^a 5^b, chega a size
+                candidate = power35 << max(0, (-(-size // power35) - 1).bit_length())
+                best = min(best, candidate)
+                power35 *= 3
+            power5 *= 5
+        return best
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def window(name, size):
+        """Janela simétrica (como np.hanning) calculada uma vez por tamanho; somente leitura, pois é
+        compartilhada"""
+        window = FFTBackend.WINDOWS[name](size)
+        window.setflags(write=False)
+        return window
+
+
+# Instância compartilhada (PDS_FFT=pyfftw|scipy|numpy força uma biblioteca)
+fft_backend = FFTBackend(os.environ.get("PDS_FFT") or None)
+
+
+def benchmark(backend, size, channels, repeat, dtype):
+    """Tempo médio (s) de uma rfft + irfft de um sinal (size, channels), no tamanho dado"""
+    signal = np.random.default_rng(0).standard_normal((size, channels)).astype(dtype)
+    backend.irfft(backend.rfft(signal, axis=0), size, axis=0)  # Aquece os planos e as janelas
+    start = time.perf_counter()
+    for _ in range(repeat):
+        backend.irfft(backend.rfft(signal, axis=0), size, axis=0)
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara as bibliotecas de FFT nos tamanhos usados pela aplicação.")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--rate", type=int, default=44100)
+    args = parser.parse_args(argv)
+
+    # (descrição, tamanho usado antes, tamanho necessário, canais, tipo)
+    cases = [("analisador (quadro de 2048)", 2048, 2048, 1, np.float64),
+             ("espectrograma (quadro de 1024)", 1024, 1024, 1, np.float64),
+             ("bloco do streaming (65536 + 1024)", 1 << 17, 65536 + 1024, 2, np.float64)]  # Era a potência de 2
+    backends = []
+    for name in FFTBackend.NAMES:
+        backend = FFTBackend(name)
+        try:
+            backend.load()
+        except ImportError:
+            print(f"{name}: não instalado")
+            continue
+        backends.append(backend)
+
+    print(f"{'caso':36s} {'antes':>10s} {'rápido':>10s}  " + "  ".join(f"{b.name:>16s}" for b in backends))
+    for label, size, needed, channels, dtype in cases:
+        fast = FFTBackend.next_smooth_len(needed)
+        repeat = max(1, args.repeat if size < 1 << 20 else args.repeat // 10)
+        baseline = benchmark(backends[-1], size, channels, repeat, dtype)  # np.fft no tamanho usado antes
+        times = [benchmark(backend, fast, channels, repeat, dtype) for backend in backends]
+        print(f"{label:36s} {size:10d} {fast:10d}  "
+              + "  ".join(f"{1000 * t:9.3f} ms {baseline / t:4.1f}x" for t in times))
+    print("(tempo de uma rfft + irfft no tamanho rápido; o ganho é sobre o np.fft no tamanho usado antes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import os
+import numpy as np
+from fft_backend import fft_backend
+from streaming_filter import StreamingFilter
+
+
+def _signal():
+    """scipy.signal, importado no primeiro projeto ou IIR (ver SCIPY_FREE_MODULES em startup_benchmark.py)"""
+    from scipy import signal
+    return signal
+
+
+class SosStreamingFilter(StreamingFilter):
+    """Filtro IIR em seções de segunda ordem com a interface do StreamingFilter: sosfilt bloco a bloco,
+    com o estado dos filtros preservado entre os blocos (sem atraso a compensar nem cauda)"""
+    parallel = False  # Recursivo: cada bloco depende de todo o sinal anterior
+
+    def __init__(self, sos, sample_rate, block_size=65536, channels=None):
+        self.sos = sos
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_size = block_size
+        self.num_taps = 1
+        self.delay = 0
+        self.sosfilt = _signal().sosfilt
+
+        # A FFT serve apenas para os espectros exibidos; o espectro filtrado usa a resposta do filtro
+        self.fft_size = fft_backend.next_fast_len(block_size)
+        self.freqs = np.fft.rfftfreq(self.fft_size, d=1 / sample_rate)
+        self.kernel_fft = _signal().sosfreqz(sos, worN=self.freqs, fs=sample_rate)[1]
+        if channels is not None:
+            self.kernel_fft = self.kernel_fft[:, None]
+        self.reset()
+
+    def reset(self):
+        shape = (len(self.sos), 2) if self.channels is None else (len(self.sos), 2, self.channels)
+        self.zi = np.zeros(shape)
+
+    def process_block(self, block):
+        output, self.zi = self.sosfilt(self.sos, block, axis=0, zi=self.zi)
+        return output
+
+    def process_spectrum(self, spectrum, size, block=None):
+        spectrum *= self.kernel_fft  # Espectro do bloco filtrado (em regime permanente)
+        return self.process_block(block)
+
+    def flush(self):
+        self.reset()
+        return np.zeros((0,) if self.channels is None else (0, self.channels))
+
+
+class FilterDesign:
+    """Filtro projetado: FIR por janela (windowed-sinc) ou IIR Butterworth/Chebyshev em seções de segunda ordem.
+
+    Ao contrário das máscaras do FilterPipeline (que zeram bins da FFT do arquivo inteiro e causam
+    ringing), o filtro é aplicado em blocos: convolução por FFT (FIR, fase linear) ou sosfilt (IIR).
+    """
+    KINDS = {"lowpass": "LP", "highpass": "HP", "bandpass": "BP", "bandstop": "BS"}
+    METHODS = ("fir", "butter", "cheby1", "cheby2")
+
+    def __init__(self, kind, cutoff, method="butter", order=4, ripple_db=1.0, attenuation_db=60.0, window="hamming"):
+        if kind not in self.KINDS:
+            raise ValueError(f"Tipo de filtro desconhecido: {kind}")
+        if method not in self.METHODS:
+            raise ValueError(f"Método de projeto desconhecido: {method}")
+        band = kind in ("bandpass", "bandstop")
+        if band != (np.ndim(cutoff) == 1):
+            raise ValueError("Passa-faixa e rejeita-faixa precisam de duas frequências; os demais, de uma.")
+        if order < 1:
+            raise ValueError("A ordem do filtro deve ser positiva.")
+
+        self.kind = kind
+        self.cutoff = tuple(cutoff) if band else cutoff
+        self.method = method
+        self.order = order  # No FIR, o número de coeficientes é order + 1 (ímpar)
+        self.ripple_db = ripple_db  # Ondulação na banda passante (Chebyshev I)
+        self.attenuation_db = attenuation_db  # Atenuação na banda de rejeição (Chebyshev II)
+        self.window = window
+        self.sample_rate = None  # Taxa do último arquivo filtrado
+
+        frequencies = f"{self.cutoff[0]}-{self.cutoff[1]}" if band else f"{cutoff}"
+        self.tag = f"{method}-{order}_{frequencies}_{self.KINDS[kind]}"
+
+    def design(self, sample_rate):
+        """Coeficientes para a taxa dada: núcleo FIR (1-D) ou matriz SOS (seções x 6)"""
+        if max(np.atleast_1d(self.cutoff)) >= sample_rate / 2:
+            raise ValueError(f"A frequência de corte deve ser menor que {sample_rate / 2:g} Hz (Nyquist).")
+        signal = _signal()
+
+        if self.method == "fir":
+            num_taps = self.order + 1 if self.order % 2 == 0 else self.order + 2  # Ímpar: atraso inteiro
+            return signal.firwin(num_taps, self.cutoff, window=self.window, pass_zero=self.kind, fs=sample_rate)
+        if self.method == "butter":
+            return signal.butter(self.order, self.cutoff, btype=self.kind, output='sos', fs=sample_rate)
+        if self.method == "cheby1":
+            return signal.cheby1(self.order, self.ripple_db, self.cutoff, btype=self.kind, output='sos',
+                                 fs=sample_rate)
+        return signal.cheby2(self.order, self.attenuation_db, self.cutoff, btype=self.kind, output='sos',
+                             fs=sample_rate)
+
+    def make_filter(self, sample_rate, channels=None, block_size=65536):
+        """Filtro em blocos (interface do StreamingFilter) para a taxa e o número de canais dados"""
+        coefficients = self.design(sample_rate)
+        if self.method == "fir":
+            return StreamingFilter(None, sample_rate, block_size=block_size, channels=channels, kernel=coefficients)
+        return SosStreamingFilter(coefficients, sample_rate, block_size=block_size, channels=channels)
+
+    def response(self, freqs, sample_rate=None):
+        """Magnitude da resposta em frequência nas frequências dadas (em Hz)"""
+        sample_rate = sample_rate or self.sample_rate
+        coefficients = self.design(sample_rate)
+        if self.method == "fir":
+            return np.abs(_signal().freqz(coefficients, worN=freqs, fs=sample_rate)[1])
+        return np.abs(_signal().sosfreqz(coefficients, worN=freqs, fs=sample_rate)[1])
+
+    def output_path(self, file_path):
+        """Nome do arquivo de saída, ex.: gravacao_butter-4_500_LP.wav"""
+        return os.path.splitext(file_path)[0] + "_" + self.tag + ".wav"
+
+    def filter_file(self, file_path, output_file=None, block_size=65536, progress_callback=None, workers=1):
+        """Filtra um arquivo em blocos e retorna (output_file, original_spectrum, filtered_spectrum).
+
+        workers > 1 divide os blocos entre processos (só FIR; os IIR são recursivos e rodam num processo só).
+        """
+        output_file = output_file or self.output_path(file_path)
+
+        def make_filter(sample_rate, channels):
+            self.sample_rate = sample_rate
+            return self.make_filter(sample_rate, channels, block_size)
+
+        return StreamingFilter.run_file(file_path, output_file, make_filter, block_size, progress_callback, workers,
+                                        self.derivation())
+
+    def derivation(self):
+        """Parâmetros da saída no catálogo de gravações"""
+        return {"tag": self.tag, "ripple_db": self.ripple_db, "attenuation_db": self.attenuation_db,
+                "window": self.window}
@@ -0,0 +1,273 @@
+import os
+import numpy as np
+from audio_analysis import AudioAnalysis
+from audio_decoder import AudioDecoder
+from audio_source import AudioSource
+from display_spectrum import DisplaySpectrum
+from fft_backend import fft_backend
+from perf_monitor import monitor
+from recordings_catalog import MeasuredWavWriter, catalog
+from spectrum_cache import SpectrumCache
+from streaming_filter import StreamingFilter
+
+
+class LowPass:
+    """Estágio passa-baixa: mantém as frequências até o corte"""
+
+    def __init__(self, cutoff_freq):
+        self.cutoff_freq = cutoff_freq
+        self.tag = f"{cutoff_freq}_LP"
+
+    def response(self, freqs):
+        return (freqs <= self.cutoff_freq).astype(np.float64)
+
+
+class HighPass:
+    """Estágio passa-alta: mantém as frequências a partir do corte"""
+
+    def __init__(self, cutoff_freq):
+        self.cutoff_freq = cutoff_freq
+        self.tag = f"{cutoff_freq}_HP"
+
+    def response(self, freqs):
+        return (freqs >= self.cutoff_freq).astype(np.float64)
+
+
+class BandPass:
+    """Estágio passa-faixa: mantém as frequências entre lowcut_freq e highcut_freq"""
+
+    def __init__(self, lowcut_freq, highcut_freq):
+        self.lowcut_freq = lowcut_freq
+        self.highcut_freq = highcut_freq
+        self.tag = f"{lowcut_freq}-{highcut_freq}_BP"
+
+    def response(self, freqs):
+        return ((freqs >= self.lowcut_freq) & (freqs <= self.highcut_freq)).astype(np.float64)
+
+
+class Notch:
+    """Estágio rejeita-faixa estreito: remove as frequências em torno de center_freq"""
+
+    def __init__(self, center_freq, width=10):
+        self.center_freq = center_freq
+        self.width = width
+        self.tag = f"{center_freq}_NOTCH"
+
+    def response(self, freqs):
+        return (np.abs(freqs - self.center_freq) > self.width / 2).astype(np.float64)
+
+
+class Gain:
+    """Estágio de ganho constante, em dB"""
+
+    def __init__(self, gain_db):
+        self.gain_db = gain_db
+        self.tag = f"{gain_db}dB"
+
+    def response(self, freqs):
+        return np.full(len(freqs), 10 ** (self.gain_db / 20))
+
+
+class FilterPipeline:
+    """Cadeia de filtros no domínio da frequência: decodifica e calcula a FFT uma única vez"""
+    cache = SpectrumCache()  # Compartilhado: refiltrar o mesmo arquivo só aplica a máscara e a FFT inversa
+    dtype = np.float32  # Precisão do processamento (float32/complex64); np.float64 dobra a memória
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+
+    def response(self, freqs):
+        """Resposta combinada de todos os estágios (produto das máscaras)"""
+        gains = np.ones(len(freqs))
+        for stage in self.stages:
+            gains *= stage.response(freqs)
+        return gains
+
+    @property
+    def tag(self):
+        return "_".join(stage.tag for stage in self.stages)
+
+    def output_path(self, file_path):
+        """Nome do arquivo de saída, ex.: gravacao_500_LP.wav"""
+        return os.path.splitext(file_path)[0] + "_" + self.tag + ".wav"
+
+    def derivation(self, streaming=False):
+        """Parâmetros da saída no catálogo de gravações (a máscara e o modo streaming dão resultados diferentes)"""
+        return {"tag": self.tag, "streaming": streaming}
+
+    def run(self, file_path, streaming=False, block_size=65536, progress_callback=None, spectra=True, workers=1):
+        """Aplica a cadeia a um arquivo e retorna (output_file, original_spectrum, filtered_spectrum).
+
+        Os espectros são DisplaySpectrum (resolução de exibição, qualquer que seja a duração do arquivo).
+
+        progress_callback(fração), se informado, é chamado a cada bloco (streaming) ou etapa.
+        Com spectra=False os espectros (usados só nos gráficos) não são calculados e vêm como None.
+        No modo streaming, workers > 1 (None: um por núcleo) divide os blocos entre processos.
+        """
+        # Modo streaming: filtra em blocos com memória constante (WAV), independente da duração do arquivo
+        if streaming:
+            with monitor.timer("filter.streaming"):
+                result = StreamingFilter.filter_file(file_path, self.output_path(file_path), self.response,
+                                                     block_size=block_size, progress_callback=progress_callback,
+                                                     workers=workers, derivation=self.derivation(True))
+            return result
+
+        return FilterPipeline.run_many(file_path, [self], progress_callback=progress_callback, spectra=spectra)[0]
+
+    @staticmethod
+    def load(file_path, dtype=None):
+        """Decodifica um arquivo de áudio e retorna (sample_rate, audio_data, sample_width), com
+        audio_data normalizado em [-1, 1].
+
+        audio_data é uma matriz (quadros, canais) com todos os canais do arquivo, no tipo dado
+        (padrão: FilterPipeline.dtype); sample_width é a resolução original, em bytes. O decodificador
+        é escolhido pela extensão (ver AudioDecoder) e só é importado quando necessário.
+        """
+        sample_rate, audio_data, sample_width = AudioDecoder.decode(file_path, dtype=dtype or FilterPipeline.dtype)
+
+        # Normaliza pelo pico global (no lugar), preservando o equilíbrio entre os canais; o pico vem do
+        # arquivo de análise, se houver um válido, sem percorrer as amostras
+        analysis = AudioAnalysis.cached(file_path)
+        peak = analysis.peak if analysis is not None else FilterPipeline.peak(audio_data)
+        if peak > 0:
+            audio_data /= peak
+        return sample_rate, audio_data, sample_width
+
+    @staticmethod
+    def peak(audio_data):
+        """Maior valor absoluto, sem criar a cópia que np.abs criaria"""
+        if not audio_data.size:
+            return 0.0
+        return max(abs(float(audio_data.max())), abs(float(audio_data.min())))
+
+    @staticmethod
+    def save(output_file, sample_rate, audio_data, dtype=np.int16, scale=1.0, block_size=1 << 18):
+        """Grava uma matriz (quadros, canais) num WAV no formato PCM dado, apenas com a biblioteca padrão.
+
+        As amostras são multiplicadas por scale e convertidas bloco a bloco, sem cópia inteira em PCM.
+        Retorna o MeasuredWavWriter usado (hash e estatísticas da saída, para o catálogo).
+        """
+        dtype = np.dtype(dtype)
+        with MeasuredWavWriter(output_file, sample_rate, audio_data.shape[1], dtype.itemsize, len(audio_data)) as out:
+            for start in range(0, len(audio_data), block_size):
+                block = audio_data[start:start + block_size].astype(np.float64) * scale  # float64: int32 sem estouro
+                if dtype.kind == 'i':
+                    np.clip(block, np.iinfo(dtype).min, np.iinfo(dtype).max, out=block)
+                out.writeframes(block.astype(dtype).tobytes())
+        return out
+
+    @staticmethod
+    def spectrum(file_path, dtype=None):
+        """Retorna (sample_rate, audio_data, fft_data, sample_width), reaproveitando o cache quando possível"""
+        dtype = np.dtype(dtype or FilterPipeline.dtype)
+
+        def compute():
+            sample_rate, audio_data, sample_width = FilterPipeline.load(file_path, dtype)
+            # Aplica a FFT em todos os canais de uma vez, ao longo do eixo do tempo; float32 -> complex64,
+            # sem cópias intermediárias em precisão dupla. Sem completar com zeros: a máscara ideal é
+            # definida na grade do arquivo (circular), e outro tamanho mudaria o resultado
+            return sample_rate, audio_data, fft_backend.rfft(audio_data, axis=0), sample_width
+
+        if FilterPipeline.cache is None:
+            return compute()
+        return FilterPipeline.cache.get_or_compute(FilterPipeline.spectrum_key(file_path, dtype), compute)
+
+    @staticmethod
+    def spectrum_key(file_path, dtype):
+        return FilterPipeline.cache.key(file_path, "rfft", "channels", np.dtype(dtype).name)
+
+    @staticmethod
+    def detail(file_path, bin_width, pipeline=None):
+        """Função detail(primeiro_bin, último_bin) do DisplaySpectrum: magnitudes do espectro em cache
+        (após a cadeia, se informada), ou None quando ele já saiu do cache"""
+        cache = FilterPipeline.cache
+        if cache is None:
+            return None
+        key = FilterPipeline.spectrum_key(file_path, FilterPipeline.dtype)
+
+        def fetch(start, stop):
+            entry = cache.get(key)
+            if entry is None:
+                return None
+            spectrum = entry[2][start:stop]
+            if pipeline is not None:
+                spectrum = pipeline.apply(spectrum, bin_width, np.empty_like(spectrum), first_bin=start)
+            return DisplaySpectrum.magnitudes(spectrum)
+        return fetch
+
+    def apply(self, fft_data, bin_width, out, first_bin=0, block_bins=1 << 18):
+        """Multiplica o espectro pela resposta da cadeia, em blocos de bins (sem vetores de frequências
+        e ganhos do tamanho do espectro); out pode ser o próprio fft_data. first_bin é o índice do
+        primeiro bin, quando fft_data é um trecho do espectro."""
+        for start in range(0, len(fft_data), block_bins):
+            stop = min(start + block_bins, len(fft_data))
+            gains = self.response(np.arange(first_bin + start, first_bin + stop) * bin_width).astype(out.real.dtype)
+            np.multiply(fft_data[start:stop], gains[:, None], out=out[start:stop])
+        return out
+
+    @staticmethod
+    def run_many(file_path, pipelines, progress_callback=None, spectra=True):
+        """Aplica várias cadeias ao mesmo arquivo a partir de uma única decodificação e FFT direta.
+
+        Retorna uma lista de (output_file, original_spectrum, filtered_spectrum), uma por cadeia; os
+        espectros são DisplaySpectrum, ou None se spectra=False.
+        """
+        # Decodifica e aplica a FFT uma vez para todas as cadeias (ou reaproveita do cache)
+        with monitor.timer("filter.spectrum"):
+            sample_rate, audio_data, fft_data, sample_width = FilterPipeline.spectrum(file_path)
+        if progress_callback:
+            progress_callback(0.5)
+        num_frames = len(audio_data)
+        del audio_data  # Só o espectro é usado daqui em diante (sem cache, a memória é liberada já)
+        bin_width = sample_rate / num_frames  # Espaçamento entre os bins da rfft, em Hz
+        dtype = AudioSource.output_dtype(sample_width)  # Mantém 24/32 bits, em qualquer formato
+
+        # Espectro antes do filtro em resolução de exibição, apenas se houver gráfico
+        # (0 dB = senoide de amplitude igual ao pico do sinal normalizado)
+        display_scale = 2 / num_frames
+        original_spectrum = None
+        if spectra:
+            original_spectrum = DisplaySpectrum.build(fft_data, bin_width, display_scale,
+                                                      FilterPipeline.detail(file_path, bin_width),
+                                                      sample_rate=sample_rate)
+
+        # Sem cache e com uma única cadeia, o espectro não será reusado: é filtrado no lugar.
+        # Caso contrário, uma única área de trabalho serve a todas as cadeias.
+        if FilterPipeline.cache is None and len(pipelines) == 1:
+            work = fft_data
+        else:
+            work = np.empty_like(fft_data)
+
+        results = []
+        for index, pipeline in enumerate(pipelines):
+            with monitor.timer("filter.apply"):
+                # Aplica todas as máscaras da cadeia de uma só vez
+                pipeline.apply(fft_data, bin_width, out=work)
+
+                # Espectro depois do filtro
+                filtered_spectrum = None
+                if spectra:
+                    filtered_spectrum = DisplaySpectrum.build(work, bin_width, display_scale,
+                                                              FilterPipeline.detail(file_path, bin_width, pipeline),
+                                                              sample_rate=sample_rate)
+
+                # Converte de volta para o domínio do tempo (n explícito preserva durações ímpares);
+                # a área de trabalho pode ser sobrescrita, o que poupa uma cópia interna
+                filtered_audio = fft_backend.irfft(work, num_frames, axis=0, overwrite_x=True)
+                if progress_callback:
+                    progress_callback(0.5 + 0.5 * (index + 0.5) / len(pipelines))
+
+                # Normaliza para o intervalo original e grava no formato PCM de saída, bloco a bloco
+                peak = FilterPipeline.peak(filtered_audio)
+                scale = np.iinfo(dtype).max / peak if peak > 0 else 0.0
+                output_file = pipeline.output_path(file_path)
+                written = FilterPipeline.save(output_file, sample_rate, filtered_audio, dtype, scale)
+                del filtered_audio
+            catalog.safe_register(output_file, parent=file_path, operation="filter", params=pipeline.derivation(),
+                                  stats=written.stats(), content_hash=written.content_hash)
+
+            results.append((output_file, original_spectrum, filtered_spectrum))
+            if progress_callback:
+                progress_callback(0.5 + 0.5 * (index + 1) / len(pipelines))
+
+        return results
@@ -0,0 +1,50 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class FilterCancelled(Exception):
+    """Levantada dentro do callback de progresso quando o usuário cancela a filtragem"""
+
+
+class FilterWorker(QThread):
+    """Executa um filtro do AudioProcessor (ou outra operação longa que aceite progress_callback, como
+    AudioAnalysis.load_or_build) em um thread separado, com progresso e cancelamento"""
+    progress_signal = pyqtSignal(int)  # Progresso em porcentagem (0 a 100)
+    result_signal = pyqtSignal(object)  # (output_file, original_spectrum, filtered_spectrum), no caso dos filtros
+    error_signal = pyqtSignal(str)  # Mensagem de erro
+    cancelled_signal = pyqtSignal()  # Signal quando a filtragem for cancelada
+
+    def __init__(self, filter_function, *args, **kwargs):
+        super().__init__()
+        self.filter_function = filter_function
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+        self.last_progress = -1
+
+    def run(self):
+        """Método do thread que aplica o filtro"""
+        try:
+            result = self.filter_function(*self.args, progress_callback=self.report_progress, **self.kwargs)
+        except FilterCancelled:
+            self.cancelled_signal.emit()
+            return
+        except Exception as error:
+            self.error_signal.emit(str(error))
+            return
+
+        self.result_signal.emit(result)
+
+    def report_progress(self, fraction):
+        """Callback chamado pelo filtro a cada etapa/bloco; interrompe a filtragem se houve cancelamento"""
+        if self.cancelled:
+            raise FilterCancelled()
+
+        # Só emite quando a porcentagem muda, para não inundar a fila de eventos do Qt
+        percent = int(fraction * 100)
+        if percent != self.last_progress:
+            self.last_progress = percent
+            self.progress_signal.emit(percent)
+
+    def cancel(self):
+        """Solicita o cancelamento (atendido no próximo bloco processado)"""
+        self.cancelled = True
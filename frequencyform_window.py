@@ -1,30 +1,92 @@
-from PyQt5.QtWidgets import QDialog, QVBoxLayout
+import numpy as np
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox
 import pyqtgraph as pg
 
 class FrequencyPlotWindow(QDialog):
-    """Janela para exibir os gráficos da FFT antes e depois do filtro"""
-    def __init__(self, filter_name, freqs, original_fft, filtered_fft):
+    """Janela para exibir os gráficos da FFT antes e depois do filtro.
+
+    Recebe espectros já resumidos (DisplaySpectrum): abre na hora, qualquer que seja a duração do
+    arquivo. O eixo de frequência é logarítmico, os gráficos compartilham o zoom e cada mudança de
+    zoom pede aos espectros só os pontos do trecho visível.
+    """
+    AGGREGATIONS = [("Máximo", "max"), ("RMS", "rms")]
+
+    def __init__(self, filter_name, original_spectrum, filtered_spectrum, response=None):
         super().__init__()
         self.setWindowTitle(f"Espectro de Frequência - Filtro {filter_name}")
         self.setGeometry(200, 200, 800, 600)
+        self.original_spectrum = original_spectrum
+        self.filtered_spectrum = filtered_spectrum
+        self.response = response  # Função freqs -> ganho (filtros projetados)
 
         layout = QVBoxLayout()
 
+        # Agregação das faixas de frequência: pico (tons isolados continuam visíveis) ou nível médio
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Agregação:"))
+        self.mode_selector = QComboBox()
+        for label, mode in self.AGGREGATIONS:
+            self.mode_selector.addItem(label, mode)
+        self.mode_selector.currentIndexChanged.connect(self.update_view)
+        controls.addWidget(self.mode_selector)
+        controls.addStretch()
+        layout.addLayout(controls)
+
         # Criando os gráficos
-        self.plot_widget_before = pg.PlotWidget()
-        self.plot_widget_before.setTitle("Frequências Originais")
-        self.plot_widget_before.setLabel('left', 'Magnitude')
-        self.plot_widget_before.setLabel('bottom', 'Frequência (Hz)')
-        self.plot_widget_before.plot(freqs, original_fft, pen='r')
-
-        self.plot_widget_after = pg.PlotWidget()
-        self.plot_widget_after.setTitle(f"Frequências após {filter_name}")
-        self.plot_widget_after.setLabel('left', 'Magnitude')
-        self.plot_widget_after.setLabel('bottom', 'Frequência (Hz)')
-        self.plot_widget_after.plot(freqs, filtered_fft, pen='b')
+        self.plot_widget_before = self.create_plot("Frequências Originais", 'Magnitude (dB)')
+        self.curve_before = self.plot_widget_before.plot(pen='r')
+
+        self.plot_widget_after = self.create_plot(f"Frequências após {filter_name}", 'Magnitude (dB)')
+        self.curve_after = self.plot_widget_after.plot(pen='b')
+        self.plot_widget_after.setXLink(self.plot_widget_before)
 
         # Adiciona os gráficos à interface
         layout.addWidget(self.plot_widget_before)
         layout.addWidget(self.plot_widget_after)
 
+        # Resposta em frequência do filtro projetado, em dB
+        self.curve_response = None
+        if response is not None:
+            self.plot_widget_response = self.create_plot("Resposta do Filtro", 'Ganho (dB)')
+            self.curve_response = self.plot_widget_response.plot(pen='g')
+            self.plot_widget_response.setYRange(-100, 5)
+            self.plot_widget_response.setXLink(self.plot_widget_before)
+            layout.addWidget(self.plot_widget_response)
+
         self.setLayout(layout)
+
+        # Redesenha quando o zoom para de mudar (evita recalcular a cada evento do mouse)
+        self.view_timer = QTimer()
+        self.view_timer.setSingleShot(True)
+        self.view_timer.setInterval(50)
+        self.view_timer.timeout.connect(self.update_view)
+        self.plot_widget_before.getViewBox().sigXRangeChanged.connect(self.view_timer.start)
+
+        # Vista inicial: do primeiro bin até Nyquist
+        f_min = original_spectrum.bin_width
+        f_max = max(original_spectrum.max_freq, f_min * 10)
+        self.plot_widget_before.setXRange(np.log10(f_min), np.log10(f_max), padding=0)
+        self.update_view()
+
+    @staticmethod
+    def create_plot(title, left_label):
+        plot_widget = pg.PlotWidget()
+        plot_widget.setTitle(title)
+        plot_widget.setLabel('left', left_label)
+        plot_widget.setLabel('bottom', 'Frequência (Hz)')
+        plot_widget.setLogMode(x=True, y=False)  # O eixo x fica em log10(Hz)
+        return plot_widget
+
+    def update_view(self):
+        """Recalcula as curvas para o trecho visível, com cerca de um ponto por pixel de largura"""
+        x_min, x_max = self.plot_widget_before.getViewBox().viewRange()[0]
+        f_min, f_max = 10 ** x_min, 10 ** x_max
+        points = max(self.plot_widget_before.width(), 100)
+        mode = self.mode_selector.currentData()
+
+        self.curve_before.setData(*self.original_spectrum.view(f_min, f_max, points, mode))
+        freqs, levels = self.filtered_spectrum.view(f_min, f_max, points, mode)
+        self.curve_after.setData(freqs, levels)
+        if self.curve_response is not None and len(freqs):
+            self.curve_response.setData(freqs, 20 * np.log10(np.maximum(self.response(freqs), 1e-6)))
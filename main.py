@@ -1,17 +1,34 @@
+import os
 import sys
+import time
 import numpy as np
 import pyqtgraph as pg
-from PyQt5.QtCore import QTimer
-from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import QTimer, Qt
+from PyQt5.QtGui import QIcon, QKeySequence, QFont
 from PyQt5.QtWidgets import QApplication, QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QComboBox, QFileDialog, \
-    QMessageBox, QInputDialog
+    QMessageBox, QInputDialog, QProgressDialog, QSlider, QLabel, QShortcut, QCheckBox
+from audio_decoder import AudioDecoder
 from audio_player import AudioPlayer  # Importa o reprodutor de som
 from audio_processor import AudioProcessor
 from audio_recorder import AudioRecorder  # Importa o gravador de som
+from filter_design import FilterDesign
+from filter_worker import FilterWorker
 from frequencyform_window import FrequencyPlotWindow
+from perf_monitor import monitor
+from realtime_effects import Biquad, EffectsChain
+from spectrogram_view import SpectrogramView
+from spectrum_analyzer import SpectrumAnalyzer
 from waveform_window import WaveformWindow
 
 class MediaPlayerUI(QWidget):
+    PLOT_FPS = 30  # Taxa máxima de redesenho do espectro em tempo real
+    # Opções de projeto dos filtros: (rótulo, método do FilterDesign, ordem padrão); None = máscara na FFT
+    FILTER_DESIGNS = [("FFT (máscara ideal)", None, 0), ("FIR (janela)", "fir", 256), ("Butterworth", "butter", 4),
+                      ("Chebyshev I", "cheby1", 4), ("Chebyshev II", "cheby2", 4)]
+    PERF_REFRESH_MS = 500  # Intervalo de atualização da sobreposição de desempenho
+    RECORD_RATES = [None, 48000, 44100, 32000, 22050, 16000, 8000]  # Taxas do arquivo gravado; None = nativa
+    RECORD_BITS = [8, 16, 24]
+
     def __init__(self):
         super().__init__()
         self.initUI()
@@ -53,29 +70,58 @@ class MediaPlayerUI(QWidget):
         # Botões de filtros com ícones e tooltips
         self.low_pass_button = QPushButton()
         self.low_pass_button.setIcon(QIcon('icons/low_pass.png'))
-        self.low_pass_button.setToolTip('Filtro Passa-Baixa (use em .wav e em .mp3)')
+        self.low_pass_button.setToolTip('Filtro Passa-Baixa (use em .wav, .mp3, .flac e .ogg)')
         self.low_pass_button.clicked.connect(self.apply_low_pass_filter)
 
         self.high_pass_button = QPushButton()
         self.high_pass_button.setIcon(QIcon('icons/high_pass.png'))
-        self.high_pass_button.setToolTip('Filtro Passa-Alta (use em .wav e em .mp3)')
+        self.high_pass_button.setToolTip('Filtro Passa-Alta (use em .wav, .mp3, .flac e .ogg)')
         self.high_pass_button.clicked.connect(self.apply_high_pass_filter)
 
         self.band_pass_button = QPushButton()
         self.band_pass_button.setIcon(QIcon('icons/band_pass.png'))
-        self.band_pass_button.setToolTip('Filtro Passa-Faixa (use em .wav e em .mp3)')
+        self.band_pass_button.setToolTip('Filtro Passa-Faixa (use em .wav, .mp3, .flac e .ogg)')
         self.band_pass_button.clicked.connect(self.apply_band_pass_filter)
 
+        # Velocidade de reprodução (pode ser alterada durante a reprodução)
+        self.speed_selector = QComboBox()
+        self.speed_selector.setToolTip("Velocidade de reprodução")
+        for speed in [0.5, 0.75, 1.0, 1.25, 1.5, 2.0]:
+            self.speed_selector.addItem(f"{speed}x", speed)
+        self.speed_selector.setCurrentIndex(2)
+        self.speed_selector.currentIndexChanged.connect(self.change_speed)
+
         # Adicionando botões ao layout
         for button in [self.record_button, self.play_button, self.pause_button,
                        self.forward_button, self.rewind_button, self.low_pass_button,
                        self.high_pass_button, self.band_pass_button]:
             button_layout.addWidget(button)
+        button_layout.addWidget(self.speed_selector)
 
         # Lista de dispositivos de entrada (microfones)
         self.device_selector = QComboBox()
         self.device_selector.setToolTip("Selecione o dispositivo de gravação")
-        main_layout.addWidget(self.device_selector)
+
+        # Formato do arquivo gravado: a captura usa a taxa nativa do dispositivo e é convertida ao gravar
+        self.record_rate_selector = QComboBox()
+        self.record_rate_selector.setToolTip("Taxa de amostragem do arquivo gravado")
+        for rate in self.RECORD_RATES:
+            self.record_rate_selector.addItem(f"{rate} Hz" if rate else "Taxa nativa", rate)
+        self.record_bits_selector = QComboBox()
+        self.record_bits_selector.setToolTip("Quantização do arquivo gravado")
+        for bits in self.RECORD_BITS:
+            self.record_bits_selector.addItem(f"{bits} bits", bits)
+        self.record_bits_selector.setCurrentIndex(self.RECORD_BITS.index(16))
+        self.dither_checkbox = QCheckBox("Dither")
+        self.dither_checkbox.setToolTip("Dither TPDF ao reduzir a quantização")
+        self.dither_checkbox.setChecked(True)
+
+        device_layout = QHBoxLayout()
+        device_layout.addWidget(self.device_selector, 1)
+        device_layout.addWidget(self.record_rate_selector)
+        device_layout.addWidget(self.record_bits_selector)
+        device_layout.addWidget(self.dither_checkbox)
+        main_layout.addLayout(device_layout)
 
         # Criando a área do gráfico de espectro
         self.plot_widget = pg.PlotWidget()
@@ -87,16 +133,68 @@ class MediaPlayerUI(QWidget):
 
         self.fft_curve = self.plot_widget.plot(pen='c')  # Linha azul no gráfico
 
+        # Espectrograma com rolagem, alimentado pela gravação e pela reprodução
+        self.spectrogram = SpectrogramView()
+        main_layout.addWidget(self.spectrogram)
+
+        # Redesenha o espectro a uma taxa limitada, juntando os blocos recebidos nesse intervalo
+        self.pending_chunks = []
+        self.last_refresh = None  # Instante do último redesenho (para contar quadros atrasados)
+        self.plot_timer = QTimer()
+        self.plot_timer.setInterval(1000 // self.PLOT_FPS)
+        self.plot_timer.timeout.connect(self.refresh_plot)
+
+        # Sobreposição com as medições de desempenho (F3 liga/desliga; PDS_PERF_OVERLAY=1 já abre ligada)
+        self.perf_overlay = QLabel(self.plot_widget)
+        self.perf_overlay.setFont(QFont("Monospace", 8))
+        self.perf_overlay.setStyleSheet("background-color: rgba(0, 0, 0, 160); color: #0f0; padding: 4px;")
+        self.perf_overlay.move(50, 5)
+        self.perf_overlay.hide()
+        self.perf_timer = QTimer()
+        self.perf_timer.setInterval(self.PERF_REFRESH_MS)
+        self.perf_timer.timeout.connect(self.refresh_perf_overlay)
+        QShortcut(QKeySequence("F3"), self, activated=self.toggle_perf_overlay)
+        if os.environ.get("PDS_PERF_OVERLAY") == "1":
+            self.toggle_perf_overlay()
+
+        # Gravação periódica das medições (ex.: PDS_PERF_DUMP=desempenho.csv, a cada PDS_PERF_INTERVAL segundos)
+        self.perf_dump_path = os.environ.get("PDS_PERF_DUMP")
+        if self.perf_dump_path:
+            monitor.start_dump(self.perf_dump_path, float(os.environ.get("PDS_PERF_INTERVAL", 5)))
+
+        # Efeito em tempo real aplicado durante a reprodução (tipo de biquad e frequência)
+        effects_layout = QHBoxLayout()
+        self.effect_selector = QComboBox()
+        self.effect_selector.setToolTip("Filtro aplicado em tempo real durante a reprodução")
+        for label, kind in [("Sem efeito", None), ("Passa-Baixa", "lowpass"), ("Passa-Alta", "highpass"),
+                            ("Passa-Faixa", "bandpass"), ("Notch", "notch"), ("Shelf Graves (+6 dB)", "lowshelf"),
+                            ("Shelf Agudos (+6 dB)", "highshelf")]:
+            self.effect_selector.addItem(label, kind)
+        self.effect_selector.currentIndexChanged.connect(self.update_effects)
+
+        # Slider em escala logarítmica: posição 0..1000 mapeada de 20 Hz a 20 kHz
+        self.effect_freq_slider = QSlider(Qt.Horizontal)
+        self.effect_freq_slider.setRange(0, 1000)
+        self.effect_freq_slider.setValue(500)
+        self.effect_freq_slider.valueChanged.connect(self.update_effects)
+        self.effect_freq_label = QLabel()
+
+        effects_layout.addWidget(self.effect_selector)
+        effects_layout.addWidget(self.effect_freq_slider)
+        effects_layout.addWidget(self.effect_freq_label)
+
         # Adiciona os layouts à interface
+        main_layout.addLayout(effects_layout)
         main_layout.addLayout(button_layout)
         self.setLayout(main_layout)
         self.setWindowTitle('Media Player')
-        self.setGeometry(100, 100, 600, 300)
+        self.setGeometry(100, 100, 600, 500)
 
     def initAudio(self):
         """Inicializa a configuração de áudio e lista apenas dispositivos de entrada"""
         self.recorder = AudioRecorder()  # Instância do AudioRecorder
         self.recorder.update_signal.connect(self.update_plot)  # Conecta o sinal de atualização do áudio
+        self.analyzer = SpectrumAnalyzer(sample_rate=self.recorder.fs)
 
         # Lista apenas dispositivos de ENTRADA (microfones)
         for i in range(self.recorder.audio.get_device_count()):
@@ -107,6 +205,13 @@ class MediaPlayerUI(QWidget):
         # Inicializa a variável que controla a reprodução
         self.is_playing = False
 
+        # Thread de filtragem em andamento (apenas uma por vez)
+        self.filter_worker = None
+
+        # Cadeia de efeitos compartilhada com o AudioPlayer (pode mudar durante a reprodução)
+        self.effects = EffectsChain()
+        self.update_effects()
+
     def toggle_recording(self):
         """Inicia ou para a gravação"""
         if self.recorder.recording:
@@ -120,27 +225,84 @@ class MediaPlayerUI(QWidget):
         if selected_device_index is None:
             return  # Nenhum dispositivo selecionado
 
+        # Formato do arquivo; o espectro ao vivo usa a taxa de captura (a dos blocos recebidos)
+        self.recorder.output_rate = self.record_rate_selector.currentData()
+        self.recorder.sample_width = self.record_bits_selector.currentData() // 8
+        self.recorder.dither = self.dither_checkbox.isChecked()
         self.recorder.start_recording(selected_device_index)
 
-        # Desativa a escolha de dispositivos
-        self.device_selector.setDisabled(True)
+        self.start_live_view(self.recorder.fs)
+
+        # Desativa a escolha de dispositivos e do formato
+        for widget in (self.device_selector, self.record_rate_selector, self.record_bits_selector,
+                       self.dither_checkbox):
+            widget.setDisabled(True)
 
     def stop_recording(self):
         """Para a gravação, fecha o stream e salva o arquivo"""
         self.recorder.stop_recording()
+        self.plot_timer.stop()
 
-        # Reabilita a seleção de dispositivo
-        self.device_selector.setEnabled(True)
+        # Reabilita a seleção de dispositivo e do formato
+        for widget in (self.device_selector, self.record_rate_selector, self.record_bits_selector,
+                       self.dither_checkbox):
+            widget.setEnabled(True)
 
     def update_plot(self, data):
-        """Atualiza o gráfico de frequência durante a gravação"""
-        audio_data = np.frombuffer(data, dtype=np.int16)
-        fft_data = np.abs(np.fft.rfft(audio_data))  # Aplica FFT
-        fft_data = fft_data / np.max(fft_data)  # Normaliza os valores
+        """Recebe um bloco da gravação; o gráfico é atualizado pelo timer de redesenho"""
+        self.pending_chunks.append(data)  # Apenas enfileira, para não acumular sinais pendentes no Qt
+
+    def start_live_view(self, sample_rate):
+        """Prepara o espectro e o espectrograma para uma nova gravação ou reprodução"""
+        if sample_rate != self.analyzer.sample_rate:
+            self.analyzer = SpectrumAnalyzer(sample_rate=sample_rate)
+        if sample_rate != self.spectrogram.sample_rate:
+            self.spectrogram.configure(sample_rate)
+        self.analyzer.reset()
+        self.spectrogram.reset()
+        self.pending_chunks = []
+        self.last_refresh = None
+        self.plot_timer.start()
+
+    def refresh_plot(self):
+        """Analisa os blocos pendentes de uma só vez e redesenha o gráfico de frequência, se mudou"""
+        # O timer disparou com atraso (thread do GUI ocupado): quadro atrasado
+        now = time.perf_counter()
+        if self.last_refresh is not None and now - self.last_refresh > 2 / self.PLOT_FPS:
+            monitor.count("plot.late_frames")
+        self.last_refresh = now
+
+        if not self.pending_chunks:
+            return
 
-        frequencies = np.fft.rfftfreq(len(audio_data), 1 / 44100)  # Eixo X (frequências)
+        # Blocos acumulados desde o último quadro: muitos indicam fila de sinais atrasada no Qt
+        monitor.gauge("plot.pending_chunks", len(self.pending_chunks))
+
+        with monitor.timer("plot.analyze"):
+            audio_data = np.frombuffer(b''.join(self.pending_chunks), dtype=np.int16)
+            self.pending_chunks = []
+            changed = self.analyzer.push(audio_data)
+            self.spectrogram.push(audio_data)
+
+        with monitor.timer("plot.redraw"):
+            if changed:
+                self.fft_curve.setData(self.analyzer.freqs, self.analyzer.spectrum)  # Atualiza o gráfico
+            self.spectrogram.refresh()
+
+    def toggle_perf_overlay(self):
+        """Mostra ou esconde a sobreposição de desempenho"""
+        if self.perf_overlay.isVisible():
+            self.perf_timer.stop()
+            self.perf_overlay.hide()
+        else:
+            self.refresh_perf_overlay()
+            self.perf_overlay.show()
+            self.perf_overlay.raise_()
+            self.perf_timer.start()
 
-        self.fft_curve.setData(frequencies, fft_data)  # Atualiza o gráfico
+    def refresh_perf_overlay(self):
+        self.perf_overlay.setText(monitor.summary() or "Sem medições ainda")
+        self.perf_overlay.adjustSize()
 
     def play_audio(self):
         """Permite ao usuário selecionar e reproduzir um arquivo de áudio"""
@@ -162,11 +324,26 @@ class MediaPlayerUI(QWidget):
         self.waveform_window = WaveformWindow(file, parent=self)
         self.waveform_window.show()
 
-        self.player_thread = AudioPlayer(file)
+        self.player_thread = AudioPlayer(file, effects=self.effects, speed=self.speed_selector.currentData())
         self.player_thread.update_time_signal.connect(self.waveform_window.update_pointer)  # Conexão do ponteiro
+        self.player_thread.chunk_signal.connect(self.update_plot)  # Espectro e espectrograma da reprodução
         self.player_thread.finished.connect(self.on_audio_finished)
+        self.start_live_view(self.player_thread.rate)
         self.player_thread.start()
 
+    def update_effects(self):
+        """Atualiza a cadeia de efeitos com o tipo e a frequência escolhidos (vale também durante a reprodução)"""
+        freq = round(20 * 1000 ** (self.effect_freq_slider.value() / 1000))
+        self.effect_freq_label.setText(f"{freq} Hz")
+
+        kind = self.effect_selector.currentData()
+        if kind is None:
+            self.effects.set_stages([])
+        elif kind in ("lowshelf", "highshelf"):
+            self.effects.set_stages([Biquad(kind, freq, gain_db=6.0)])
+        else:
+            self.effects.set_stages([Biquad(kind, freq)])
+
     def toggle_pause(self):
         """Pausa ou retoma a reprodução do áudio"""
         if self.is_playing:
@@ -177,6 +354,11 @@ class MediaPlayerUI(QWidget):
                 self.player_thread.pause()  # Pausa a reprodução
                 print("Reprodução pausada")
 
+    def change_speed(self):
+        """Altera a velocidade da reprodução em andamento"""
+        if self.is_playing:
+            self.player_thread.set_speed(self.speed_selector.currentData())
+
     def rewind_audio(self):
         """Retorna 2 segundos na reprodução"""
         if self.is_playing:
@@ -193,80 +375,118 @@ class MediaPlayerUI(QWidget):
         """Chama quando a reprodução do áudio for finalizada"""
         self.is_playing = False
         self.play_button.setEnabled(True)  # Reabilita o botão de reproduzir
+        if not self.recorder.recording:
+            self.plot_timer.stop()
         print("Reprodução finalizada")
 
     def closeEvent(self, event):
         """Garante que o áudio seja encerrado ao fechar a janela"""
+        if self.filter_worker and self.filter_worker.isRunning():
+            self.filter_worker.cancel()
+            self.filter_worker.wait()
         self.recorder.close()
+        if self.perf_dump_path:
+            monitor.stop_dump()
+            monitor.dump(self.perf_dump_path)  # Últimas medições da sessão
         event.accept()
 
+    @staticmethod
+    def audio_file_filter():
+        """Filtro do diálogo de arquivos com todas as extensões que os decodificadores registrados abrem"""
+        patterns = " ".join(f"*{extension}" for extension in AudioDecoder.extensions())
+        return f"Arquivos de Áudio ({patterns});; Arquivos Wav (*.wav)"
+
+    def max_cutoff(self, file_path):
+        """Maior frequência de corte possível para o arquivo: a de Nyquist, lida dos metadados"""
+        try:
+            sample_rate, _ = AudioDecoder.info(file_path)
+        except (OSError, ValueError) as error:
+            QMessageBox.critical(self, "Erro", f"Não foi possível ler o arquivo: {error}")
+            return None
+        return int(sample_rate) // 2 - 1
+
     def apply_low_pass_filter(self):
         """Abre um arquivo de áudio, aplica o filtro passa-baixa e exibe os gráficos"""
         options = QFileDialog.Options()
-        file_path, _ = QFileDialog.getOpenFileName(self, "Selecionar Arquivo de Áudio", "", "Arquivos Wav (*.wav);; Arquivos MP3 (*.mp3)",
+        file_path, _ = QFileDialog.getOpenFileName(self, "Selecionar Arquivo de Áudio", "", self.audio_file_filter(),
                                                    options=options)
 
         if not file_path:
             return  # Se o usuário cancelar a seleção
 
+        max_freq = self.max_cutoff(file_path)
+        if max_freq is None:
+            return
+
         # Solicita a frequência de corte do filtro
-        cutoff_freq, ok1 = QInputDialog.getInt(self, "Filtro Passa-Baixa", "Digite a frequência de corte (Hz):", min=1, max=44100)
+        cutoff_freq, ok1 = QInputDialog.getInt(self, "Filtro Passa-Baixa", "Digite a frequência de corte (Hz):", min=1,
+                                               max=max_freq)
         if not ok1:
             return  # Se o usuário cancelar a escolha da frequencia
 
-        # Processa o áudio e recebe os espectros da FFT antes e depois
-        output_file, freqs, original_fft, filtered_fft = AudioProcessor.low_pass_filter(file_path, cutoff_freq)
+        design = self.ask_filter_design("Filtro Passa-Baixa")
+        if design is False:
+            return  # Se o usuário cancelar a escolha do projeto
 
-        # Exibe os gráficos com a Transformada de Fourier
-        self.plot_window = FrequencyPlotWindow(f"Passa-Baixa ({cutoff_freq} Hz)", freqs, original_fft, filtered_fft)
-        self.plot_window.exec_()
-
-        if output_file:
-            QMessageBox.information(self, "Sucesso", f"Arquivo filtrado salvo como: {output_file}")
+        # Processa o áudio em segundo plano; os gráficos são exibidos quando o resultado chegar
+        if design:
+            self.run_filter(f"Passa-Baixa ({cutoff_freq} Hz)", AudioProcessor.design_filter, file_path, "lowpass",
+                            cutoff_freq, *design)
+        else:
+            self.run_filter(f"Passa-Baixa ({cutoff_freq} Hz)", AudioProcessor.low_pass_filter, file_path, cutoff_freq)
 
     def apply_high_pass_filter(self):
         """Abre um arquivo de áudio, aplica o filtro passa-baixa e exibe os gráficos"""
         options = QFileDialog.Options()
-        file_path, _ = QFileDialog.getOpenFileName(self, "Selecionar Arquivo de Áudio", "", "Arquivos Wav (*.wav);; Arquivos MP3 (*.mp3)",
+        file_path, _ = QFileDialog.getOpenFileName(self, "Selecionar Arquivo de Áudio", "", self.audio_file_filter(),
                                                    options=options)
 
         if not file_path:
             return  # Se o usuário cancelar a seleção
 
+        max_freq = self.max_cutoff(file_path)
+        if max_freq is None:
+            return
+
         # Solicita a frequência de corte do filtro
         cutoff_freq, ok1 = QInputDialog.getInt(self, "Filtro Passa-Alta ({cutoff_freq} Hz)", "Digite a frequência de corte (Hz):", min=1,
-                                               max=44100)
+                                               max=max_freq)
         if not ok1:
             return  # Se o usuário cancelar a escolha da frequencia
 
-        # Processa o áudio e recebe os espectros da FFT antes e depois
-        output_file, freqs, original_fft, filtered_fft = AudioProcessor.high_pass_filter(file_path, cutoff_freq)
-
-        # Exibe os gráficos com a Transformada de Fourier
-        self.plot_window = FrequencyPlotWindow(f"Passa-Alta", freqs, original_fft, filtered_fft)
-        self.plot_window.exec_()
+        design = self.ask_filter_design("Filtro Passa-Alta")
+        if design is False:
+            return  # Se o usuário cancelar a escolha do projeto
 
-        if output_file:
-            QMessageBox.information(self, "Sucesso", f"Arquivo filtrado salvo como: {output_file}")
+        # Processa o áudio em segundo plano; os gráficos são exibidos quando o resultado chegar
+        if design:
+            self.run_filter(f"Passa-Alta ({cutoff_freq} Hz)", AudioProcessor.design_filter, file_path, "highpass",
+                            cutoff_freq, *design)
+        else:
+            self.run_filter(f"Passa-Alta ({cutoff_freq} Hz)", AudioProcessor.high_pass_filter, file_path, cutoff_freq)
 
     def apply_band_pass_filter(self):
         """Abre um arquivo de áudio, solicita as frequências do filtro passa-banda, aplica o filtro e exibe os gráficos"""
         options = QFileDialog.Options()
-        file_path, _ = QFileDialog.getOpenFileName(self, "Selecionar Arquivo de Áudio", "", "Arquivos Wav (*.wav);; Arquivos MP3 (*.mp3)",
+        file_path, _ = QFileDialog.getOpenFileName(self, "Selecionar Arquivo de Áudio", "", self.audio_file_filter(),
                                                    options=options)
 
         if not file_path:
             return  # Se o usuário cancelar a seleção
 
+        max_freq = self.max_cutoff(file_path)
+        if max_freq is None:
+            return
+
         # Solicita a frequência mínima
         lowcut, ok1 = QInputDialog.getInt(self, "Passa-Banda", "Digite a frequência mínima (Hz):", min=1,
-                                          max=20000)
+                                          max=max_freq - 1)
         if not ok1:
             return  # Se o usuário cancelar
 
         # Solicita a frequência máxima
         highcut, ok2 = QInputDialog.getInt(self, "Passa-Banda", "Digite a frequência máxima (Hz):",
-                                           min=lowcut + 1, max=20000)
+                                           min=lowcut + 1, max=max_freq)
         if not ok2:
             return  # Se o usuário cancelar
 
@@ -275,20 +495,75 @@ class MediaPlayerUI(QWidget):
             QMessageBox.critical(self, "Erro", "A frequência mínima deve ser menor que a máxima.")
             return
 
-        # Processa o áudio e recebe os espectros da FFT antes e depois
-        output_file, freqs, original_fft, filtered_fft = AudioProcessor.band_pass_filter(file_path, lowcut, highcut)
+        design = self.ask_filter_design("Passa-Banda")
+        if design is False:
+            return  # Se o usuário cancelar a escolha do projeto
 
-        # Converte os valores complexos em magnitudes reais
-        original_fft = np.abs(original_fft)
-        filtered_fft = np.abs(filtered_fft)
+        # Processa o áudio em segundo plano; os gráficos são exibidos quando o resultado chegar
+        if design:
+            self.run_filter(f"Passa-Banda ({lowcut} - {highcut} Hz)", AudioProcessor.design_filter, file_path,
+                            "bandpass", (lowcut, highcut), *design)
+        else:
+            self.run_filter(f"Passa-Banda ({lowcut} - {highcut} Hz)", AudioProcessor.band_pass_filter, file_path,
+                            lowcut, highcut)
+
+    def ask_filter_design(self, title):
+        """Pergunta o projeto do filtro: (método, ordem), None para a máscara na FFT ou False se cancelado"""
+        labels = [label for label, _, _ in self.FILTER_DESIGNS]
+        label, ok = QInputDialog.getItem(self, title, "Projeto do filtro:", labels, 2, False)
+        if not ok:
+            return False
+        _, method, default_order = self.FILTER_DESIGNS[labels.index(label)]
+        if method is None:
+            return None
+
+        prompt = "Ordem do filtro (número de coeficientes - 1):" if method == "fir" else "Ordem do filtro:"
+        order, ok = QInputDialog.getInt(self, title, prompt, value=default_order, min=1,
+                                        max=4096 if method == "fir" else 16)
+        return (method, order) if ok else False
+
+    def run_filter(self, filter_name, filter_function, *args):
+        """Executa o filtro em um thread separado, exibindo o progresso com opção de cancelar"""
+        if self.filter_worker and self.filter_worker.isRunning():
+            QMessageBox.warning(self, "Aguarde", "Já existe uma filtragem em andamento.")
+            return
 
-        # Exibe os gráficos com a Transformada de Fourier
-        self.plot_window = FrequencyPlotWindow(f"Passa-Banda ({lowcut} - {highcut} Hz)", freqs, original_fft, filtered_fft)
+        self.filter_worker = FilterWorker(filter_function, *args)
+
+        self.progress_dialog = QProgressDialog(f"Aplicando filtro {filter_name}...", "Cancelar", 0, 100, self)
+        self.progress_dialog.setWindowModality(Qt.WindowModal)
+        self.progress_dialog.canceled.connect(self.filter_worker.cancel)
+
+        self.filter_worker.progress_signal.connect(self.progress_dialog.setValue)
+        self.filter_worker.result_signal.connect(
+            lambda result: self.on_filter_finished(filter_name, result, filter_function, args))
+        self.filter_worker.error_signal.connect(self.on_filter_error)
+        self.filter_worker.cancelled_signal.connect(lambda: print("Filtragem cancelada"))
+        self.filter_worker.finished.connect(self.progress_dialog.reset)
+        self.filter_worker.start()
+
+    def on_filter_finished(self, filter_name, result, filter_function=None, args=()):
+        """Chama quando o filtro terminar: exibe os gráficos com a Transformada de Fourier"""
+        output_file, original_spectrum, filtered_spectrum = result
+
+        # Filtros projetados também mostram a resposta em frequência, na taxa do arquivo filtrado
+        response = None
+        if filter_function is AudioProcessor.design_filter:
+            _, kind, cutoff, method, order = args
+            design = FilterDesign(kind, cutoff, method, order)
+            sample_rate = original_spectrum.sample_rate
+            response = lambda freqs: design.response(freqs, sample_rate=sample_rate)
+
+        self.plot_window = FrequencyPlotWindow(filter_name, original_spectrum, filtered_spectrum, response=response)
         self.plot_window.exec_()
 
         if output_file:
             QMessageBox.information(self, "Sucesso", f"Arquivo filtrado salvo como: {output_file}")
 
+    def on_filter_error(self, message):
+        """Chama quando o filtro falhar"""
+        QMessageBox.critical(self, "Erro", f"Falha ao aplicar o filtro: {message}")
+
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+class PeakPyramid:
+    """Pirâmide de picos min/max de um canal: permite desenhar a waveform em qualquer zoom com ~2 pontos por pixel.
+
+    O nível 0 guarda o mínimo e o máximo de cada bloco de base_size amostras; cada nível seguinte
+    agrupa factor blocos do anterior.
+    """
+
+    def __init__(self, levels, num_frames, base_size=256, factor=4):
+        self.levels = levels  # Lista de (mins, maxs), do mais fino ao mais grosso
+        self.num_frames = num_frames
+        self.base_size = base_size
+        self.factor = factor
+
+    @staticmethod
+    def minmax(samples, bin_size):
+        """Mínimo e máximo de cada bloco de bin_size amostras (o último bloco pode ser incompleto)"""
+        full = len(samples) // bin_size * bin_size
+        blocks = samples[:full].reshape(-1, bin_size)
+        mins, maxs = blocks.min(axis=1), blocks.max(axis=1)
+        if full < len(samples):
+            mins = np.append(mins, samples[full:].min())
+            maxs = np.append(maxs, samples[full:].max())
+        return mins, maxs
+
+    @classmethod
+    def build(cls, samples, base_size=256, factor=4, chunk_size=1 << 20):
+        """Constrói a pirâmide de forma incremental, em trechos de chunk_size amostras"""
+        chunk_size = max(chunk_size // base_size, 1) * base_size  # Trechos alinhados aos blocos do nível 0
+        parts = [cls.minmax(samples[start:start + chunk_size], base_size)
+                 for start in range(0, len(samples), chunk_size)]
+        if parts:
+            mins, maxs = np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+        else:
+            mins, maxs = np.zeros(0, dtype=samples.dtype), np.zeros(0, dtype=samples.dtype)
+        return cls.from_base(mins, maxs, len(samples), base_size, factor)
+
+    @classmethod
+    def from_base(cls, mins, maxs, num_frames, base_size=256, factor=4):
+        """Completa a pirâmide a partir do nível 0 (ex.: calculado por quem já percorre o sinal em blocos)"""
+        levels = [(mins, maxs)]
+
+        # Níveis superiores: cada bloco resume factor blocos do nível anterior
+        while len(levels[-1][0]) > factor:
+            mins, maxs = levels[-1]
+            levels.append((cls.minmax(mins, factor)[0], cls.minmax(maxs, factor)[1]))
+
+        return cls(levels, num_frames, base_size, factor)
+
+    def segment(self, samples, start, stop, max_points):
+        """Pontos (posições em amostras, valores) para desenhar o trecho [start, stop) com até ~max_points pontos"""
+        start = max(int(start), 0)
+        stop = min(int(stop), self.num_frames)
+        if stop <= start:
+            return np.zeros(0), np.zeros(0)
+        if stop - start <= max_points:
+            return np.arange(start, stop), samples[start:stop]  # Zoom próximo: desenha as amostras em si
+
+        # Tamanho de bloco desejado para caber em max_points (2 pontos, min e max, por bloco)
+        wanted = (stop - start) * 2 // max_points
+        if wanted < self.base_size:
+            # Mais fino que o nível 0: calcula os picos na hora, só para o trecho visível
+            bin_size = wanted
+            first = start // bin_size * bin_size
+            mins, maxs = self.minmax(samples[first:stop], bin_size)
+        else:
+            level = 0
+            while level + 1 < len(self.levels) and self.base_size * self.factor ** level < wanted:
+                level += 1
+            bin_size = self.base_size * self.factor ** level
+            first_bin = start // bin_size
+            last_bin = -(-stop // bin_size)
+            mins, maxs = (values[first_bin:last_bin] for values in self.levels[level])
+            first = first_bin * bin_size
+
+        # Intercala mínimos e máximos: a linha sobe e desce dentro de cada bloco
+        positions = np.repeat(first + np.arange(len(mins)) * bin_size, 2)
+        positions[1::2] += bin_size // 2
+        values = np.empty(2 * len(mins), dtype=mins.dtype)
+        values[0::2] = mins
+        values[1::2] = maxs
+        return positions, values
@@ -0,0 +1,138 @@
+import csv
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TimerStats:
+    """Estatísticas acumuladas de um trecho cronometrado"""
+    __slots__ = ("count", "total", "max", "last")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+class PerfMonitor:
+    """Cronômetros, contadores e medidores dos caminhos críticos (gravação, reprodução, filtros, gráficos).
+
+    Pensado para ficar sempre ligado: cada medição custa uma leitura de relógio e um lock curto.
+    Os resultados podem ser lidos com snapshot()/summary() (ex.: sobreposição na tela) ou gravados
+    periodicamente em CSV ou JSON com start_dump().
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers = {}  # Nome -> TimerStats
+        self.counters = {}  # Nome -> total (ex.: blocos perdidos)
+        self.gauges = {}  # Nome -> último valor (ex.: blocos na fila)
+        self.started = time.monotonic()
+        self.dump_thread = None
+        self.dump_stop = threading.Event()
+
+    @contextmanager
+    def timer(self, name):
+        """Cronometra o bloco with"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self.lock:
+            stats = self.timers.get(name)
+            if stats is None:
+                stats = self.timers[name] = TimerStats()
+            stats.add(seconds)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name, value):
+        self.gauges[name] = value  # Atribuição simples: não precisa do lock
+
+    def reset(self):
+        with self.lock:
+            self.timers.clear()
+            self.counters.clear()
+            self.gauges.clear()
+            self.started = time.monotonic()
+
+    def snapshot(self):
+        """Cópia dos valores atuais, em tipos simples (tempos em milissegundos)"""
+        with self.lock:
+            timers = {name: {"count": stats.count,
+                             "mean_ms": stats.total / stats.count * 1000 if stats.count else 0.0,
+                             "max_ms": stats.max * 1000,
+                             "last_ms": stats.last * 1000,
+                             "total_s": stats.total}
+                      for name, stats in self.timers.items()}
+            counters = dict(self.counters)
+        return {"time": time.time(), "uptime": time.monotonic() - self.started,
+                "timers": timers, "counters": counters, "gauges": dict(self.gauges)}
+
+    def summary(self):
+        """Texto curto, uma linha por medição, para a sobreposição na tela"""
+        snapshot = self.snapshot()
+        lines = [f"{name:<22} {stats['last_ms']:7.2f} ms  (média {stats['mean_ms']:6.2f}, máx {stats['max_ms']:7.2f})"
+                 for name, stats in sorted(snapshot["timers"].items())]
+        lines += [f"{name:<22} {value}" for name, value in sorted(snapshot["counters"].items())]
+        lines += [f"{name:<22} {value}" for name, value in sorted(snapshot["gauges"].items())]
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Acrescenta os valores atuais ao arquivo: linhas de CSV (se .csv) ou um objeto JSON por linha"""
+        snapshot = self.snapshot()
+        if path.endswith(".csv"):
+            new_file = not os.path.exists(path)
+            with open(path, 'a', newline='') as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(["time", "kind", "name", "count", "mean_ms", "max_ms", "last_ms", "value"])
+                for name, stats in sorted(snapshot["timers"].items()):
+                    writer.writerow([f"{snapshot['time']:.3f}", "timer", name, stats["count"],
+                                     f"{stats['mean_ms']:.4f}", f"{stats['max_ms']:.4f}", f"{stats['last_ms']:.4f}", ""])
+                for kind in ("counters", "gauges"):
+                    for name, value in sorted(snapshot[kind].items()):
+                        writer.writerow([f"{snapshot['time']:.3f}", kind[:-1], name, "", "", "", "", value])
+        else:
+            with open(path, 'a') as f:
+                f.write(json.dumps(snapshot) + "\n")
+
+    def start_dump(self, path, interval=5.0):
+        """Grava os valores em path a cada interval segundos, num thread em segundo plano"""
+        self.stop_dump()
+        self.dump_stop.clear()
+
+        def run():
+            while not self.dump_stop.wait(interval):
+                try:
+                    self.dump(path)
+                except OSError as error:
+                    print(f"Erro ao gravar as medições de desempenho: {error}")
+                    return
+
+        self.dump_thread = threading.Thread(target=run, daemon=True)
+        self.dump_thread.start()
+
+    def stop_dump(self):
+        if self.dump_thread is not None:
+            self.dump_stop.set()
+            self.dump_thread.join()
+            self.dump_thread = None
+
+
+monitor = PerfMonitor()  # Instância compartilhada por todos os módulos da aplicação
@@ -0,0 +1,89 @@
+import threading
+from collections import deque
+import numpy as np
+
+
+class PlaybackTransport:
+    """Posição de leitura e velocidade da reprodução, compartilhadas entre o GUI e o thread de áudio.
+
+    Seeks e mudanças de velocidade chegam de qualquer thread (protegidos por um lock) e são aplicados
+    no início do próximo bloco. A velocidade (0,5x a 2x) é obtida por reamostragem linear bloco a bloco.
+    Cada bloco gerado é registrado numa linha do tempo (quadro de saída -> posição no arquivo), que
+    permite converter o que o stream já tocou na posição exata do arquivo.
+    """
+    MIN_SPEED = 0.5
+    MAX_SPEED = 2.0
+
+    def __init__(self, samples, rate):
+        self.samples = samples
+        self.rate = rate
+        self.num_frames = len(samples)
+        self.lock = threading.Lock()
+        self.position = 0.0  # Próximo quadro do arquivo a ser lido (pode ser fracionário)
+        self.speed = 1.0
+        self.seek_target = None
+        self.timeline = deque()  # (índice do quadro de saída, posição no arquivo, velocidade)
+
+    def seek(self, frame):
+        """Pede um salto para o quadro dado (aplicado no próximo bloco)"""
+        with self.lock:
+            self.seek_target = min(max(float(frame), 0.0), float(self.num_frames))
+
+    def set_speed(self, speed):
+        with self.lock:
+            self.speed = min(max(speed, self.MIN_SPEED), self.MAX_SPEED)
+
+    def read_block(self, out_frames):
+        """Gera o próximo bloco de até out_frames quadros de saída.
+
+        Retorna (posição inicial no arquivo, velocidade, bloco, houve_seek); bloco é None no fim do arquivo.
+        """
+        with self.lock:
+            seeked = self.seek_target is not None
+            if seeked:
+                self.position = self.seek_target
+                self.seek_target = None
+            start, speed = self.position, self.speed
+
+            count = min(out_frames, int(np.ceil((self.num_frames - start) / speed)))
+            if count <= 0:
+                return start, speed, None, seeked
+            self.position = start + speed * count
+
+        if speed == 1.0 and start.is_integer():
+            # Caminho direto: as próprias amostras, sem interpolação
+            first = int(start)
+            return start, speed, self.samples[first:first + count], seeked
+
+        # Reamostragem linear: lê o arquivo em passos de "speed" quadros
+        positions = start + speed * np.arange(count)
+        indices = positions.astype(np.int64)
+        fractions = positions - indices
+        first = indices[0]
+        segment = self.samples[first:min(indices[-1] + 2, self.num_frames)].astype(np.float32)
+        local = indices - first
+        following = np.minimum(local + 1, len(segment) - 1)
+        if segment.ndim > 1:
+            fractions = fractions[:, None]
+
+        block = segment[local] + (segment[following] - segment[local]) * fractions
+        if np.issubdtype(self.samples.dtype, np.integer):
+            block = np.rint(block)
+        return start, speed, block.astype(self.samples.dtype), seeked
+
+    def mark(self, out_index, source_position, speed):
+        """Registra que o quadro de saída out_index corresponde a source_position no arquivo"""
+        with self.lock:
+            self.timeline.append((out_index, source_position, speed))
+
+    def source_position(self, played_frames):
+        """Posição no arquivo (em quadros) do quadro de saída que está sendo ouvido agora"""
+        with self.lock:
+            # Descarta os registros que já ficaram para trás (mantendo o último anterior ao quadro atual)
+            while len(self.timeline) > 1 and self.timeline[1][0] <= played_frames:
+                self.timeline.popleft()
+            if not self.timeline:
+                return self.position
+            out_index, source_position, speed = self.timeline[0]
+
+        return min(source_position + max(played_frames - out_index, 0) * speed, self.num_frames)
@@ -0,0 +1,115 @@
+import numpy as np
+
+
+def _sosfilt():
+    """scipy.signal.sosfilt, importado no primeiro efeito configurado (ver SCIPY_FREE_MODULES em
+    startup_benchmark.py)"""
+    from scipy.signal import sosfilt
+    return sosfilt
+
+
+class Biquad:
+    """Filtro biquad (fórmulas do Audio EQ Cookbook, de R. Bristow-Johnson)"""
+    KINDS = ("lowpass", "highpass", "bandpass", "notch", "lowshelf", "highshelf")
+
+    def __init__(self, kind, freq, q=0.707, gain_db=0.0):
+        if kind not in self.KINDS:
+            raise ValueError(f"Tipo de biquad desconhecido: {kind}")
+        self.kind = kind
+        self.freq = freq
+        self.q = q
+        self.gain_db = gain_db  # Usado apenas pelos shelves
+
+    def coefficients(self, sample_rate):
+        """Seção SOS normalizada [b0, b1, b2, 1, a1, a2] para a taxa de amostragem dada"""
+        freq = min(max(self.freq, 1.0), 0.49 * sample_rate)
+        w0 = 2 * np.pi * freq / sample_rate
+        cos_w0 = np.cos(w0)
+        alpha = np.sin(w0) / (2 * self.q)
+        A = 10 ** (self.gain_db / 40)
+        sqrt_a = 2 * np.sqrt(A) * alpha
+
+        if self.kind == "lowpass":
+            b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+            a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+        elif self.kind == "highpass":
+            b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+            a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+        elif self.kind == "bandpass":
+            b = [alpha, 0.0, -alpha]
+            a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+        elif self.kind == "notch":
+            b = [1.0, -2 * cos_w0, 1.0]
+            a = [1 + alpha, -2 * cos_w0, 1 - alpha]
+        elif self.kind == "lowshelf":
+            b = [A * ((A + 1) - (A - 1) * cos_w0 + sqrt_a),
+                 2 * A * ((A - 1) - (A + 1) * cos_w0),
+                 A * ((A + 1) - (A - 1) * cos_w0 - sqrt_a)]
+            a = [(A + 1) + (A - 1) * cos_w0 + sqrt_a,
+                 -2 * ((A - 1) + (A + 1) * cos_w0),
+                 (A + 1) + (A - 1) * cos_w0 - sqrt_a]
+        else:  # highshelf
+            b = [A * ((A + 1) + (A - 1) * cos_w0 + sqrt_a),
+                 -2 * A * ((A - 1) + (A + 1) * cos_w0),
+                 A * ((A + 1) + (A - 1) * cos_w0 - sqrt_a)]
+            a = [(A + 1) - (A - 1) * cos_w0 + sqrt_a,
+                 2 * ((A - 1) - (A + 1) * cos_w0),
+                 (A + 1) - (A - 1) * cos_w0 - sqrt_a]
+
+        return np.array(b + a) / a[0]
+
+
+class EffectsChain:
+    """Cadeia de biquads aplicada bloco a bloco durante a reprodução, com o estado mantido entre blocos.
+
+    Os parâmetros podem mudar durante a reprodução: a nova cadeia é calculada no thread que a altera
+    e adotada pelo thread de áudio no início do próximo bloco, sem locks: ela é publicada numa única
+    atribuição (versão, seções) e o thread de áudio só compara a versão com a da cadeia em uso.
+    """
+
+    def __init__(self, sample_rate=44100):
+        self.sample_rate = sample_rate
+        self.stages = []
+        self.sos = None  # Seções em uso pelo thread de áudio (None = sem efeito)
+        self.zi = None  # Estado dos filtros, preservado entre blocos
+        self.requested = (0, None)  # (versão, seções) da configuração mais recente
+        self.version = 0  # Versão em uso pelo thread de áudio
+        self.sosfilt = None  # Obtido em set_stages, nunca no thread de áudio
+
+    def set_sample_rate(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.set_stages(self.stages)
+
+    def set_stages(self, stages):
+        """Substitui os estágios da cadeia (pode ser chamado durante a reprodução)"""
+        self.stages = list(stages)
+        if self.stages:
+            if self.sosfilt is None:
+                self.sosfilt = _sosfilt()
+            sos = np.array([stage.coefficients(self.sample_rate) for stage in self.stages])
+        else:
+            sos = np.zeros((0, 6))  # Cadeia vazia: volta ao sinal original
+        self.requested = (self.requested[0] + 1, sos)
+
+    def process(self, block):
+        """Filtra um bloco (quadros ou quadros x canais) e retorna o resultado no mesmo tipo do bloco"""
+        version, pending = self.requested  # Uma única leitura: versão e seções sempre do mesmo pedido
+        if version != self.version:
+            self.version = version
+            if self.sos is None or pending.shape != self.sos.shape:
+                self.zi = None  # Número de seções mudou: recomeça o estado
+            self.sos = pending if len(pending) else None
+
+        if self.sos is None:
+            return block
+
+        if self.zi is None or self.zi.shape[2:] != block.shape[1:]:
+            self.zi = np.zeros((len(self.sos), 2) + block.shape[1:])
+
+        offset = 128 if block.dtype == np.uint8 else 0  # PCM de 8 bits é sem sinal
+        filtered, self.zi = self.sosfilt(self.sos, block.astype(np.float64) - offset, axis=0, zi=self.zi)
+        filtered += offset
+        if np.issubdtype(block.dtype, np.integer):
+            info = np.iinfo(block.dtype)
+            filtered = np.clip(np.rint(filtered), info.min, info.max)
+        return filtered.astype(block.dtype)
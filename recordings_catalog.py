@@ -0,0 +1,388 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+import wave
+from contextlib import closing
+import numpy as np
+from audio_decoder import AudioDecoder
+from audio_source import AudioSource, Int24Samples
+
+
+class RecordingsCatalog:
+    """Catálogo local (SQLite) das gravações e dos arquivos derivados delas (filtros, conversões).
+
+    Cada arquivo tem duração, taxa, canais, pico/RMS e o hash do conteúdo; arquivos derivados
+    guardam o arquivo de origem, o hash dele no momento da derivação, a operação e os parâmetros.
+    Assim um resultado já calculado é encontrado por índice (find_derived) em vez de reprocessado,
+    e os nomes das gravações vêm do id, sem listar o diretório.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS recordings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            path TEXT UNIQUE,
+            created REAL NOT NULL,
+            mtime_ns INTEGER,
+            size INTEGER,
+            duration REAL,
+            rate INTEGER,
+            channels INTEGER,
+            sample_width INTEGER,
+            peak REAL,
+            rms REAL,
+            hash TEXT,
+            parent_id INTEGER REFERENCES recordings(id) ON DELETE SET NULL,
+            parent_hash TEXT,
+            operation TEXT,
+            params TEXT
+        );
+        CREATE INDEX IF NOT EXISTS recordings_hash ON recordings(hash);
+        CREATE INDEX IF NOT EXISTS recordings_derivation ON recordings(parent_hash, operation, params);
+        CREATE INDEX IF NOT EXISTS recordings_parent ON recordings(parent_id);
+        CREATE INDEX IF NOT EXISTS recordings_created ON recordings(created);
+        CREATE INDEX IF NOT EXISTS recordings_duration ON recordings(duration);
+    """
+
+    DEFAULT_PATH = object()  # Marca: o caminho padrão é resolvido no primeiro uso (ver default_path)
+
+    def __init__(self, path=DEFAULT_PATH):
+        self._path = path
+        self.initialized = None  # Caminho cujo esquema já foi criado
+
+    @property
+    def path(self):
+        """Arquivo do catálogo; None desativa o catálogo (nada é gravado nem encontrado)"""
+        if self._path is self.DEFAULT_PATH:
+            self._path = self.default_path()
+        return self._path
+
+    @path.setter
+    def path(self, path):
+        self._path = path
+
+    @staticmethod
+    def default_path():
+        """PDS_CATALOG, se definida (vazia desativa o catálogo), ou catalog.sqlite3 no diretório de dados do
+        usuário; nunca relativo ao diretório atual, que muda entre a interface e as ferramentas"""
+        path = os.environ.get("PDS_CATALOG")
+        if path is not None:
+            return os.path.abspath(path) if path else None
+        base = (os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_DATA_HOME")
+                or os.path.join(os.path.expanduser("~"), ".local", "share"))
+        return os.path.join(base, "pds", "catalog.sqlite3")
+
+    def connect(self):
+        """Conexão nova a cada operação: serve a threads e processos distintos (o SQLite faz o bloqueio)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA foreign_keys=ON")
+        if self.initialized != self.path:
+            connection.execute("PRAGMA journal_mode=WAL")  # Leitores não esperam pelos processos que gravam
+            connection.executescript(self.SCHEMA)
+            self.initialized = self.path
+        return connection
+
+    @staticmethod
+    def file_hash(file_path):
+        """Hash SHA-1 do conteúdo do arquivo (lido em blocos de 1 MB)"""
+        digest = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def measure(file_path, block_size=1 << 18):
+        """Duração, taxa, canais, resolução, pico e RMS (em [0, 1]) de um arquivo de áudio"""
+        if file_path.endswith(".wav"):
+            source = AudioSource.open(file_path)  # Em blocos, sobre o arquivo mapeado em memória
+            rate, channels, sample_width, num_frames = source.rate, source.channels, source.sample_width, len(source)
+            blocks = (source.to_float(block) for block in source.blocks(block_size, channel=None))
+        else:
+            rate, audio_data, sample_width = AudioDecoder.decode(file_path, dtype=np.float32)
+            channels, num_frames = audio_data.shape[1], len(audio_data)
+            blocks = (audio_data[start:start + block_size] for start in range(0, num_frames, block_size))
+
+        peak, energy = 0.0, 0.0
+        for block in blocks:
+            if block.size:
+                peak = max(peak, abs(float(block.max())), abs(float(block.min())))
+                energy += float(np.square(block, dtype=np.float64).sum())
+        samples = num_frames * channels
+        return {"duration": num_frames / rate if rate else 0.0, "rate": rate, "channels": channels,
+                "sample_width": sample_width, "peak": peak, "rms": float(np.sqrt(energy / samples)) if samples else 0.0}
+
+    def reserve(self, directory="records", prefix="recorded", extension=".wav"):
+        """Nome para uma nova gravação a partir do id no catálogo, ex.: records/recorded_12.wav.
+
+        O id nunca se repete (AUTOINCREMENT), então apagar gravações não gera colisões; nomes que já
+        existem em disco (de antes do catálogo) são pulados. Sem catálogo, ou se ele falhar (banco
+        travado, diretório somente leitura), o nome é o primeiro livre no diretório.
+        """
+        os.makedirs(directory, exist_ok=True)
+        if self.path is None:
+            return self._free_path(directory, prefix, extension)
+
+        try:
+            with closing(self.connect()) as connection, connection:
+                while True:
+                    row_id = connection.execute("INSERT INTO recordings (created) VALUES (?)",
+                                                (time.time(),)).lastrowid
+                    path = os.path.join(directory, f"{prefix}_{row_id}{extension}")
+                    if not os.path.exists(path):
+                        connection.execute("UPDATE recordings SET path = ? WHERE id = ?",
+                                           (os.path.abspath(path), row_id))
+                        return path
+                    connection.execute("DELETE FROM recordings WHERE id = ?", (row_id,))
+        except (sqlite3.Error, OSError) as error:
+            print(f"Erro ao reservar o nome da gravação no catálogo: {error}")
+            return self._free_path(directory, prefix, extension)
+
+    def release(self, path):
+        """Desfaz uma reserva que não chegou a virar arquivo (ex.: gravação vazia)"""
+        if self.path is None:
+            return
+        try:
+            with closing(self.connect()) as connection, connection:
+                connection.execute("DELETE FROM recordings WHERE path = ? AND hash IS NULL", (os.path.abspath(path),))
+        except sqlite3.Error as error:
+            print(f"Erro ao liberar {path} no catálogo: {error}")
+
+    @staticmethod
+    def _free_path(directory, prefix, extension):
+        index = 1
+        while os.path.exists(os.path.join(directory, f"{prefix}_{index}{extension}")):
+            index += 1
+        return os.path.join(directory, f"{prefix}_{index}{extension}")
+
+    def register(self, file_path, parent=None, operation=None, params=None, stats=None, content_hash=None):
+        """Cadastra (ou atualiza) um arquivo com os metadados, as estatísticas e o hash; retorna a linha.
+
+        parent, operation e params descrevem a derivação (ex.: filtro "500_LP" aplicado a parent); sem
+        eles, a derivação já cadastrada é mantida enquanto o conteúdo não mudar. stats e content_hash,
+        se já conhecidos (ex.: pela AudioAnalysis), evitam percorrer o arquivo de novo.
+        """
+        parent_row = self.lookup(parent) if parent else None
+        stat = os.stat(file_path)
+        values = dict(stats or self.measure(file_path), path=os.path.abspath(file_path), created=time.time(),
+                      mtime_ns=stat.st_mtime_ns, size=stat.st_size, hash=content_hash or self.file_hash(file_path),
+                      parent_id=parent_row["id"] if parent_row else None,
+                      parent_hash=parent_row["hash"] if parent_row else None,
+                      operation=operation, params=self.encode_params(params))
+
+        columns = ", ".join(values)
+        placeholders = ", ".join(f":{name}" for name in values)
+        updates = []
+        for name in values:
+            if name in ("parent_id", "parent_hash", "operation", "params"):
+                updates.append(f"{name} = CASE WHEN excluded.operation IS NULL AND recordings.hash IS excluded.hash "
+                               f"THEN recordings.{name} ELSE excluded.{name} END")
+            elif name not in ("path", "created"):
+                updates.append(f"{name} = excluded.{name}")
+        with closing(self.connect()) as connection, connection:
+            connection.execute(f"INSERT INTO recordings ({columns}) VALUES ({placeholders}) "
+                               f"ON CONFLICT(path) DO UPDATE SET {', '.join(updates)}", values)
+            return self._row(connection, "path = ?", (values["path"],))
+
+    def safe_register(self, file_path, parent=None, operation=None, params=None, stats=None, content_hash=None):
+        """register() para os produtores de arquivos: uma falha no catálogo não perde o resultado"""
+        if self.path is None:
+            return None
+        try:
+            return self.register(file_path, parent, operation, params, stats, content_hash)
+        except (sqlite3.Error, OSError, ValueError) as error:
+            print(f"Erro ao cadastrar {file_path} no catálogo: {error}")
+            return None
+
+    def lookup(self, file_path):
+        """Linha atualizada do arquivo: cadastra-o (ou recalcula o hash) se mudou desde o cadastro"""
+        row = self.get(file_path)
+        stat = os.stat(file_path)
+        if row is not None and row["hash"] and (row["mtime_ns"], row["size"]) == (stat.st_mtime_ns, stat.st_size):
+            return row
+        return self.register(file_path)
+
+    def known_hash(self, file_path):
+        """Hash do conteúdo se o catálogo o conhece para o arquivo como está (mesma data e tamanho), ou
+        None; não lê o arquivo"""
+        if self.path is None:
+            return None
+        try:
+            row = self.get(file_path)
+            stat = os.stat(file_path)
+        except (sqlite3.Error, OSError):
+            return None
+        if row is None or (row["mtime_ns"], row["size"]) != (stat.st_mtime_ns, stat.st_size):
+            return None
+        return row["hash"]
+
+    def get(self, file_path):
+        with closing(self.connect()) as connection:
+            return self._row(connection, "path = ?", (os.path.abspath(file_path),))
+
+    def get_by_id(self, row_id):
+        if row_id is None:
+            return None
+        with closing(self.connect()) as connection:
+            return self._row(connection, "id = ?", (row_id,))
+
+    def find_derived(self, parent, operation, params):
+        """Caminho de um resultado já calculado para o conteúdo de parent com a mesma operação e
+        parâmetros (ainda em disco e inalterado), ou None"""
+        if self.path is None or not os.path.exists(parent):
+            return None
+        parent_hash = self.lookup(parent)["hash"]
+        with closing(self.connect()) as connection:
+            rows = connection.execute("SELECT * FROM recordings WHERE parent_hash = ? AND operation = ? AND params = ?",
+                                      (parent_hash, operation, self.encode_params(params))).fetchall()
+        for row in rows:
+            try:
+                stat = os.stat(row["path"])
+            except OSError:
+                continue  # Apagado: outra cópia ainda pode servir
+            if (stat.st_mtime_ns, stat.st_size) == (row["mtime_ns"], row["size"]):
+                return row["path"]
+        return None
+
+    def reuse(self, parent, operation, params, output_file):
+        """Se o resultado já existe (em qualquer caminho), garante-o em output_file e retorna
+        output_file; senão, None. Uma cópia com outro nome é só copiada, sem reprocessar."""
+        try:
+            existing = self.find_derived(parent, operation, params)
+            if existing is None:
+                return None
+            if os.path.abspath(existing) != os.path.abspath(output_file):
+                shutil.copyfile(existing, output_file)
+                self.register(output_file, parent, operation, params)
+        except (sqlite3.Error, OSError, ValueError) as error:
+            print(f"Erro ao consultar o catálogo: {error}")
+            return None
+        return output_file
+
+    def children(self, file_path):
+        """Arquivos derivados diretamente do arquivo dado"""
+        row = self.get(file_path)
+        if row is None:
+            return []
+        return self.search(parent_id=row["id"])
+
+    def search(self, text=None, min_duration=None, max_duration=None, rate=None, channels=None, parent_id=None,
+               operation=None, limit=100, offset=0):
+        """Arquivos que atendem a todos os critérios informados, dos mais recentes aos mais antigos"""
+        conditions, values = ["path IS NOT NULL"], []
+        for condition, value in [("path LIKE ?", text and f"%{text}%"), ("duration >= ?", min_duration),
+                                 ("duration <= ?", max_duration), ("rate = ?", rate), ("channels = ?", channels),
+                                 ("parent_id = ?", parent_id), ("operation = ?", operation)]:
+            if value is not None:
+                conditions.append(condition)
+                values.append(value)
+        query = f"SELECT * FROM recordings WHERE {' AND '.join(conditions)} ORDER BY created DESC LIMIT ? OFFSET ?"
+        with closing(self.connect()) as connection:
+            return [dict(row) for row in connection.execute(query, values + [limit, offset])]
+
+    def remove(self, file_path):
+        """Tira um arquivo do catálogo (os derivados continuam, sem o vínculo com a origem)"""
+        with closing(self.connect()) as connection, connection:
+            connection.execute("DELETE FROM recordings WHERE path = ?", (os.path.abspath(file_path),))
+
+    @staticmethod
+    def encode_params(params):
+        """Parâmetros em texto canônico (chaves ordenadas), comparável por igualdade no índice"""
+        return None if params is None else json.dumps(params, sort_keys=True)
+
+    @staticmethod
+    def _row(connection, condition, values):
+        row = connection.execute(f"SELECT * FROM recordings WHERE {condition}", values).fetchone()
+        return dict(row) if row is not None else None
+
+
+class MeasuredWavWriter:
+    """WAV gravado com o hash e as estatísticas do catálogo calculados durante a escrita, para cadastrar
+    a saída sem lê-la de novo. Mesma interface do wave (writeframes com bytes PCM intercalados).
+
+    Com num_frames informado o cabeçalho já sai certo e o arquivo é escrito só em sequência; se o
+    total gravado for outro, o wave corrige o cabeçalho e content_hash fica None (o register refaz).
+    """
+    DTYPES = {1: np.dtype(np.uint8), 2: np.dtype('<i2'), 4: np.dtype('<i4')}
+
+    def __init__(self, path, rate, channels, sample_width, num_frames=0):
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.full_scale = 128.0 if sample_width == 1 else float(2 ** (8 * sample_width - 1))
+        self.digest = hashlib.sha1()
+        self.frames, self.peak, self.energy = 0, 0.0, 0.0
+        self.file = open(path, 'wb')
+        try:
+            self.wav = wave.open(self, 'wb')
+            self.wav.setnchannels(channels)
+            self.wav.setsampwidth(sample_width)
+            self.wav.setframerate(rate)
+            self.wav.setnframes(num_frames)
+        except BaseException:
+            self.file.close()
+            raise
+
+    # Interface de arquivo usada pelo wave: tudo o que é escrito passa pelo hash
+    def write(self, data):
+        if self.digest is not None:
+            self.digest.update(data)
+        return self.file.write(data)
+
+    def tell(self):
+        return self.file.tell()
+
+    def seek(self, *args):
+        self.digest = None  # Cabeçalho reescrito: o hash sequencial deixa de valer
+        return self.file.seek(*args)
+
+    def flush(self):
+        self.file.flush()
+
+    def writeframes(self, data):
+        if self.sample_width == 3:
+            samples = Int24Samples(np.frombuffer(data, dtype=np.uint8).reshape(-1, 3))[:]
+        else:
+            samples = np.frombuffer(data, dtype=self.DTYPES[self.sample_width])
+        if samples.size:
+            offset = 128 if self.sample_width == 1 else 0
+            self.peak = max(self.peak, abs(float(samples.max()) - offset) / self.full_scale,
+                            abs(float(samples.min()) - offset) / self.full_scale)
+            block = samples.astype(np.float64)
+            block -= offset
+            block /= self.full_scale
+            self.energy += float(np.square(block).sum())
+        self.frames += len(samples) // self.channels
+        self.wav.writeframesraw(data)  # writeframes corrigiria o cabeçalho a cada bloco (seek); close corrige se preciso
+
+    def close(self):
+        try:
+            self.wav.close()
+        finally:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def content_hash(self):
+        return self.digest.hexdigest() if self.digest is not None else None
+
+    def stats(self):
+        """Estatísticas no formato de RecordingsCatalog.measure"""
+        samples = self.frames * self.channels
+        return {"duration": self.frames / self.rate if self.rate else 0.0, "rate": self.rate,
+                "channels": self.channels, "sample_width": self.sample_width, "peak": self.peak,
+                "rms": float(np.sqrt(self.energy / samples)) if samples else 0.0}
+
+
+# Catálogo compartilhado pela aplicação; o arquivo só é escolhido e aberto no primeiro uso
+catalog = RecordingsCatalog()
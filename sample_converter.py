@@ -0,0 +1,211 @@
+"""Conversão de taxa de amostragem e de resolução (8, 16 ou 24 bits), bloco a bloco.
+
+Usada ao vivo pelo AudioRecorder (captura na taxa nativa do dispositivo, grava na taxa e
+resolução escolhidas) e em arquivos já gravados.
+
+Exemplo:
+    python sample_converter.py gravacao.wav --rate 22050 --bits 16
+"""
+import argparse
+import os
+from fractions import Fraction
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from recordings_catalog import MeasuredWavWriter, catalog
+from streaming_filter import StreamingFilter
+
+
+def _signal():
+    """scipy.signal, importado só quando há reamostragem (ver SCIPY_FREE_MODULES em startup_benchmark.py)"""
+    from scipy import signal
+    return signal
+
+
+class Resampler:
+    """Reamostragem polifásica com razão racional up/down, bloco a bloco.
+
+    O filtro anti-aliasing (Kaiser, zero_crossings cruzamentos por zero de cada lado) é dividido em
+    up fases; cada amostra de saída é o produto de uma fase pelas últimas amostras de entrada, sem
+    inserir zeros nem calcular amostras descartadas. O atraso do filtro é compensado: a saída fica
+    alinhada com a entrada e tem ceil(quadros * up / down) quadros.
+    """
+
+    def __init__(self, from_rate, to_rate, channels=1, zero_crossings=16, beta=8.0, block_frames=8192):
+        ratio = Fraction(int(to_rate), int(from_rate))
+        self.from_rate = from_rate
+        self.to_rate = to_rate
+        self.channels = channels
+        self.up, self.down = ratio.numerator, ratio.denominator
+        self.block_frames = block_frames  # Saídas calculadas por vez (limita a memória das janelas)
+
+        # Passa-baixa na menor das duas frequências de Nyquist, na taxa intermediária (entrada * up)
+        factor = max(self.up, self.down)
+        num_taps = 2 * zero_crossings * factor + 1
+        taps = _signal().firwin(num_taps, 1 / factor, window=("kaiser", beta)) * self.up
+        self.taps_per_phase = -(-num_taps // self.up)
+        padded = np.zeros(self.taps_per_phase * self.up)
+        padded[:num_taps] = taps
+        # phases[p, j] multiplica a j-ésima das últimas taps_per_phase amostras (da mais antiga à mais nova)
+        self.phases = padded.reshape(self.taps_per_phase, self.up).T[:, ::-1].copy()
+        self.delay = zero_crossings * factor  # Atraso do filtro, em amostras da taxa intermediária
+        self.reset()
+
+    def reset(self):
+        self.history = np.zeros((self.taps_per_phase - 1, self.channels))
+        self.input_count = 0  # Quadros de entrada recebidos
+        self.output_count = 0  # Quadros de saída produzidos
+
+    def process(self, block):
+        """Reamostra um bloco (quadros, canais) e retorna os quadros de saída já disponíveis"""
+        samples = np.concatenate([self.history, block])  # samples[0] é o quadro input_count - (taps - 1)
+        total = self.input_count + len(block)
+
+        # Saída m usa a fase p = (m * down + delay) % up e as entradas até n = (m * down + delay) // up
+        stop = max(self.output_count, -(-(total * self.up - self.delay) // self.down))
+        windows = sliding_window_view(samples, self.taps_per_phase, axis=0)  # (posições, canais, taps)
+        output = np.empty((stop - self.output_count, self.channels))
+        for start in range(self.output_count, stop, self.block_frames):
+            positions = np.arange(start, min(start + self.block_frames, stop)) * self.down + self.delay
+            first = start - self.output_count
+            output[first:first + len(positions)] = np.einsum(
+                'mck,mk->mc', windows[positions // self.up - self.input_count], self.phases[positions % self.up])
+
+        self.history = samples[len(samples) - len(self.history):]
+        self.input_count = total
+        self.output_count = stop
+        return output
+
+    def flush(self):
+        """Quadros finais (a cauda do filtro), completando a duração da saída; reinicia o estado"""
+        expected = -(-self.input_count * self.up // self.down)
+        remaining = expected - self.output_count
+        output = self.process(np.zeros((self.taps_per_phase, self.channels)))[:max(remaining, 0)]
+        self.reset()
+        return output
+
+
+class Requantizer:
+    """Converte amostras em ponto flutuante ([-1, 1]) em PCM de 8, 16 ou 24 bits.
+
+    Com dither, soma ruído TPDF de ±1 LSB antes de arredondar: o erro de quantização vira um ruído
+    de fundo constante em vez de distorção correlacionada com o sinal (audível em sinais fracos).
+    """
+    SAMPLE_WIDTHS = (1, 2, 3)
+
+    def __init__(self, sample_width, dither=True, seed=None):
+        if sample_width not in self.SAMPLE_WIDTHS:
+            raise ValueError(f"Resolução não suportada: {8 * sample_width} bits (use 8, 16 ou 24).")
+        self.sample_width = sample_width
+        self.dither = dither
+        self.full_scale = 1 << (8 * sample_width - 1)
+        self.generator = np.random.default_rng(seed)
+
+    def process(self, samples):
+        """Bytes PCM intercalados, no formato do WAV (8 bits sem sinal, 16 e 24 bits little-endian)"""
+        scaled = np.asarray(samples, dtype=np.float64) * self.full_scale
+        if self.dither:
+            scaled += self.generator.random(scaled.shape)
+            scaled -= self.generator.random(scaled.shape)
+        np.rint(scaled, out=scaled)
+        np.clip(scaled, -self.full_scale, self.full_scale - 1, out=scaled)
+        values = scaled.astype('<i4')
+
+        if self.sample_width == 1:
+            return (values + 128).astype(np.uint8).tobytes()
+        if self.sample_width == 2:
+            return values.astype('<i2').tobytes()
+        return values.reshape(-1, 1).view(np.uint8)[:, :3].tobytes()  # 3 bytes menos significativos
+
+
+class SampleConverter:
+    """Taxa de amostragem e resolução de saída de um fluxo de áudio: Resampler seguido de Requantizer"""
+
+    def __init__(self, from_rate, to_rate, channels, sample_width, dither=True):
+        self.from_rate = from_rate
+        self.to_rate = to_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.resampler = Resampler(from_rate, to_rate, channels) if to_rate != from_rate else None
+        self.requantizer = Requantizer(sample_width, dither)
+
+    @staticmethod
+    def normalize(frames):
+        """Amostras PCM (inteiras) ou em ponto flutuante para float64 em [-1, 1]"""
+        frames = np.asarray(frames)
+        if frames.dtype.kind == 'f':
+            return frames.astype(np.float64, copy=False)
+        if frames.dtype == np.uint8:
+            return (frames.astype(np.float64) - 128) / 128
+        return frames.astype(np.float64) / (np.iinfo(frames.dtype).max + 1)
+
+    def process(self, frames):
+        """Converte um bloco (quadros, canais) e retorna os bytes PCM de saída"""
+        samples = self.normalize(frames)
+        if self.resampler is not None:
+            samples = self.resampler.process(samples)
+        return self.requantizer.process(samples)
+
+    def flush(self):
+        """Bytes finais do fluxo (cauda do reamostrador)"""
+        if self.resampler is None:
+            return b''
+        return self.requantizer.process(self.resampler.flush())
+
+    @staticmethod
+    def output_path(file_path, rate, sample_width):
+        """Nome do arquivo convertido, ex.: gravacao_22050Hz_16bit.wav"""
+        return os.path.splitext(file_path)[0] + f"_{rate}Hz_{8 * sample_width}bit.wav"
+
+    @classmethod
+    def convert_file(cls, file_path, output_file=None, rate=None, sample_width=None, dither=True, block_size=65536,
+                     progress_callback=None):
+        """Converte um arquivo para a taxa e a resolução dadas (padrão: as do arquivo), em blocos.
+
+        Retorna o caminho do WAV gravado (ou de uma conversão igual já feita, segundo o catálogo);
+        progress_callback(fração) é chamado a cada bloco e uma exceção levantada por ele interrompe
+        a conversão e remove a saída incompleta.
+        """
+        source = StreamingFilter.open_source(file_path)
+        rate = int(rate or source.rate)
+        sample_width = sample_width or min(source.sample_width, 3)
+        output_file = output_file or cls.output_path(file_path, rate, sample_width)
+        params = {"rate": rate, "sample_width": sample_width, "dither": dither}
+        if catalog.reuse(file_path, "convert", params, output_file):
+            return output_file
+        converter = cls(source.rate, rate, source.channels, sample_width, dither)
+
+        num_frames = -(-len(source) * rate // source.rate)  # Quadros de saída (ver Resampler.flush)
+        try:
+            with MeasuredWavWriter(output_file, rate, source.channels, sample_width, num_frames) as out:
+                done = 0
+                for block in source.blocks(block_size, channel=None):
+                    out.writeframes(converter.process(source.to_float(block)))
+                    done += len(block)
+                    if progress_callback:
+                        progress_callback(done / max(len(source), 1))
+                out.writeframes(converter.flush())
+        except BaseException:
+            if os.path.exists(output_file):
+                os.remove(output_file)
+            raise
+        catalog.safe_register(output_file, parent=file_path, operation="convert", params=params, stats=out.stats(),
+                              content_hash=out.content_hash)
+        return output_file
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converte a taxa de amostragem e a resolução de arquivos de áudio.")
+    parser.add_argument("files", nargs="+", help="arquivos de entrada")
+    parser.add_argument("--rate", type=int, help="taxa de saída em Hz (padrão: a do arquivo)")
+    parser.add_argument("--bits", type=int, choices=[8, 16, 24], help="resolução de saída (padrão: a do arquivo)")
+    parser.add_argument("--no-dither", action="store_true", help="arredonda sem dither")
+    args = parser.parse_args(argv)
+
+    for file_path in args.files:
+        output_file = SampleConverter.convert_file(file_path, rate=args.rate, sample_width=args.bits and args.bits // 8,
+                                                   dither=not args.no_dither)
+        print(f"{file_path} -> {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtCore import QRectF
+from spectrum_analyzer import SpectrumAnalyzer
+
+
+class SpectrogramView(pg.PlotWidget):
+    """Espectrograma com rolagem (STFT em cascata) para gravação e reprodução em tempo real.
+
+    As colunas ficam num buffer circular 2-D pré-alocado: cada novo quadro custa uma FFT e a escrita
+    de uma linha, e a imagem exibida é uma view contínua do buffer, sem reconstrução.
+    """
+
+    def __init__(self, sample_rate=44100, fft_size=1024, hop_size=256, history_seconds=5, min_db=-100, parent=None):
+        super().__init__(parent)
+        self.fft_size = fft_size
+        self.hop_size = hop_size
+        self.history_seconds = history_seconds
+        self.min_db = min_db
+
+        self.image = pg.ImageItem()
+        self.image.setLookupTable(pg.colormap.get('inferno').getLookupTable())
+        self.addItem(self.image)
+
+        self.setTitle("Espectrograma")
+        self.setLabel('left', 'Frequência (Hz)')
+        self.setLabel('bottom', 'Tempo (s)')
+        self.configure(sample_rate)
+
+    def configure(self, sample_rate):
+        """(Re)cria o analisador e o buffer para uma taxa de amostragem"""
+        self.sample_rate = sample_rate
+        self.analyzer = SpectrumAnalyzer(sample_rate=sample_rate, fft_size=self.fft_size, hop_size=self.hop_size,
+                                         averaging="none", frame_callback=self.add_column)
+        self.num_columns = int(self.history_seconds * sample_rate / self.hop_size)
+        num_bins = len(self.analyzer.freqs)
+
+        # Cada coluna é gravada duas vezes (em col e col + num_columns), de modo que
+        # buffer[col:col + num_columns] é sempre o histórico em ordem cronológica
+        self.buffer = np.full((2 * self.num_columns, num_bins), self.min_db, dtype=np.float32)
+        self.column = np.zeros(num_bins, dtype=np.float32)  # Área de trabalho para a conversão em dB
+        self.write_col = 0
+        self.dirty = True
+
+        self.image.setRect(QRectF(-self.history_seconds, 0, self.history_seconds, sample_rate / 2))
+        self.setXRange(-self.history_seconds, 0, padding=0)
+        self.setYRange(0, sample_rate / 2, padding=0)
+        self.refresh()
+
+    def reset(self):
+        """Apaga o histórico"""
+        self.analyzer.reset()
+        self.buffer[:] = self.min_db
+        self.write_col = 0
+        self.dirty = True
+
+    def push(self, samples):
+        """Adiciona amostras; cada hop_size amostras gera uma nova coluna"""
+        self.analyzer.push(samples)
+
+    def add_column(self, magnitude):
+        """Converte a magnitude de um quadro para dB e grava a coluna no buffer circular"""
+        np.add(magnitude, 1e-10, out=self.column, casting='unsafe')
+        np.log10(self.column, out=self.column)
+        self.column *= 20
+
+        self.buffer[self.write_col] = self.column
+        self.buffer[self.write_col + self.num_columns] = self.column
+        self.write_col = (self.write_col + 1) % self.num_columns
+        self.dirty = True
+
+    def refresh(self):
+        """Atualiza a imagem, se houver colunas novas (chamado pelo timer de redesenho)"""
+        if not self.dirty:
+            return
+        self.dirty = False
+        view = self.buffer[self.write_col:self.write_col + self.num_columns]
+        # Níveis fixos: evita recalcular mínimo e máximo da imagem a cada quadro
+        self.image.setImage(view, autoLevels=False, levels=(self.min_db, 0))
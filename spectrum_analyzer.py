@@ -0,0 +1,87 @@
+import numpy as np
+from fft_backend import FFTBackend, fft_backend
+
+
+class SpectrumAnalyzer:
+    """Analisador de espectro em tempo real: buffer circular, janela pré-calculada e média entre quadros"""
+    FULL_SCALE = 32768  # Amplitude máxima de uma amostra de 16 bits
+
+    def __init__(self, sample_rate=44100, fft_size=2048, hop_size=512, window="hann", averaging="exponential",
+                 alpha=0.3, peak_decay=0.9, frame_callback=None):
+        if hop_size > fft_size:
+            raise ValueError("O hop não pode ser maior que o tamanho da FFT.")
+
+        self.sample_rate = sample_rate
+        self.fft_size = fft_size
+        self.hop_size = hop_size
+        self.averaging = averaging  # "exponential", "peak" (peak-hold com decaimento) ou "none"
+        self.alpha = alpha
+        self.peak_decay = peak_decay
+        self.frame_callback = frame_callback  # Chamado com a magnitude de cada quadro (ex.: espectrograma)
+
+        # Janela (compartilhada entre analisadores do mesmo tamanho) e eixo de frequências calculados uma
+        # única vez; a FFT é completada com zeros até um tamanho rápido, se fft_size não for um
+        self.window = FFTBackend.window(window, fft_size)
+        self.transform_size = fft_backend.next_fast_len(fft_size)
+        self.freqs = np.fft.rfftfreq(self.transform_size, d=1 / sample_rate)
+
+        # Escala que leva uma senoide de amplitude máxima a 1.0 (compensa o ganho da janela)
+        self.scale = 2 / (self.window.sum() * self.FULL_SCALE)
+
+        self.ring = np.zeros(fft_size)  # Buffer circular com as últimas fft_size amostras
+        self.frame = np.zeros(fft_size)  # Área de trabalho reutilizada a cada quadro
+        self.spectrum = np.zeros(len(self.freqs))
+        self.reset()
+
+    def reset(self):
+        """Limpa o buffer e o espectro acumulado"""
+        self.ring[:] = 0
+        self.spectrum[:] = 0
+        self.write_pos = 0
+        self.pending = 0  # Amostras recebidas desde o último quadro analisado
+
+    def push(self, samples):
+        """Adiciona amostras ao buffer e analisa um quadro a cada hop_size amostras.
+
+        Retorna True se o espectro foi atualizado.
+        """
+        updated = False
+        offset = 0
+        while offset < len(samples):
+            take = min(self.hop_size - self.pending, len(samples) - offset)
+            self._write(samples[offset:offset + take])
+            offset += take
+            self.pending += take
+
+            if self.pending == self.hop_size:
+                self.pending = 0
+                self._analyze()
+                updated = True
+        return updated
+
+    def _write(self, samples):
+        first = min(len(samples), self.fft_size - self.write_pos)
+        self.ring[self.write_pos:self.write_pos + first] = samples[:first]
+        self.ring[:len(samples) - first] = samples[first:]
+        self.write_pos = (self.write_pos + len(samples)) % self.fft_size
+
+    def _analyze(self):
+        # Reordena o buffer circular (do mais antigo ao mais novo) e aplica a janela, sem alocar
+        tail = self.fft_size - self.write_pos
+        self.frame[:tail] = self.ring[self.write_pos:]
+        self.frame[tail:] = self.ring[:self.write_pos]
+        self.frame *= self.window
+
+        magnitude = np.abs(fft_backend.rfft(self.frame, self.transform_size))
+        magnitude *= self.scale
+        if self.frame_callback:
+            self.frame_callback(magnitude)
+
+        if self.averaging == "exponential":
+            self.spectrum *= 1 - self.alpha
+            self.spectrum += self.alpha * magnitude
+        elif self.averaging == "peak":
+            self.spectrum *= self.peak_decay
+            np.maximum(self.spectrum, magnitude, out=self.spectrum)
+        else:
+            self.spectrum[:] = magnitude
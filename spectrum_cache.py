@@ -0,0 +1,118 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+class SpectrumCache:
+    """Cache LRU do sinal decodificado e da sua FFT, indexado pelo conteúdo do arquivo e pelos parâmetros.
+
+    Em memória, o cache respeita um limite de bytes; opcionalmente, as entradas também são
+    gravadas como arquivos .npy em cache_dir e relidas via memmap.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, cache_dir=None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()  # chave -> (sample_rate, audio_data, fft_data, sample_width)
+        self.current_bytes = 0
+        self.hashes = {}  # (caminho, mtime, tamanho) -> hash, evita reler arquivos inalterados
+        self.lock = threading.Lock()
+
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    def file_hash(self, file_path):
+        """Hash SHA-1 do conteúdo do arquivo (lido em blocos de 1 MB)"""
+        stat = os.stat(file_path)
+        stamp = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+        if stamp in self.hashes:
+            return self.hashes[stamp]
+
+        digest = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        self.hashes[stamp] = digest.hexdigest()
+        return self.hashes[stamp]
+
+    def key(self, file_path, *params):
+        """Chave do cache: hash do conteúdo mais os parâmetros que afetam o resultado"""
+        return "_".join([self.file_hash(file_path)] + [str(param) for param in params])
+
+    def get(self, key):
+        """Busca uma entrada na memória e, se não houver, no disco"""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)  # Marca como usada recentemente
+                return self.entries[key]
+
+        entry = self._load(key)
+        if entry is not None:
+            self._store(key, entry)
+        return entry
+
+    def put(self, key, sample_rate, audio_data, fft_data, sample_width=2):
+        """Guarda uma entrada (os arrays ficam somente leitura, pois são compartilhados); sample_width é a
+        resolução original do arquivo, em bytes"""
+        audio_data.setflags(write=False)
+        fft_data.setflags(write=False)
+        entry = (sample_rate, audio_data, fft_data, sample_width)
+        self._store(key, entry)
+        self._save(key, entry)
+        return entry
+
+    def get_or_compute(self, key, compute):
+        """Retorna a entrada da chave, calculando-a com compute() -> (sample_rate, audio_data, fft_data,
+        sample_width) se faltar"""
+        entry = self.get(key)
+        if entry is None:
+            entry = self.put(key, *compute())
+        return entry
+
+    def clear(self):
+        """Esvazia o cache em memória (os arquivos em disco são mantidos)"""
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def _store(self, key, entry):
+        size = entry[1].nbytes + entry[2].nbytes
+        if size > self.max_bytes:
+            return  # Entrada maior que o orçamento inteiro: não vale a pena manter em memória
+
+        with self.lock:
+            if key in self.entries:
+                return
+            self.entries[key] = entry
+            self.current_bytes += size
+
+            # Remove as entradas menos usadas até caber no limite
+            while self.current_bytes > self.max_bytes:
+                _, (_, audio_data, fft_data, _) = self.entries.popitem(last=False)
+                self.current_bytes -= audio_data.nbytes + fft_data.nbytes
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + "_meta.npy", base + "_signal.npy", base + "_spectrum.npy"
+
+    def _save(self, key, entry):
+        if not self.cache_dir:
+            return
+        meta_path, signal_path, spectrum_path = self._paths(key)
+        np.save(signal_path, entry[1])
+        np.save(spectrum_path, entry[2])
+        np.save(meta_path, np.array([entry[0], entry[3]]))  # Gravado por último: marca a entrada como completa
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        meta_path, signal_path, spectrum_path = self._paths(key)
+        if not os.path.exists(meta_path):
+            return None
+        meta = np.load(meta_path)
+        if len(meta) < 2:
+            return None  # Entrada de versão anterior, sem a resolução: recalcula
+        return (int(meta[0]), np.load(signal_path, mmap_mode='r'), np.load(spectrum_path, mmap_mode='r'),
+                int(meta[1]))
@@ -0,0 +1,94 @@
+"""Mede o tempo de importação dos módulos da aplicação, cada um num interpretador novo.
+
+Serve para detectar regressões de inicialização: falha (código de saída 1) se algum módulo
+carregar um backend pesado (torch, torchaudio, soundfile; o scipy, nos módulos de
+processamento) já na importação ou passar do limite dado em --max-seconds.
+
+Exemplo:
+    python startup_benchmark.py --repeat 5 --max-seconds 1.5 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Módulos importados na inicialização da interface e das ferramentas de linha de comando
+MODULES = ["audio_source", "audio_decoder", "filter_pipeline", "audio_processor", "batch_filter", "main"]
+
+# Backends que só devem ser importados quando um arquivo que precisa deles for aberto
+HEAVY_MODULES = ["torch", "torchaudio", "soundfile"]
+
+# Módulos que também não podem carregar o scipy: só o scipy.signal leva cerca de 1 s para importar, então
+# os filtros projetados, a conversão e os efeitos o importam no primeiro uso (função _signal/_sosfilt de cada um)
+SCIPY_FREE_MODULES = ["audio_source", "audio_decoder", "filter_pipeline", "audio_processor", "batch_filter"]
+
+# Executado em cada interpretador novo: importa o módulo e informa o tempo e os backends carregados
+PROBE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "heavy": [name for name in sys.argv[2:] if name in sys.modules]}))
+"""
+
+
+def measure(module, repeat):
+    """Importa o módulo repeat vezes em processos novos; retorna o resultado com as medianas"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    imports, processes, heavy = [], [], set()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        heavy_modules = HEAVY_MODULES + (["scipy"] if module in SCIPY_FREE_MODULES else [])
+        completed = subprocess.run([sys.executable, "-c", PROBE, module] + heavy_modules,
+                                   cwd=root, capture_output=True, text=True)
+        processes.append(time.perf_counter() - start)
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()
+            return {"module": module, "error": error[-1] if error else f"código {completed.returncode}"}
+        probe = json.loads(completed.stdout.strip().splitlines()[-1])
+        imports.append(probe["seconds"])
+        heavy.update(probe["heavy"])
+
+    return {"module": module,
+            "import_seconds": statistics.median(imports),
+            "process_seconds": statistics.median(processes),  # Inclui a inicialização do interpretador
+            "heavy_modules": sorted(heavy)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o tempo de importação dos módulos da aplicação.")
+    parser.add_argument("modules", nargs="*", default=MODULES, help="módulos a medir (padrão: todos)")
+    parser.add_argument("--repeat", type=int, default=5, help="importações por módulo (usa a mediana)")
+    parser.add_argument("--max-seconds", type=float, help="falha se a importação de algum módulo passar disso")
+    parser.add_argument("--json", metavar="ARQUIVO", help="grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    results = [measure(module, max(args.repeat, 1)) for module in args.modules]
+
+    failures = 0
+    for result in results:
+        if "error" in result:
+            print(f"{result['module']:<18} erro: {result['error']}")
+            continue
+        problems = []
+        if result["heavy_modules"]:
+            problems.append(f"carregou {', '.join(result['heavy_modules'])}")
+        if args.max_seconds is not None and result["import_seconds"] > args.max_seconds:
+            problems.append(f"acima de {args.max_seconds:.2f} s")
+        failures += bool(problems)
+        print(f"{result['module']:<18} importação {result['import_seconds'] * 1000:8.1f} ms   "
+              f"processo {result['process_seconds'] * 1000:8.1f} ms"
+              + (f"   REGRESSÃO: {'; '.join(problems)}" if problems else ""))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"python": sys.version.split()[0], "repeat": args.repeat, "results": results}, f, indent=2)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
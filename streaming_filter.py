@@ -0,0 +1,327 @@
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from audio_decoder import AudioDecoder
+from audio_source import AudioSource
+from display_spectrum import DisplaySpectrum
+from fft_backend import fft_backend
+from recordings_catalog import MeasuredWavWriter, catalog
+
+
+class StreamingFilter:
+    """Filtro FIR aplicado em blocos por overlap-add (convolução via FFT), com uso de memória constante.
+
+    Com channels=None os blocos são 1-D; com channels=N, são matrizes (quadros, N) e todos os canais
+    são filtrados juntos, numa única FFT ao longo do eixo 0.
+    """
+    parallel = True  # O estado entre blocos é só a cauda do bloco anterior: trechos podem ir para outros processos
+    CHUNK_BLOCKS = 32  # Blocos por tarefa na filtragem em vários processos
+
+    def __init__(self, response, sample_rate, num_taps=1025, block_size=65536, channels=None, kernel=None):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        if kernel is not None:
+            num_taps = len(kernel)  # Núcleo já projetado (ex.: FilterDesign); response é ignorada
+        self.num_taps = num_taps | 1  # Número ímpar de coeficientes garante atraso inteiro
+        self.block_size = block_size
+        self.delay = (self.num_taps - 1) // 2  # Atraso de grupo do filtro de fase linear
+
+        # Tamanho da FFT: o menor tamanho rápido que comporta o bloco mais a cauda da convolução (a potência
+        # de 2 seguinte chega a ter quase o dobro do tamanho)
+        self.fft_size = fft_backend.next_fast_len(block_size + self.num_taps - 1)
+
+        if kernel is not None:
+            self.kernel = np.pad(np.asarray(kernel, dtype=np.float64), (0, self.num_taps - len(kernel)))
+        else:
+            self.kernel = self.design_kernel(response, sample_rate, self.num_taps)
+        self.kernel_fft = fft_backend.rfft(self.kernel, self.fft_size)
+        if channels is not None:
+            self.kernel_fft = self.kernel_fft[:, None]  # Mesmo núcleo para todos os canais (broadcast)
+        self.freqs = np.fft.rfftfreq(self.fft_size, d=1 / sample_rate)
+        self.reset()
+
+    @staticmethod
+    def design_kernel(response, sample_rate, num_taps):
+        """Projeta o núcleo FIR por amostragem em frequência da resposta desejada, suavizado por uma janela de Hann"""
+        design_size = 1 << int(np.ceil(np.log2(8 * num_taps)))
+        freqs = np.fft.rfftfreq(design_size, d=1 / sample_rate)
+        gains = np.asarray(response(freqs), dtype=np.float64)
+
+        # Resposta ao impulso de fase zero, centralizada e truncada em num_taps coeficientes
+        impulse = np.fft.irfft(gains, design_size)
+        impulse = np.roll(impulse, num_taps // 2)[:num_taps]
+        return impulse * np.hanning(num_taps + 2)[1:-1]
+
+    def reset(self):
+        """Descarta a cauda acumulada para começar um novo sinal"""
+        shape = (self.num_taps - 1,) if self.channels is None else (self.num_taps - 1, self.channels)
+        self.tail = np.zeros(shape)
+
+    def process_block(self, block):
+        """Filtra um bloco e devolve a mesma quantidade de amostras (a cauda fica guardada para o próximo bloco)"""
+        return self.process_spectrum(fft_backend.rfft(block, self.fft_size, axis=0), len(block))
+
+    def process_spectrum(self, spectrum, size, block=None):
+        """Igual a process_block, mas recebe a FFT do bloco já calculada (o espectro é modificado no lugar).
+
+        block (as amostras do bloco) não é usado aqui; filtros que trabalham no tempo (SOS) precisam dele.
+        """
+        spectrum *= self.kernel_fft
+        output = fft_backend.irfft(spectrum, self.fft_size, axis=0)[:size + self.num_taps - 1]
+
+        # Soma a cauda do bloco anterior (overlap-add)
+        output[:self.num_taps - 1] += self.tail
+        self.tail = output[size:].copy()
+        return output[:size]
+
+    def flush(self):
+        """Devolve a cauda restante ao final do sinal"""
+        tail = self.tail
+        self.reset()
+        return tail
+
+    @classmethod
+    def filter_file(cls, file_path, output_file, response, block_size=65536, num_taps=1025, progress_callback=None,
+                    workers=1, derivation=None):
+        """Filtra um arquivo WAV bloco a bloco e grava a saída incrementalmente.
+
+        Retorna (output_file, original_spectrum, filtered_spectrum), onde os espectros
+        (DisplaySpectrum) são a média das magnitudes dos blocos, na resolução da FFT de bloco. Se informado,
+        progress_callback(fração) é chamado a cada bloco; uma exceção levantada por ele
+        interrompe a filtragem e remove a saída incompleta. Com workers > 1 (None: um por núcleo) os
+        blocos são divididos entre processos; a saída é idêntica, bit a bit, à de um processo só.
+        Com derivation (parâmetros do filtro), a saída é cadastrada no catálogo com o hash e as
+        estatísticas calculados durante a gravação.
+        """
+        def make_filter(sample_rate, channels):
+            return cls(response, sample_rate, num_taps=num_taps, block_size=block_size, channels=channels)
+
+        return StreamingFilter.run_file(file_path, output_file, make_filter, block_size, progress_callback, workers,
+                                        derivation)
+
+    @staticmethod
+    def run_file(file_path, output_file, make_filter, block_size=65536, progress_callback=None, workers=1,
+                 derivation=None):
+        """Como filter_file, mas com o filtro criado por make_filter(sample_rate, channels).
+
+        Aceita qualquer objeto com a interface do StreamingFilter (freqs, fft_size, delay,
+        process_spectrum e flush), como os filtros do FilterDesign. Filtros com parallel = False
+        (recursivos, como os IIR) sempre rodam num processo só.
+        """
+        try:
+            return StreamingFilter._filter_file(file_path, output_file, make_filter, block_size, progress_callback,
+                                                workers, derivation)
+        except BaseException:
+            if os.path.exists(output_file):
+                os.remove(output_file)
+            raise
+
+    @staticmethod
+    def open_source(file_path):
+        """WAV mapeado em memória; outros formatos são decodificados (inteiros) para a memória"""
+        if file_path.endswith(".wav"):
+            return AudioSource.open(file_path)
+        sample_rate, audio_data, sample_width = AudioDecoder.decode(file_path)
+        return AudioSource.from_array(audio_data, sample_rate, sample_width)
+
+    @staticmethod
+    def _filter_file(file_path, output_file, make_filter, block_size, progress_callback, workers=1, derivation=None):
+        # Os blocos são views do arquivo mapeado em memória, com todos os canais
+        source = StreamingFilter.open_source(file_path)
+        sample_rate = source.rate
+        stream_filter = make_filter(sample_rate, source.channels)
+        workers = os.cpu_count() if workers is None else workers
+
+        total_work = 2 * max(len(source), 1)  # Duas passagens sobre o sinal
+        done = 0
+
+        def report(frames):
+            nonlocal done
+            done += frames
+            if progress_callback:
+                progress_callback(min(done / total_work, 1.0))
+
+        # Primeira passagem: filtra e guarda o resultado em float32 num arquivo temporário,
+        # já que o pico da saída (usado na normalização) só é conhecido no final
+        with tempfile.TemporaryFile() as scratch:
+            num_blocks = -(-len(source) // block_size)
+            # Cada trecho recalcula só a cauda do bloco anterior, que não depende dos outros blocos
+            # enquanto o bloco for maior que o núcleo
+            if (workers > 1 and num_blocks > 1 and getattr(stream_filter, "parallel", False)
+                    and block_size >= stream_filter.num_taps - 1):
+                original_fft, filtered_fft, peak = StreamingFilter._parallel_pass(
+                    source, stream_filter, block_size, workers, scratch, report)
+            else:
+                def write(output):
+                    output.astype(np.float32).tofile(scratch)
+
+                original_fft, filtered_fft, peak = StreamingFilter._filter_range(
+                    source, stream_filter, block_size, 0, num_blocks, write, report)
+
+            # Segunda passagem: normaliza para o formato PCM de saída e grava o WAV
+            dtype = AudioSource.output_dtype(source.sample_width)
+            full_scale = np.iinfo(dtype).max
+            scale = full_scale / peak if peak > 0 else 0.0
+            num_frames = scratch.seek(0, os.SEEK_END) // (4 * source.channels)  # float32 por amostra
+            scratch.seek(0)
+            with MeasuredWavWriter(output_file, sample_rate, source.channels, dtype.itemsize, num_frames) as out:
+                while True:
+                    chunk = np.fromfile(scratch, dtype=np.float32, count=block_size * source.channels)
+                    if not len(chunk):
+                        break
+                    chunk = np.clip(chunk.astype(np.float64) * scale, -full_scale, full_scale)
+                    out.writeframes(chunk.astype(dtype).tobytes())  # Quadros intercalados, como no WAV
+                    report(len(chunk) // source.channels)
+        if derivation is not None:
+            catalog.safe_register(output_file, parent=file_path, operation="filter", params=derivation,
+                                  stats=out.stats(), content_hash=out.content_hash)
+
+        if num_blocks:
+            original_fft /= num_blocks
+            filtered_fft /= num_blocks
+
+        # Espectros médios dos blocos, já pequenos (fft_size / 2 + 1 bins); 0 dB = senoide de fundo de escala
+        bin_width = sample_rate / stream_filter.fft_size
+        display_scale = 2 / block_size
+        return (output_file, DisplaySpectrum.build(original_fft, bin_width, display_scale, sample_rate=sample_rate),
+                DisplaySpectrum.build(filtered_fft, bin_width, display_scale, sample_rate=sample_rate))
+
+    @staticmethod
+    def _filter_range(source, stream_filter, block_size, first, stop, write, report=None):
+        """Filtra os blocos [first, stop) da fonte, passando a saída (sem o atraso do filtro) para write.
+
+        Retorna as somas das magnitudes médias dos blocos, antes e depois do filtro, e o pico da
+        saída. O último trecho inclui a cauda do filtro. É o mesmo código num processo só e em cada
+        trecho da filtragem em vários processos, o que garante a mesma saída, bit a bit.
+        """
+        stream_filter.reset()
+        if first > 0:
+            # Cauda do bloco anterior (o bloco é maior que o núcleo, então ela só depende dele)
+            previous = source.samples[(first - 1) * block_size:first * block_size]
+            stream_filter.process_block(source.to_float(previous))
+
+        original_fft = np.zeros(len(stream_filter.freqs))
+        filtered_fft = np.zeros(len(stream_filter.freqs))
+        peak = 0.0
+        for index in range(first, stop):
+            block = source.samples[index * block_size:(index + 1) * block_size]
+            samples = source.to_float(block)
+            spectrum = fft_backend.rfft(samples, stream_filter.fft_size, axis=0)
+            original_fft += np.abs(spectrum).mean(axis=1)  # Magnitude média entre os canais
+            output = stream_filter.process_spectrum(spectrum, len(block), samples)
+            filtered_fft += np.abs(spectrum).mean(axis=1)  # Espectro já multiplicado pelo filtro
+
+            # Compensa o atraso do filtro: descarta o início da saída
+            output = output[min(max(stream_filter.delay - index * block_size, 0), len(output)):]
+            peak = max(peak, float(np.max(np.abs(output), initial=0.0)))
+            write(output)
+            if report:
+                report(len(block))
+
+        if stop == -(-len(source) // block_size):
+            tail = stream_filter.flush()[max(stream_filter.delay - len(source), 0):stream_filter.delay]
+            peak = max(peak, float(np.max(np.abs(tail), initial=0.0)))
+            write(tail)
+        return original_fft, filtered_fft, peak
+
+    @staticmethod
+    def _parallel_pass(source, stream_filter, block_size, workers, scratch, report):
+        """Primeira passagem em vários processos: cada tarefa filtra CHUNK_BLOCKS blocos.
+
+        As amostras não passam pelo pickle: o WAV é mapeado em memória por cada processo e o áudio
+        decodificado (outros formatos) vai numa memória compartilhada; as saídas voltam por 2 * workers
+        áreas de memória compartilhada, gravadas em ordem no arquivo temporário.
+        """
+        num_blocks = -(-len(source) // block_size)
+        chunk_blocks = max(1, min(StreamingFilter.CHUNK_BLOCKS, -(-num_blocks // workers)))
+        num_chunks = -(-num_blocks // chunk_blocks)
+        num_slots = min(2 * workers, num_chunks)
+        slot_shape = (chunk_blocks * block_size + stream_filter.delay, source.channels)  # Com a cauda, no último
+
+        memories = []
+        executor = None
+        try:
+            outputs_memory = SharedMemory(create=True, size=num_slots * int(np.prod(slot_shape)) * 4)
+            memories.append(outputs_memory)
+            outputs = np.ndarray((num_slots,) + slot_shape, dtype=np.float32, buffer=outputs_memory.buf)
+
+            if source.file_path is not None:
+                input_spec = (source.file_path,)
+            else:
+                samples = np.asarray(source.samples)
+                input_memory = SharedMemory(create=True, size=max(samples.nbytes, 1))
+                memories.append(input_memory)
+                np.ndarray(samples.shape, dtype=samples.dtype, buffer=input_memory.buf)[:] = samples
+                input_spec = (None, input_memory.name, samples.shape, samples.dtype.str, source.rate,
+                              source.sample_width)
+
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_filter_worker,
+                                           initargs=(input_spec, stream_filter, outputs_memory.name,
+                                                     outputs.shape))
+            futures = {}
+
+            def submit(chunk):
+                first = chunk * chunk_blocks
+                futures[chunk] = executor.submit(_filter_chunk, block_size, first,
+                                                 min(first + chunk_blocks, num_blocks), chunk % num_slots)
+
+            for chunk in range(num_slots):
+                submit(chunk)
+
+            original_fft = np.zeros(len(stream_filter.freqs))
+            filtered_fft = np.zeros(len(stream_filter.freqs))
+            peak = 0.0
+            for chunk in range(num_chunks):
+                chunk_original, chunk_filtered, chunk_peak, size = futures.pop(chunk).result()
+                outputs[chunk % num_slots][:size].tofile(scratch)
+                if chunk + num_slots < num_chunks:
+                    submit(chunk + num_slots)  # A área acabou de ser copiada: pode ser reutilizada
+
+                original_fft += chunk_original
+                filtered_fft += chunk_filtered
+                peak = max(peak, chunk_peak)
+                first = chunk * chunk_blocks * block_size
+                report(min(first + chunk_blocks * block_size, len(source)) - first)
+            return original_fft, filtered_fft, peak
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)  # Cancelamento: não processa os trechos pendentes
+            for memory in memories:
+                memory.close()
+                memory.unlink()
+
+
+# Estado de cada processo da filtragem em vários processos (criado por _init_filter_worker)
+_worker = {}
+
+
+def _init_filter_worker(input_spec, stream_filter, outputs_name, outputs_shape):
+    fft_backend.workers = 1  # Os processos já ocupam os núcleos: sem threads dentro de cada FFT
+    if input_spec[0] is not None:
+        source = AudioSource.open(input_spec[0])
+    else:
+        _, input_name, shape, dtype, rate, sample_width = input_spec
+        input_memory = SharedMemory(name=input_name)
+        source = AudioSource.from_array(np.ndarray(shape, dtype=dtype, buffer=input_memory.buf), rate, sample_width)
+        _worker["input_memory"] = input_memory
+    outputs_memory = SharedMemory(name=outputs_name)
+    _worker.update(source=source, stream_filter=stream_filter, outputs_memory=outputs_memory,
+                   outputs=np.ndarray(outputs_shape, dtype=np.float32, buffer=outputs_memory.buf))
+
+
+def _filter_chunk(block_size, first, stop, slot):
+    """Filtra os blocos [first, stop) na área slot da memória compartilhada; retorna as somas dos
+    espectros, o pico e o número de quadros gravados"""
+    output_area = _worker["outputs"][slot]
+    size = 0
+
+    def write(output):
+        nonlocal size
+        output_area[size:size + len(output)] = output
+        size += len(output)
+
+    original_fft, filtered_fft, peak = StreamingFilter._filter_range(
+        _worker["source"], _worker["stream_filter"], block_size, first, stop, write)
+    return original_fft, filtered_fft, peak, size
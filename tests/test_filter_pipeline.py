@@ -0,0 +1,60 @@
+"""Regressão das máscaras de FFT: a saída deve ser a da FFT circular no tamanho do arquivo, sem zeros
+completando até um tamanho rápido (que chegava a mudar milhares de LSB)."""
+import os
+import sys
+import wave
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from filter_pipeline import FilterPipeline, LowPass, BandPass  # noqa: E402
+from recordings_catalog import catalog  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    monkeypatch.setattr(catalog, "path", None)
+    monkeypatch.setattr(FilterPipeline, "cache", None)
+
+
+def write_wav(path, num_frames, sample_rate=44100, channels=2):
+    generator = np.random.default_rng(num_frames)
+    t = np.arange(num_frames)[:, None] / sample_rate
+    signal = 0.4 * np.sin(2 * np.pi * np.array([440, 3000][:channels]) * t)
+    signal += 0.1 * generator.standard_normal((num_frames, channels))
+    with wave.open(path, 'wb') as out:
+        out.setnchannels(channels)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        out.writeframes(np.int16(np.clip(signal, -1, 1) * 32767).tobytes())
+
+
+def read_wav(path):
+    with wave.open(path, 'rb') as f:
+        return np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16).reshape(-1, f.getnchannels())
+
+
+def reference(file_path, pipeline):
+    """Algoritmo anterior ao FFTBackend: rfft/irfft com n = número de quadros"""
+    sample_rate, audio_data, _ = FilterPipeline.load(file_path)
+    num_frames = len(audio_data)
+    spectrum = np.fft.rfft(audio_data, axis=0)
+    pipeline.apply(spectrum, sample_rate / num_frames, out=spectrum)
+    filtered = np.fft.irfft(spectrum, n=num_frames, axis=0)
+    scale = 32767 / FilterPipeline.peak(filtered)
+    return np.clip(filtered * scale, -32768, 32767).astype(np.int16)
+
+
+@pytest.mark.parametrize("num_frames", [132300, 132307, 104729])
+@pytest.mark.parametrize("stages", [[LowPass(500)], [BandPass(300, 3000)]])
+def test_mask_matches_unpadded_fft(tmp_path, num_frames, stages):
+    file_path = str(tmp_path / "sinal.wav")
+    write_wav(file_path, num_frames)
+    pipeline = FilterPipeline(stages)
+
+    output_file = pipeline.run(file_path, spectra=False)[0]
+
+    output = read_wav(output_file)
+    assert output.shape == (num_frames, 2)
+    assert np.abs(output.astype(np.int32) - reference(file_path, pipeline)).max() <= 1
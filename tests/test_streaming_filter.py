@@ -0,0 +1,68 @@
+"""Regressão da filtragem em vários processos: a saída deve ser idêntica, bit a bit, à de um processo só."""
+import os
+import sys
+import wave
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from filter_design import FilterDesign  # noqa: E402
+from filter_pipeline import FilterPipeline, LowPass, BandPass  # noqa: E402
+from recordings_catalog import catalog  # noqa: E402
+from streaming_filter import StreamingFilter  # noqa: E402
+
+BLOCK_SIZE = 1024
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    monkeypatch.setattr(catalog, "path", None)
+
+
+def write_wav(path, num_frames, sample_rate=44100, channels=2):
+    generator = np.random.default_rng(num_frames)
+    signal = 0.3 * generator.standard_normal((num_frames, channels))
+    with wave.open(path, 'wb') as out:
+        out.setnchannels(channels)
+        out.setsampwidth(2)
+        out.setframerate(sample_rate)
+        out.writeframes(np.int16(np.clip(signal, -1, 1) * 32767).tobytes())
+
+
+def run(file_path, make_output, workers):
+    """Filtra com o número de processos dado; retorna os bytes do WAV e os espectros exibidos"""
+    output_file, original, filtered = make_output(file_path, workers)
+    with open(output_file, 'rb') as f:
+        data = f.read()
+    os.remove(output_file)
+    return data, original, filtered
+
+
+def pipeline_output(stages):
+    def make_output(file_path, workers):
+        return FilterPipeline(stages).run(file_path, streaming=True, block_size=BLOCK_SIZE, workers=workers)
+    return make_output
+
+
+def design_output(file_path, workers):
+    return FilterDesign("bandpass", (300, 3000), method="fir", order=200).filter_file(
+        file_path, block_size=BLOCK_SIZE, workers=workers)
+
+
+# 70 blocos cheios e um incompleto: nem múltiplo de CHUNK_BLOCKS nem do número de processos
+@pytest.mark.parametrize("num_frames", [70 * BLOCK_SIZE + 123])
+@pytest.mark.parametrize("chunk_blocks", [StreamingFilter.CHUNK_BLOCKS, 5])
+@pytest.mark.parametrize("make_output", [pipeline_output([LowPass(500)]), pipeline_output([BandPass(300, 3000)]),
+                                         design_output], ids=["lowpass", "bandpass", "fir_design"])
+def test_parallel_matches_single_process(tmp_path, monkeypatch, num_frames, chunk_blocks, make_output):
+    monkeypatch.setattr(StreamingFilter, "CHUNK_BLOCKS", chunk_blocks)  # 5: mais trechos que áreas de saída
+    file_path = str(tmp_path / "sinal.wav")
+    write_wav(file_path, num_frames)
+
+    expected, expected_original, expected_filtered = run(file_path, make_output, workers=1)
+    for workers in (2, 3):
+        data, original, filtered = run(file_path, make_output, workers)
+        assert data == expected
+        np.testing.assert_array_equal(original.maxs, expected_original.maxs)
+        np.testing.assert_array_equal(filtered.maxs, expected_filtered.maxs)
@@ -0,0 +1,95 @@
+import os
+import queue
+import threading
+import wave
+
+
+class WavStreamWriter:
+    """Grava blocos de áudio em WAV à medida que chegam, num thread escritor alimentado por uma fila limitada.
+
+    O cabeçalho é corrigido a cada bloco gravado (pelo módulo wave) e novamente ao fechar, então o
+    arquivo continua válido mesmo se o programa for interrompido. Opcionalmente, a gravação é
+    dividida em segmentos (gravacao.wav, gravacao_002.wav, ...) por tamanho ou duração.
+    """
+    _STOP = None  # Sentinela que encerra o thread escritor
+
+    def __init__(self, file_path, channels, sample_width, rate, max_segment_bytes=None, max_segment_seconds=None,
+                 queue_size=64):
+        self.file_path = file_path
+        self.channels = channels
+        self.sample_width = sample_width
+        self.rate = rate
+        self.frame_size = channels * sample_width
+
+        # Limite de cada segmento, em bytes de áudio (o menor entre tamanho e duração)
+        limits = [limit for limit in (max_segment_bytes,
+                                      max_segment_seconds and int(max_segment_seconds * rate) * self.frame_size)
+                  if limit]
+        self.segment_limit = min(limits) // self.frame_size * self.frame_size if limits else None
+
+        self.queue = queue.Queue(maxsize=queue_size)  # Limitada: o gravador espera se o disco atrasar
+        self.files = []  # Segmentos gravados
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, data):
+        """Enfileira um bloco de bytes para gravação"""
+        if self.error:
+            raise self.error
+        self.queue.put(data)
+
+    def close(self):
+        """Grava o que falta na fila, fecha o arquivo e retorna a lista de segmentos gravados"""
+        self.queue.put(self._STOP)
+        self.thread.join()
+        if self.error:
+            raise self.error
+        return self.files
+
+    def segment_path(self, index):
+        if index == 0:
+            return self.file_path
+        base, extension = os.path.splitext(self.file_path)
+        return f"{base}_{index + 1:03d}{extension}"
+
+    def _open_segment(self):
+        path = self.segment_path(len(self.files))
+        wf = wave.open(path, 'wb')
+        wf.setnchannels(self.channels)
+        wf.setsampwidth(self.sample_width)
+        wf.setframerate(self.rate)
+        self.files.append(path)
+        return wf
+
+    def _run(self):
+        wf = None
+        written = 0
+        try:
+            while True:
+                data = self.queue.get()
+                if data is self._STOP:
+                    break
+
+                while data:
+                    if wf is None:
+                        wf = self._open_segment()
+                        written = 0
+
+                    # Parte do bloco que ainda cabe no segmento atual
+                    room = self.segment_limit - written if self.segment_limit else len(data)
+                    part, data = data[:room], data[room:]
+                    wf.writeframes(part)
+                    written += len(part)
+
+                    if self.segment_limit and written >= self.segment_limit:
+                        wf.close()  # Fecha o segmento cheio; o próximo é aberto com o restante do bloco
+                        wf = None
+        except Exception as error:
+            self.error = error
+            # Esvazia a fila para que o gravador não fique bloqueado em write()
+            while self.queue.get() is not self._STOP:
+                pass
+        finally:
+            if wf is not None:
+                wf.close()
@@ -3,13 +3,17 @@ import numpy as np
 import pyqtgraph as pg
 from PyQt5.QtWidgets import QMainWindow, QVBoxLayout, QWidget
 from PyQt5.QtCore import QTimer, pyqtSlot
-import wave
+from audio_analysis import AudioAnalysis
+from audio_source import AudioSource
+from filter_worker import FilterWorker
+from peak_pyramid import PeakPyramid
 
 
 class WaveformWindow(QMainWindow):
     def __init__(self, file_path, parent=None):
         super().__init__(parent)
         self.file_path = file_path
+        self.analysis_worker = None
         self.initUI()
         self.load_waveform()
         self.current_position = 0
@@ -28,32 +32,88 @@ class WaveformWindow(QMainWindow):
         layout.addWidget(self.plot_widget)
         self.central_widget.setLayout(layout)
 
-        self.waveform_curve = self.plot_widget.plot(pen='b')
+        self.waveform_curves = []  # Uma curva por canal, criadas ao carregar o arquivo
         self.position_marker = self.plot_widget.plot(pen='r', symbol='o', symbolBrush='r')
 
     def load_waveform(self):
-        with wave.open(self.file_path, 'rb') as wf:
-            self.rate = wf.getframerate()
-            self.audio_data = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
-            self.audio_data = self.audio_data / np.max(np.abs(self.audio_data))  # Normaliza
+        # Amostras mapeadas em memória (sem cópia); picos, pirâmides e envelope vêm do arquivo de análise
+        # (.analysis.npz). Se ele ainda não é conhecido como válido, a janela abre com pirâmides calculadas
+        # na hora (rápido) e a análise completa (hash, envelope, espectro) roda num thread
+        self.source = AudioSource.open(self.file_path)
+        self.rate = self.source.rate
+        self.channels = [self.source.channel(index) for index in range(self.source.channels)]
+        self.audio_data = self.channels[0]
+        self.offsets = [-2 * index for index in range(len(self.channels))]
+        self.waveform_curves = [self.plot_widget.plot(pen='b') for _ in self.channels]
+        self.envelope_curves = []
 
-        duration = len(self.audio_data) / self.rate
-        self.time_axis = np.linspace(0, duration, num=len(self.audio_data))
-        self.waveform_curve.setData(self.time_axis, self.audio_data)
+        analysis = AudioAnalysis.cached(self.file_path)
+        if analysis is not None:
+            self.set_analysis(analysis)
+        else:
+            self.pyramids = [PeakPyramid.build(channel) for channel in self.channels]
+            self.scales = [self.pyramid_scale(pyramid) for pyramid in self.pyramids]
+            self.analysis_worker = FilterWorker(AudioAnalysis.load_or_build, self.file_path)
+            self.analysis_worker.result_signal.connect(self.on_analysis_finished)
+            self.analysis_worker.error_signal.connect(lambda message: print(f"Erro na análise: {message}"))
+            self.analysis_worker.start()
+
+        self.duration = len(self.audio_data) / self.rate
 
         self.plot_widget.setLabel('bottom', 'Time (s)')
         self.plot_widget.setLabel('left', 'Amplitude')
-        self.plot_widget.setXRange(0, duration)
-        self.plot_widget.setYRange(-1, 1)
+        self.plot_widget.setLimits(xMin=0, xMax=self.duration)
+        self.plot_widget.getViewBox().sigXRangeChanged.connect(self.update_view)
+        self.plot_widget.setXRange(0, self.duration)
+        self.plot_widget.setYRange(self.offsets[-1] - 1, 1)
+        self.update_view()
+
+    def pyramid_scale(self, pyramid):
+        """Escala que normaliza um canal pelo próprio pico, lido do nível mais grosso da pirâmide"""
+        mins, maxs = pyramid.levels[-1]
+        peak = np.max(np.abs(self.source.to_float(np.append(mins, maxs))), initial=0.0)
+        return 1 / peak if peak > 0 else 1.0
+
+    def set_analysis(self, analysis):
+        """Adota a análise do arquivo: pirâmides, escalas pelo pico de cada canal e envelope RMS"""
+        self.analysis = analysis
+        self.pyramids = analysis.pyramids
+        # Cada canal é normalizado pelo próprio pico e desenhado numa faixa, de cima para baixo
+        self.scales = [1 / peak if peak > 0 else 1.0 for peak in analysis.channel_peaks]
+
+        # Envelope RMS de cada canal (±RMS) por trás da waveform
+        times = (np.arange(len(analysis.envelope)) + 0.5) * AudioAnalysis.ENVELOPE_SIZE / self.rate
+        for index, (scale, offset) in enumerate(zip(self.scales, self.offsets)):
+            rms = analysis.envelope[:, index] * scale
+            for sign in (1, -1):
+                curve = self.plot_widget.plot(times, sign * rms + offset, pen=pg.mkPen((120, 120, 255, 120)))
+                curve.setDownsampling(auto=True, method='peak')
+                curve.setClipToView(True)
+                curve.setZValue(-1)  # Atrás da waveform
+                self.envelope_curves.append(curve)
+
+    def on_analysis_finished(self, analysis):
+        """A análise em segundo plano terminou: troca as pirâmides provisórias e redesenha"""
+        self.set_analysis(analysis)
+        self.update_view()
+
+    def update_view(self):
+        """Redesenha apenas o trecho visível, com cerca de 2 pontos por pixel de largura"""
+        x_min, x_max = self.plot_widget.getViewBox().viewRange()[0]
+        max_points = 2 * max(self.plot_widget.width(), 100)
+        for samples, pyramid, curve, scale, offset in zip(self.channels, self.pyramids, self.waveform_curves,
+                                                          self.scales, self.offsets):
+            positions, values = pyramid.segment(samples, x_min * self.rate, x_max * self.rate + 1, max_points)
+            curve.setData(positions / self.rate, self.source.to_float(values) * scale + offset)
 
     def start_tracking(self):
         self.current_position = 0
         self.timer.start(1000)
 
     def update_position(self):
-        if self.current_position < len(self.time_axis):
-            self.position_marker.setData([self.time_axis[self.current_position]],
-                                         [self.audio_data[self.current_position]])
+        if self.current_position < len(self.audio_data):
+            self.position_marker.setData([self.current_position / self.rate],
+                                         [self.source.to_float(self.audio_data[self.current_position]) * self.scales[0]])
             self.current_position += self.rate  # Atualiza a cada segundo
         else:
             self.timer.stop()
@@ -61,9 +121,12 @@ class WaveformWindow(QMainWindow):
     @pyqtSlot(float)
     def update_pointer(self, current_time):
         """Atualiza o ponteiro na waveform de acordo com o tempo de reprodução"""
-        if current_time <= self.time_axis[-1]:
+        if current_time <= self.duration:
             self.position_marker.setData([current_time], [0])  # Atualiza a posição do marcador
 
     def closeEvent(self, event):
         self.timer.stop()
+        if self.analysis_worker is not None and self.analysis_worker.isRunning():
+            self.analysis_worker.cancel()  # A análise é interrompida no próximo bloco, sem gravar o arquivo
+            self.analysis_worker.wait()
         event.accept()
\ No newline at end of file